@@ -0,0 +1,34 @@
+import fitz
+import pytest
+
+
+@pytest.fixture(scope="session")
+def make_pdf():
+    """產生測試用 PDF：板框 + 元件文字，可選嵌入圖片或換字型
+
+    texts 是 (x, y, 文字[, 字級]) 的序列，或傳入頁碼、回傳該頁序列的函式；
+    rect 為 None 時不畫板框。回傳檔案路徑字串。
+    """
+
+    def build(path, pages=1, size=(400, 300), rect=(20, 20, 380, 280), rect_width=1,
+              texts=(), fontsize=10, image_rect=None, base_font=None):
+        doc = fitz.open()
+        for p in range(pages):
+            page = doc.new_page(width=size[0], height=size[1])
+            if rect is not None:
+                page.draw_rect(fitz.Rect(rect), color=(0, 0, 0), width=rect_width)
+            for x, y, text, *font in texts(p) if callable(texts) else texts:
+                page.insert_text((x, y), text, fontsize=font[0] if font else fontsize)
+            if image_rect is not None:
+                pix = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, 8, 8), False)
+                pix.set_rect(pix.irect, (128, 128, 128))
+                page.insert_image(fitz.Rect(image_rect), pixmap=pix)
+        if base_font:
+            # 只換字型，content stream 不變
+            for xref, *_ in doc[0].get_fonts():
+                doc.xref_set_key(xref, "BaseFont", base_font)
+        doc.save(path)
+        doc.close()
+        return str(path)
+
+    return build
@@ -0,0 +1,259 @@
+import hashlib
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+import fitz
+
+from .debug import Debug
+
+
+class BoardIndex:
+    """
+    資料夾內所有板子 PDF 的本機文字索引（SQLite + FTS5）
+
+    * 每個檔案存下 get_text("blocks") / get_text("words") 的結果與座標，
+      PDFViewer 可以直接從這裡載入搜尋索引，不必重新抽取文字
+    * FTS5 表記錄每頁的文字，用來回答「哪些板子含有 C924」
+    * 以 mtime / 檔案大小判斷是否需要重建；兩者有變才計算檔案 hash，
+      內容相同（只是被複製、touch）就只更新 mtime
+    """
+
+    # 抽取格式有修改時調高，舊的資料會自動重建
+    VERSION = 1
+    DEFAULT_PATH = os.path.join(os.path.expanduser("~"), ".allisa", "board_index.sqlite3")
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS files (
+        id INTEGER PRIMARY KEY,
+        path TEXT UNIQUE NOT NULL,
+        mtime REAL NOT NULL,
+        size INTEGER NOT NULL,
+        hash TEXT NOT NULL,
+        version INTEGER NOT NULL,
+        page_count INTEGER NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS blocks (
+        file_id INTEGER NOT NULL,
+        page INTEGER NOT NULL,
+        x0 REAL, y0 REAL, x1 REAL, y1 REAL,
+        text TEXT,
+        block_no INTEGER,
+        block_type INTEGER
+    );
+    CREATE TABLE IF NOT EXISTS words (
+        file_id INTEGER NOT NULL,
+        page INTEGER NOT NULL,
+        x0 REAL, y0 REAL, x1 REAL, y1 REAL,
+        text TEXT,
+        block_no INTEGER,
+        line_no INTEGER,
+        word_no INTEGER
+    );
+    CREATE INDEX IF NOT EXISTS blocks_file ON blocks(file_id, page);
+    CREATE INDEX IF NOT EXISTS words_file ON words(file_id, page);
+    CREATE VIRTUAL TABLE IF NOT EXISTS page_text USING fts5(
+        text, file_id UNINDEXED, page UNINDEXED
+    );
+    """
+
+    def __init__(self, path: str = DEFAULT_PATH):
+        self.path = path
+        # 同一時間只允許一個寫入者（背景索引 / PDFViewer 回寫）
+        self._write_lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(self.SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        """每次操作各自開連線（結束時 commit 並關閉），背景執行緒與主執行緒互不共用"""
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def file_hash(path: str) -> str:
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+        return h.hexdigest()
+
+    def _file_row(self, conn: sqlite3.Connection, path: str):
+        return conn.execute(
+            "SELECT id, mtime, size, hash, version FROM files WHERE path = ?", (path,)
+        ).fetchone()
+
+    def _fresh_id(self, conn: sqlite3.Connection, path: str) -> int | None:
+        """檔案已是最新就回傳 file_id，需要重建則回傳 None"""
+        row = self._file_row(conn, path)
+        if row is None:
+            return None
+        file_id, mtime, size, digest, version = row
+        if version != self.VERSION:
+            return None
+
+        stat = os.stat(path)
+        if stat.st_mtime == mtime and stat.st_size == size:
+            return file_id
+
+        # mtime 或大小有變：內容相同就只更新紀錄
+        if stat.st_size == size and self.file_hash(path) == digest:
+            with self._write_lock, conn:
+                conn.execute("UPDATE files SET mtime = ? WHERE id = ?", (stat.st_mtime, file_id))
+            return file_id
+        return None
+
+    def is_fresh(self, path: str) -> bool:
+        with self._connect() as conn:
+            return self._fresh_id(conn, path) is not None
+
+    def store(self, path: str, pages: list[tuple[list, list]]):
+        """
+        寫入一個檔案的抽取結果（取代舊資料）
+        pages: [(blocks, words), ...]，格式同 page.get_text("blocks") / ("words")
+        """
+        stat = os.stat(path)
+        digest = self.file_hash(path)
+
+        with self._write_lock, self._connect() as conn:
+            row = self._file_row(conn, path)
+            if row is not None:
+                self._delete_rows(conn, row[0])
+                conn.execute(
+                    "UPDATE files SET mtime = ?, size = ?, hash = ?, version = ?, page_count = ? WHERE id = ?",
+                    (stat.st_mtime, stat.st_size, digest, self.VERSION, len(pages), row[0])
+                )
+                file_id = row[0]
+            else:
+                file_id = conn.execute(
+                    "INSERT INTO files (path, mtime, size, hash, version, page_count) VALUES (?, ?, ?, ?, ?, ?)",
+                    (path, stat.st_mtime, stat.st_size, digest, self.VERSION, len(pages))
+                ).lastrowid
+
+            for page, (blocks, words) in enumerate(pages):
+                conn.executemany(
+                    "INSERT INTO blocks VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    [
+                        (file_id, page, *b[:6], b[6] if len(b) > 6 else 0)
+                        for b in blocks
+                        if len(b) >= 6 and isinstance(b[4], str)
+                    ]
+                )
+                conn.executemany(
+                    "INSERT INTO words VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    [(file_id, page, *w[:8]) for w in words]
+                )
+                conn.execute(
+                    "INSERT INTO page_text (text, file_id, page) VALUES (?, ?, ?)",
+                    (" ".join(w[4] for w in words), file_id, page)
+                )
+
+    @staticmethod
+    def _delete_rows(conn: sqlite3.Connection, file_id: int):
+        conn.execute("DELETE FROM blocks WHERE file_id = ?", (file_id,))
+        conn.execute("DELETE FROM words WHERE file_id = ?", (file_id,))
+        conn.execute("DELETE FROM page_text WHERE file_id = ?", (file_id,))
+
+    @staticmethod
+    def extract(path: str) -> list[tuple[list, list]]:
+        """抽取每頁的 blocks / words（同一個 TextPage）"""
+        pages = []
+        with fitz.open(path) as doc:
+            for page in doc:
+                textpage = page.get_textpage()
+                pages.append((
+                    page.get_text("blocks", textpage=textpage),
+                    page.get_text("words", textpage=textpage),
+                ))
+        return pages
+
+    def update_file(self, path: str) -> bool:
+        """檔案有變動才重新抽取，回傳是否有重建"""
+        if self.is_fresh(path):
+            return False
+        self.store(path, self.extract(path))
+        return True
+
+    @Debug.event("board index update", "green")
+    def update(self, paths: list[str], prune_folder: str = None) -> int:
+        """
+        增量更新多個檔案，回傳重建的檔案數
+        prune_folder: 一併刪除該資料夾下已不存在於 paths 的紀錄
+        """
+        updated = 0
+        for path in paths:
+            try:
+                if self.update_file(path):
+                    updated += 1
+                    print(f"已索引：{path}")
+            except Exception as e:
+                # 單一壞檔不影響其他檔案
+                print(f"索引失敗：{path}：{e}")
+
+        if prune_folder is not None:
+            self.prune(prune_folder, paths)
+        return updated
+
+    def prune(self, folder: str, keep: list[str]):
+        """刪除 folder 底下不在 keep 中的檔案紀錄"""
+        keep = set(keep)
+        folder = os.path.join(folder, "")
+        with self._write_lock, self._connect() as conn:
+            rows = conn.execute("SELECT id, path FROM files").fetchall()
+            for file_id, path in rows:
+                if path.startswith(folder) and path not in keep:
+                    self._delete_rows(conn, file_id)
+                    conn.execute("DELETE FROM files WHERE id = ?", (file_id,))
+
+    def load(self, path: str) -> list[tuple[list, list]] | None:
+        """
+        讀取已索引的 [(blocks, words), ...]
+        檔案未索引或已變動時回傳 None
+        """
+        with self._connect() as conn:
+            file_id = self._fresh_id(conn, path)
+            if file_id is None:
+                return None
+
+            page_count = conn.execute(
+                "SELECT page_count FROM files WHERE id = ?", (file_id,)
+            ).fetchone()[0]
+            pages = [([], []) for _ in range(page_count)]
+
+            for page, *block in conn.execute(
+                "SELECT page, x0, y0, x1, y1, text, block_no, block_type FROM blocks "
+                "WHERE file_id = ? ORDER BY rowid", (file_id,)
+            ):
+                pages[page][0].append(tuple(block))
+            for page, *word in conn.execute(
+                "SELECT page, x0, y0, x1, y1, text, block_no, line_no, word_no FROM words "
+                "WHERE file_id = ? ORDER BY rowid", (file_id,)
+            ):
+                pages[page][1].append(tuple(word))
+        return pages
+
+    def find_boards(self, designator: str) -> list[str]:
+        """含有指定 designator 的檔案路徑（FTS5 片語查詢，不分大小寫）"""
+        designator = designator.strip()
+        if not designator:
+            return []
+        query = '"' + designator.replace('"', '""') + '"'
+        with self._connect() as conn:
+            try:
+                rows = conn.execute(
+                    "SELECT DISTINCT files.path FROM page_text "
+                    "JOIN files ON files.id = page_text.file_id "
+                    "WHERE page_text MATCH ?", (query,)
+                ).fetchall()
+            except sqlite3.OperationalError:
+                # 只有符號、無法組成查詢的字串
+                return []
+        return [row[0] for row in rows]
@@ -0,0 +1,132 @@
+import hashlib
+import json
+import os
+import threading
+
+import fitz
+
+from .data import BoundingBox, Union
+from .debug import Debug
+
+
+class BoundingBoxCache:
+    """
+    板子邊界框的本機快取（JSON）
+    以 PDF 頁面內容的 hash 為 key，同時記錄計算時使用的參數；
+    檔案內容或參數任一改變，查詢就會 miss 並重新計算
+
+    * set 只更新記憶體，flush 才寫檔（每塊板子算完寫一次，不是每頁一次）
+    * 最多保留 MAX_ENTRIES 筆，超過時淘汰最久沒用到的
+    """
+
+    # 演算法或 hash 內容有修改時調高，舊的快取會自動失效
+    VERSION = 2
+    MAX_ENTRIES = 2000
+    DEFAULT_PATH = os.path.join(os.path.expanduser("~"), ".allisa", "bbox_cache.json")
+
+    def __init__(self, path: str = DEFAULT_PATH, max_entries: int = MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        # dict 的順序即使用順序：最久沒用到的在最前面
+        self.entries: dict[str, dict] = self._load()
+        self._dirty = False
+
+    def _load(self) -> dict:
+        if not os.path.isfile(self.path):
+            return {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"讀取邊界框快取失敗，忽略快取：{e}")
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    def _evict(self):
+        """超過上限時從最久沒用到的開始刪除"""
+        overflow = len(self.entries) - self.max_entries
+        if overflow > 0:
+            for key in list(self.entries)[:overflow]:
+                del self.entries[key]
+            self._dirty = True
+
+    def _save(self):
+        """先寫暫存檔再取代，避免寫到一半被中斷造成檔案損毀"""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    @staticmethod
+    def page_hash(page: fitz.Page) -> str:
+        """頁面內容 hash：content stream + 引用的 XObject/圖片/字型 + 頁面尺寸，不需渲染"""
+        doc = page.parent
+        h = hashlib.sha256()
+        h.update(f"{tuple(page.rect)}|{page.rotation}".encode())
+        h.update(page.read_contents())
+        for xref in sorted({x[0] for x in page.get_xobjects()} | {x[0] for x in page.get_images()}):
+            h.update(doc.xref_stream_raw(xref) or b"")
+        # 字型：字型字典（編碼、字寬）+ 內嵌的字型檔，換字型會改變文字的外框
+        for xref in sorted({x[0] for x in page.get_fonts()}):
+            h.update(doc.xref_object(xref, compressed=True).encode())
+            h.update(doc.extract_font(xref)[-1] or b"")
+        return h.hexdigest()
+
+    def get(self, page_hash: str, params: dict) -> Union[BoundingBox, None]:
+        with self._lock:
+            entry = self.entries.get(page_hash)
+            if not entry:
+                return None
+            if entry.get("version") != self.VERSION or entry.get("params") != params:
+                return None
+            # 移到最後（最近使用），只改記憶體，下次 flush 一併寫入
+            self.entries[page_hash] = self.entries.pop(page_hash)
+        return BoundingBox(*entry["bbox"])
+
+    def set(self, page_hash: str, params: dict, bbox: BoundingBox, name: str = ""):
+        """只更新記憶體，呼叫 flush 才寫檔"""
+        with self._lock:
+            self.entries.pop(page_hash, None)
+            self.entries[page_hash] = {
+                "version": self.VERSION,
+                "params": params,
+                "bbox": [int(v) for v in bbox.as_tuple()],
+                "name": name,
+            }
+            self._dirty = True
+            self._evict()
+
+    def flush(self):
+        """有修改時寫檔（整塊板子的頁面都 set 完再呼叫一次）"""
+        with self._lock:
+            if not self._dirty:
+                return
+            try:
+                self._save()
+                self._dirty = False
+            except OSError as e:
+                print(f"寫入邊界框快取失敗：{e}")
+
+    @Debug.event("bounding box cache", "green")
+    def get_or_compute(self, pdf, idx: int = 0, **params) -> BoundingBox:
+        """
+        先查快取，miss 才執行 pdf.get_board_bounding_box(idx, **params)
+        兩種情況都會設定 pdf.bounding_box
+        """
+        key, bbox = self.lookup(pdf, idx, params)
+        if bbox is not None:
+            pdf.set_bounding_box(bbox, idx)
+            return bbox
+
+        bbox = pdf.get_board_bounding_box(idx, **params)
+        self.set(key, params, bbox, pdf.get_file_name())
+        self.flush()
+        return bbox
+
+    def lookup(self, pdf, idx: int, params: dict) -> tuple[str, Union[BoundingBox, None]]:
+        """回傳 (頁面 hash, 快取的 BoundingBox 或 None)"""
+        with pdf.lock:
+            key = self.page_hash(pdf.get_page(idx))
+        return key, self.get(key, params)
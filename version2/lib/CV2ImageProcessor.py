@@ -1,50 +1,167 @@
 import cv2
 import numpy as np
-from typing import Tuple,List
+from typing import Tuple,List,Dict
+import fitz
 from fitz import Pixmap
 from PIL import Image, ImageTk,ImageDraw,ImageFont
 import math
+from functools import lru_cache
 
 from .SinglePDF import SinglePDF
 from .debug import Debug
+from .LabelLayout import LabelLayout
 from .data.models import FoundResult,BoxInfo,ZoomScreen, BoundingBox
 
+@lru_cache(maxsize=32)
+def composite_lut(color: Tuple[int, int, int], alpha: int) -> np.ndarray:
+    """
+    PIL Image.alpha_composite 在底圖不透明（alpha=255）時的逐通道查表：
+    lut[c][dst] = 與 alpha_composite 相同整數運算的結果
+    """
+    PRECISION_BITS = 7
+    outa255 = alpha * 255 + 255 * (255 - alpha)
+    coef1 = alpha * 255 * 255 * (1 << PRECISION_BITS) // outa255
+    coef2 = 255 * (1 << PRECISION_BITS) - coef1
+
+    dst = np.arange(256, dtype=np.uint32)
+    lut = np.empty((3, 256), dtype=np.uint8)
+    for c, src in enumerate(color):
+        tmp = src * coef1 + dst * coef2 + (0x80 << PRECISION_BITS)
+        lut[c] = ((((tmp >> 8) + tmp) >> 8) >> PRECISION_BITS).astype(np.uint8)
+    return lut
+
+
+def blend_in_place(image: np.ndarray, rect: Tuple[int, int, int, int], color: Tuple[int, int, int], alpha: int, mask: np.ndarray = None):
+    """
+    把半透明單色疊到 image 的 rect=(x0, y0, x1, y1)（不含 x1, y1）範圍，直接改寫 image
+    mask 為同尺寸的布林遮罩時只處理 True 的像素
+    """
+    x0, y0, x1, y1 = rect
+    if x0 >= x1 or y0 >= y1:
+        return
+    lut = composite_lut(tuple(color), alpha)
+    region = image[y0:y1, x0:x1]
+    for c in range(3):
+        channel = region[..., c]
+        if mask is None:
+            channel[...] = lut[c][channel]
+        else:
+            channel[mask] = lut[c][channel[mask]]
+
+
+class ZoomTileSource:
+    """
+    zoom 區塊按需渲染
+    每個 ZoomScreen 只用 get_pixmap(clip=...) 渲染 display 範圍，
+    不再保留整頁的高解析度影像；框線畫法與整頁版 draw_boxes 相同
+    """
+
+    def __init__(self,
+        pdfs: Dict[str, SinglePDF],
+        result: FoundResult,
+        zoom: float,
+        scale: float = 1,
+        thickness: int = 2,
+        color: Tuple[int, int, int] = (255, 0, 0),
+    ):
+        self.pdfs = pdfs
+        self.group_box = result.get_by_page()
+        self.zoom = zoom
+        self.scale = scale
+        self.thickness = thickness
+        self.color = color
+
+    def render(self, zoom_screen: ZoomScreen) -> np.ndarray:
+        """回傳 display 範圍的 BGR 影像（與整頁影像裁切結果相同）"""
+        pdf = self.pdfs[zoom_screen.side]
+        page = zoom_screen.page
+        display = zoom_screen.display
+
+        # 邊界保護，與整頁裁切相同的規則
+        w, h = pdf.get_pixel_size(self.zoom, page)
+        x0 = max(0, min(display.x0, w - 1))
+        x1 = max(0, min(display.x1, w))
+        y0 = max(0, min(display.y0, h - 1))
+        y1 = max(0, min(display.y1, h))
+        if x1 <= x0 or y1 <= y0:
+            return np.zeros((max(0, y1 - y0), max(0, x1 - x0), 3), dtype=np.uint8)
+
+        # 多渲染 1px 邊，避免 clip 換算成整數像素時少一列
+        zoom = self.zoom
+        clip = fitz.Rect((x0 - 1) / zoom, (y0 - 1) / zoom, (x1 + 1) / zoom, (y1 + 1) / zoom)
+        # 文件的 lock 在 SinglePDF / PageContext 內，與搜尋、minimap 等其他執行緒共用
+        pix = pdf.get_clip_pixmap(clip, zoom, page)
+        ox, oy = pix.x, pix.y
+
+        tile = np.frombuffer(pix.samples, dtype=np.uint8).reshape((pix.height, pix.width, pix.n))
+        if pix.n == 4:
+            tile = cv2.cvtColor(tile, cv2.COLOR_RGBA2BGR)
+        elif pix.n == 1:
+            tile = cv2.cvtColor(tile, cv2.COLOR_GRAY2BGR)
+        else:
+            tile = cv2.cvtColor(tile, cv2.COLOR_RGB2BGR)
+
+        # 畫與此區塊相交的元件框（座標平移到 tile）
+        factor = zoom * self.scale
+        th, tw = tile.shape[:2]
+        for box in self.group_box.get((zoom_screen.side, page), []):
+            bx0, by0 = int(box.x0 * factor) - ox, int(box.y0 * factor) - oy
+            bx1, by1 = int(box.x1 * factor) - ox, int(box.y1 * factor) - oy
+            margin = self.thickness
+            if bx1 < -margin or by1 < -margin or bx0 > tw + margin or by0 > th + margin:
+                continue
+            cv2.rectangle(tile, (bx0, by0), (bx1, by1), self.color, self.thickness)
+
+        return tile[y0 - oy:y1 - oy, x0 - ox:x1 - ox]
+
+
 class DisplayEngine:
     def __init__(self):
-        self.front: CV2ImageProcessor = None
-        self.back: CV2ImageProcessor = None
+        # 以 (side, page) 為 key 的影像處理器
+        self.pages: Dict[Tuple[str, int], CV2ImageProcessor] = {}
+        
+        # 設定時 get_zoom 改為按需渲染，不使用 self.pages
+        self.zoom_source: ZoomTileSource = None
+
+    @property
+    def front(self) -> "CV2ImageProcessor":
+        """正面第 0 頁"""
+        return self.pages.get(("front", 0))
+
+    @front.setter
+    def front(self, processor: "CV2ImageProcessor"):
+        self.pages[("front", 0)] = processor
+
+    @property
+    def back(self) -> "CV2ImageProcessor":
+        """背面第 0 頁"""
+        return self.pages.get(("back", 0))
+
+    @back.setter
+    def back(self, processor: "CV2ImageProcessor"):
+        self.pages[("back", 0)] = processor
         
     def set_valid(self,
         pdf_data: Tuple[SinglePDF, SinglePDF],
         zoom: float = 0.8,
-        scale:float = 1
+        scale:float = 1,
+        page: int = 0
     ):
-        front, back = pdf_data
-        front_pixmap = front.get_pixmap(zoom)
-        back_pixmap = back.get_pixmap(zoom)
-        
-        self.front = CV2ImageProcessor(
-            front_pixmap,[],zoom,scale
-        )
-        self.back = CV2ImageProcessor(
-            back_pixmap,[],zoom,scale
-        )
-        
-        # 畫文字除錯框
-        self.front.draw_block_highlight(
-            front.get_blocks()
-        )
-        self.back.draw_block_highlight(
-            back.get_blocks()
-        )
-        
-        # 畫邊界
-        self.front.draw_bounding_box(
-            front.bounding_box
-        )
-        self.back.draw_bounding_box(
-            back.bounding_box
-        )
+        for pdf in pdf_data:
+            processor = CV2ImageProcessor(
+                pdf.get_pixmap(zoom, page),[],zoom,scale
+            )
+            self.pages[(pdf.side, page)] = processor
+            
+            # 畫文字除錯框
+            processor.draw_block_highlight(
+                pdf.get_blocks(page)
+            )
+            
+            # 畫邊界
+            processor.draw_bounding_box(
+                pdf.bounding_boxes.get(page, pdf.bounding_box)
+            )
         
     def set_result(self,
         pixmaps:Tuple[Pixmap, Pixmap],
@@ -55,40 +172,69 @@ class DisplayEngine:
         color: Tuple[int, int, int] = (255, 0, 0),
     ):
         front_pix, back_pix = pixmaps
-        group_box = result.get_by_side()
+        self.set_result_pages(
+            {("front", 0): front_pix, ("back", 0): back_pix},
+            result, zoom, scale, thickness, color
+        )
+
+    def set_result_pages(self,
+        pixmaps: Dict[Tuple[str, int], Pixmap],
+        result:FoundResult,
+        zoom: float,
+        scale: float=1,
+        thickness: int = 2,
+        color: Tuple[int, int, int] = (255, 0, 0),
+    ):
+        """多頁版 set_result，pixmaps 以 (side, page) 為 key"""
+        group_box = result.get_by_page()
         
         # set cv2 image processor
-        self.front = CV2ImageProcessor(front_pix,group_box["front"],zoom,scale)
-        self.back = CV2ImageProcessor(back_pix,group_box["back"],zoom,scale)
-        
-        self.front.draw_boxes(scale,thickness=thickness,color=color)
-        self.back.draw_boxes(scale,thickness=thickness,color=color)
+        self.zoom_source = None
+        self.pages = {}
+        for key, pix in pixmaps.items():
+            processor = CV2ImageProcessor(pix,group_box.get(key, []),zoom,scale)
+            processor.draw_boxes(scale,thickness=thickness,color=color)
+            self.pages[key] = processor
     
-    @Debug.event("mini map debug","magenta")
+    def set_zoom_source(self,
+        pdfs: Dict[str, SinglePDF],
+        result: FoundResult,
+        zoom: float,
+        scale: float = 1,
+        thickness: int = 2,
+        color: Tuple[int, int, int] = (255, 0, 0),
+    ):
+        """zoom 區塊改為按需 clip 渲染，pdfs 以 side 為 key"""
+        self.pages = {}
+        self.zoom_source = ZoomTileSource(pdfs, result, zoom, scale, thickness, color)
+
     def draw_bounding_box(self,bounding_boxes:Tuple[BoundingBox, BoundingBox],):
         front_bounding_box, back_bounding_box = bounding_boxes
-        fi = self.front.draw_bounding_box(front_bounding_box)
-        bi = self.back.draw_bounding_box(back_bounding_box)
-        
-        print(fi.mode)
-        
-        x, y = int(front_bounding_box.x0 * self.front.factor), int(front_bounding_box.y0 * self.front.factor)
-        self.draw_label_box_with_side(fi, side="front", position=(x, y))
-        self.front.update_image_with_pil_image(fi)
-        
-        x, y = int(back_bounding_box.x0 * self.back.factor), int(back_bounding_box.y0 * self.back.factor)
-        self.draw_label_box_with_side(bi, side="back", position=(x, y))
-        self.back.update_image_with_pil_image(bi)
+        self.draw_bounding_boxes(
+            {("front", 0): front_bounding_box, ("back", 0): back_bounding_box}
+        )
+
+    @Debug.event("mini map debug","magenta")
+    def draw_bounding_boxes(self, bounding_boxes: Dict[Tuple[str, int], BoundingBox]):
+        """多頁版 draw_bounding_box，bounding_boxes 以 (side, page) 為 key"""
+        for (side, page), bounding_box in bounding_boxes.items():
+            processor = self.pages.get((side, page))
+            if processor is None or bounding_box is None:
+                continue
+            processor.draw_bounding_box(bounding_box)
+            
+            x, y = int(bounding_box.x0 * processor.factor), int(bounding_box.y0 * processor.factor)
+            processor.draw_on_region(
+                (x, y, x + 60, y + 30),
+                lambda image, offset: self.draw_label_box_with_side(image, side=side, position=offset)
+            )
+            processor.swap_to_bgr()
     
         
-    def valid_side(self,side):
-        if side == "front":
-            page = self.front
-        elif side == "back":
-            page = self.back
-        else:
+    def valid_side(self,side,page:int=0):
+        if side not in ("front", "back"):
             raise ValueError(f"無效的 side 參數: {side}")
-        return page
+        return self.pages.get((side, page))
         
     
     def draw_label_box_with_side(
@@ -139,48 +285,10 @@ class DisplayEngine:
         return image
     
     def force_label_spread(self, labels_info, component_boxes, output_size, padding=4, spacing=2, max_radius=100):
-        placed = []
-
-        def rect(x, y, w, h):
-            return (x - w / 2 - padding, y - h / 2 - padding, x + w / 2 + padding, y + h / 2 + padding)
-
-        def is_conflict(r, others):
-            for other in others:
-                if not (r[2] <= other[0] or r[0] >= other[2] or r[3] <= other[1] or r[1] >= other[3]):
-                    return True
-            return False
-
-        for label in labels_info:
-            cx, cy = label['orig_x'], label['orig_y']
-            w, h = label['w'], label['h']
-
-            # 嘗試用發射角度進行避讓
-            placed_rect = None
-            for r in range(0, max_radius, spacing):
-                for angle_deg in range(0, 360, 30):  # 每 30 度試一次
-                    angle_rad = math.radians(angle_deg)
-                    x = cx + r * math.cos(angle_rad)
-                    y = cy + r * math.sin(angle_rad)
-
-                    # 不超出畫布
-                    if not (0 < x < output_size[0] and 0 < y < output_size[1]):
-                        continue
-
-                    box = rect(x, y, w, h)
-                    if not is_conflict(box, component_boxes + placed):
-                        label['x'], label['y'] = x, y
-                        placed.append(box)
-                        placed_rect = box
-                        break
-                if placed_rect:
-                    break
-
-            # 如果找不到合適點，保留原地
-            if not placed_rect:
-                label['x'], label['y'] = cx, cy
-                placed.append(rect(cx, cy, w, h))
-
-        return labels_info
+        """依序找第一個不衝突的位置（每 30 度試一次），找不到就保留原地"""
+        return LabelLayout(component_boxes).spread(
+            labels_info, output_size, padding=padding, spacing=spacing, max_radius=max_radius
+        )
 
     
     def draw_labels_on_image(self, image: Image.Image, zoom_screen: ZoomScreen):
@@ -317,62 +425,16 @@ class DisplayEngine:
         return image
 
     def smart_label_layout(self, labels_info, component_boxes, canvas_size, spacing=2):
-        placed = []
-
-        def rect(x, y, w, h):
-            return (x - w / 2, y - h / 2, x + w / 2, y + h / 2)
-
-        def is_conflict(r, others):
-            for other in others:
-                if not (r[2] <= other[0] or r[0] >= other[2] or r[3] <= other[1] or r[1] >= other[3]):
-                    return True
-            return False
-
-        for label in labels_info:
-            cx, cy = label['orig_x'], label['orig_y']
-            w, h = label['w'], label['h']
-            best_score = float('inf')
-            best_pos = None
-
-            for r in range(0, 100, spacing):
-                for deg in range(0, 360, 15):
-                    angle = math.radians(deg)
-                    x = cx + r * math.cos(angle)
-                    y = cy + r * math.sin(angle)
-
-                    if not (0 <= x <= canvas_size[0] and 0 <= y <= canvas_size[1]):
-                        continue
-
-                    candidate_box = rect(x, y, w, h)
-                    if is_conflict(candidate_box, component_boxes + placed):
-                        continue
-
-                    dist_score = r
-                    align_score = abs(x - cx) + abs(y - cy)
-                    total_score = dist_score + 0.5 * align_score
-
-                    if total_score < best_score:
-                        best_score = total_score
-                        best_pos = (x, y, candidate_box)
-
-                if best_pos:
-                    break
-
-            if best_pos:
-                x, y, box = best_pos
-            else:
-                x, y = cx, cy
-                box = rect(cx, cy, w, h)
-
-            label['x'] = x
-            label['y'] = y
-            placed.append(box)
-
-        return labels_info
+        """每個標籤從最內圈開始找可用位置，取該圈中最貼近原位置者"""
+        return LabelLayout(component_boxes).smart(labels_info, canvas_size, spacing=spacing)
 
     
-    def get_zoom(self, zoom_screen: ZoomScreen, output_size=(640, 480)) -> ImageTk.PhotoImage:
-        page = self.valid_side(zoom_screen.side)  # 取得已繪製好元件的 np.ndarray 圖片
+    def get_zoom_crop(self, zoom_screen: ZoomScreen) -> np.ndarray:
+        """zoom_screen.display 範圍的 BGR 影像（已畫元件框）"""
+        if self.zoom_source is not None:
+            return self.zoom_source.render(zoom_screen)
+
+        page = self.valid_side(zoom_screen.side, zoom_screen.page)  # 取得已繪製好元件的 np.ndarray 圖片
         display = zoom_screen.display
         img = page.image
 
@@ -387,7 +449,17 @@ class DisplayEngine:
 
 
         # 裁切出該區域
-        crop = img[y0:y1, x0:x1]
+        return img[y0:y1, x0:x1]
+
+    def get_zoom(self, zoom_screen: ZoomScreen, output_size=(640, 480)) -> ImageTk.PhotoImage:
+        return ImageTk.PhotoImage(self.compose_zoom(zoom_screen, output_size))
+
+    def compose_zoom(self, zoom_screen: ZoomScreen, output_size=(640, 480)) -> Image.Image:
+        """
+        合成 zoom 影像（裁切、縮放、標籤），回傳 PIL.Image
+        不建立 PhotoImage，可在背景執行緒呼叫
+        """
+        crop = self.get_zoom_crop(zoom_screen)
 
         # OpenCV BGR → Pillow RGB
         crop_rgb = cv2.cvtColor(crop, cv2.COLOR_BGR2RGB)
@@ -404,7 +476,7 @@ class DisplayEngine:
         # 標出元件
         self.draw_labels_on_image_v2(image,normalized_screen)
 
-        return ImageTk.PhotoImage(image)
+        return image
     
     @Debug.event("draw relative position","magenta")
     def draw_relative_position(self, page ,screen: ZoomScreen):
@@ -422,11 +494,11 @@ class DisplayEngine:
         return img
         
 
-    def get_image(self, side: str, draw_func=None,screen=None) -> ImageTk.PhotoImage:
+    def get_image(self, side: str, draw_func=None,screen=None,page_idx:int=0) -> ImageTk.PhotoImage:
         """
         取得 Tkinter 用影像，支援傳入 draw_func(img) 回傳畫好後的 img
         """
-        page = self.valid_side(side)
+        page = self.valid_side(side, page_idx)
         img = page.image
         img = img.copy()  # 保護原圖
 
@@ -474,50 +546,100 @@ class CV2ImageProcessor:
     def factor(self):
         return self.zoom * self.scale
 
+    def _writable_rgba(self):
+        """確保 self.image 是可寫入的 4 通道、alpha 全 255（等同 convert("RGB").convert("RGBA")）"""
+        if self.image.ndim == 3 and self.image.shape[2] == 4:
+            if not self.image.flags.writeable:
+                self.image = self.image.copy()
+            self.image[..., 3] = 255
+        else:
+            self.image = cv2.cvtColor(self.image, cv2.COLOR_RGB2RGBA)
+
+    def _clip_rect(self, x0: int, y0: int, x1: int, y1: int):
+        """含端點的矩形裁到影像內，完全在外面回傳 None"""
+        h, w = self.image.shape[:2]
+        x0, y0 = max(x0, 0), max(y0, 0)
+        x1, y1 = min(x1, w - 1), min(y1, h - 1)
+        if x0 > x1 or y0 > y1:
+            return None
+        return x0, y0, x1, y1
+
     def draw_block_highlight(self, blocks: list):
-        """將 fitz.get_text("blocks") 的結果畫出半透明黃色區塊"""
-        overlay = Image.new("RGBA", (self.width, self.height), (0, 0, 0, 0))
-        draw = ImageDraw.Draw(overlay)
+        """將 fitz.get_text("blocks") 的結果畫出半透明黃色區塊（直接混色，不建整頁 overlay）"""
+        self._writable_rgba()
         factor = self.factor
 
+        rects = []
         for block in blocks:
             x0, y0, x1, y1 = block[:4]
-            draw.rectangle(
-                [
-                    int(x0 * factor),
-                    int(y0 * factor),
-                    int(x1 * factor),
-                    int(y1 * factor)
-                ],
-                fill=(255, 255, 0, 128)  # 正常黃色
-            )
-
-        # 修正這裡：先轉 RGB，再轉 RGBA，避免通道混亂
-        base_image = Image.fromarray(self.image).convert("RGB").convert("RGBA")
-        result = Image.alpha_composite(base_image, overlay)
-
-        self.image = np.array(result).astype("uint8")  # 回存為 numpy 格式
-
-    def draw_bounding_box(self, bounding_box: BoundingBox):
-        """將 bounding box 外部區域覆蓋半透明黑色遮罩"""
-        overlay = Image.new("RGBA", (self.width, self.height), (0, 0, 0, 128))
+            rect = self._clip_rect(int(x0 * factor), int(y0 * factor), int(x1 * factor), int(y1 * factor))
+            if rect is not None:
+                rects.append(rect)
+        if not rects:
+            return
+
+        # 重疊的區塊只混一次色（與 overlay 上畫同一顏色相同）
+        ux0 = min(r[0] for r in rects)
+        uy0 = min(r[1] for r in rects)
+        ux1 = max(r[2] for r in rects)
+        uy1 = max(r[3] for r in rects)
+        mask = np.zeros((uy1 - uy0 + 1, ux1 - ux0 + 1), dtype=bool)
+        for x0, y0, x1, y1 in rects:
+            mask[y0 - uy0:y1 - uy0 + 1, x0 - ux0:x1 - ux0 + 1] = True
+
+        blend_in_place(self.image, (ux0, uy0, ux1 + 1, uy1 + 1), (255, 255, 0), 128, mask)  # 正常黃色
+
+    def draw_bounding_box(self, bounding_box: BoundingBox) -> np.ndarray:
+        """將 bounding box 外部區域覆蓋半透明黑色遮罩（直接改寫 self.image）"""
+        if self.image.ndim == 3 and self.image.shape[2] == 4:
+            self._writable_rgba()
+        elif not self.image.flags.writeable:
+            self.image = self.image.copy()
 
         factor = self.factor
-        mask_draw = ImageDraw.Draw(overlay)
-        mask_draw.rectangle(
-            [
-                int(bounding_box.x0 * factor),
-                int(bounding_box.y0 * factor),
-                int(bounding_box.x1 * factor),
-                int(bounding_box.y1 * factor),
-            ],
-            fill=(0, 0, 0, 0)  # 挖洞
+        h, w = self.image.shape[:2]
+        hole = self._clip_rect(
+            int(bounding_box.x0 * factor),
+            int(bounding_box.y0 * factor),
+            int(bounding_box.x1 * factor),
+            int(bounding_box.y1 * factor),
         )
-
-        base_image = Image.fromarray(self.image).convert("RGBA")
-        result = Image.alpha_composite(base_image, overlay)
-        self.image = np.array(result)
-        return result 
+        black = (0, 0, 0)
+        if hole is None:
+            blend_in_place(self.image, (0, 0, w, h), black, 128)
+            return self.image
+
+        # 挖洞：只混洞外的上、下、左、右四條
+        x0, y0, x1, y1 = hole
+        blend_in_place(self.image, (0, 0, w, y0), black, 128)
+        blend_in_place(self.image, (0, y1 + 1, w, h), black, 128)
+        blend_in_place(self.image, (0, y0, x0, y1 + 1), black, 128)
+        blend_in_place(self.image, (x1 + 1, y0, w, y1 + 1), black, 128)
+        return self.image
+
+    def draw_on_region(self, rect: Tuple[int, int, int, int], draw_func, margin: int = 10):
+        """
+        只把 rect 附近的一小塊轉成 PIL 來畫（標籤等），畫完寫回
+        draw_func(image, offset)：offset 是 rect 左上角在小圖中的座標
+        """
+        h, w = self.image.shape[:2]
+        x0, y0 = max(rect[0] - margin, 0), max(rect[1] - margin, 0)
+        x1, y1 = min(rect[2] + margin + 1, w), min(rect[3] + margin + 1, h)
+        if x0 >= x1 or y0 >= y1:
+            return
+
+        region = self.image[y0:y1, x0:x1]
+        channels = region.shape[2]
+        image = Image.fromarray(np.ascontiguousarray(region)).convert("RGBA")
+        draw_func(image, (rect[0] - x0, rect[1] - y0))
+        region[...] = np.asarray(image)[..., :channels]
+
+    def swap_to_bgr(self):
+        """丟掉 alpha 並交換 R/B 通道（等同 PIL convert("RGB") 後 RGB→BGR）"""
+        if self.image.shape[2] == 4:
+            self.image = cv2.cvtColor(self.image, cv2.COLOR_RGBA2BGR)
+        else:
+            self.image = cv2.cvtColor(self.image, cv2.COLOR_RGB2BGR)
     
     def update_image_with_pil_image(self,pil_image: Image.Image):
         rgb_image = pil_image.convert("RGB")
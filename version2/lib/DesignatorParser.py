@@ -0,0 +1,69 @@
+import re
+from typing import Iterable
+
+
+class DesignatorParser:
+    """
+    Excel 儲存格 -> designator 關鍵字
+
+    * 去除括號內容：JP1(1-2) -> JP1（半形、全形括號皆可）
+    * 以逗號、頓號、分號、空白分隔
+    * 保留原本大小寫（PDF 索引與比對都區分大小寫）
+    * 展開範圍：C101-C120、R5~R9、C101-120
+    * 去重並保留第一次出現的順序
+
+    簡寫範圍（C101-120）只在兩側位數相同、至少兩位數、且右邊大於左邊時展開，
+    避免把 JP1-2 這類接腳寫法誤判成範圍；超過 MAX_RANGE 個的範圍視為筆誤，保留原字串
+    """
+
+    MAX_RANGE = 500
+
+    _PAREN = re.compile(r"\([^)]*\)|（[^）]*）")
+    _DASH_SPACES = re.compile(r"\s*([-~～])\s*")
+    _SPLIT = re.compile(r"[,，、;；\s]+")
+    _WORD = re.compile(r"\w")
+    _RANGE = re.compile(r"([A-Za-z]+)(\d+)[-~～](?:([A-Za-z]+)(\d+)|(\d+))")
+
+    def expand(self, token: str) -> list[str]:
+        """單一 token 展開成 designator 清單（不是範圍就原樣回傳）"""
+        m = self._RANGE.fullmatch(token)
+        if m is None:
+            return [token]
+
+        prefix, left, right_prefix, right, short = m.groups()
+        if short is not None:
+            # C101-120：右邊只有數字
+            if len(short) != len(left) or len(left) < 2:
+                return [token]
+            right = short
+        elif right_prefix != prefix:
+            return [token]
+
+        start, end = int(left), int(right)
+        if end <= start or end - start + 1 > self.MAX_RANGE:
+            return [token]
+
+        # 保留補零寬度：C001-C010 -> C001 ... C010
+        width = len(left) if left.startswith("0") else 0
+        return [f"{prefix}{str(n).zfill(width)}" for n in range(start, end + 1)]
+
+    def parse(self, pieces: Iterable) -> list[str]:
+        """所有儲存格一次處理，回傳去重後的關鍵字（保留順序）"""
+        seen = set()
+        result = []
+        paren, dash_spaces, split, word = self._PAREN, self._DASH_SPACES, self._SPLIT, self._WORD
+
+        for piece in pieces:
+            if piece is None or piece == "":
+                continue
+            text = paren.sub("", str(piece))
+            text = dash_spaces.sub(r"\1", text)
+            for token in split.split(text):
+                if not word.search(token):
+                    continue
+                for designator in self.expand(token):
+                    if designator not in seen:
+                        seen.add(designator)
+                        result.append(designator)
+
+        return result
@@ -1,23 +1,61 @@
 from openpyxl import load_workbook
 from abc import  ABC, abstractmethod
-import re
+import os
 from .debug import Debug
+from .DesignatorParser import DesignatorParser
 
 class Excel(ABC):
+    # 是否以 read_only 串流模式讀取（不需要列高等格式資訊時較快、較省記憶體）
+    READ_ONLY = False
+
     def __init__(self):
         self.path:str = None
         
+        # table / pieces / keywords 的計算結果，檔案 mtime 或大小改變才失效
+        self._memo: dict = {}
+        self._signature: tuple = None
+        
+        # 儲存格 -> designator（範圍展開、保留大小寫、去重）
+        self.parser = DesignatorParser()
+        
     def get_fileName(self):
         return self.path.split("/")[-1]
     
     @abstractmethod
     def import_excel(self,path: str):
         try:
-            self.workbook = load_workbook(path)
+            self.workbook = load_workbook(path, read_only=self.READ_ONLY)
         except FileNotFoundError:
             raise FileNotFoundError(f"找不到檔案: {path}")
         except Exception as e:
             raise Exception(f"讀取 Excel 檔案失敗: {e}")
+        
+        self._memo = {}
+        self._signature = self.file_signature(path)
+    
+    @staticmethod
+    def file_signature(path: str) -> tuple:
+        """(mtime, 檔案大小)"""
+        stat = os.stat(path)
+        return stat.st_mtime, stat.st_size
+    
+    def is_stale(self) -> bool:
+        """檔案在匯入後是否被修改（檔案被移走時沿用已讀取的內容）"""
+        if self.path is None:
+            return False
+        try:
+            return self.file_signature(self.path) != self._signature
+        except OSError:
+            return False
+    
+    def memoized(self, name: str, compute):
+        """取得快取結果；檔案有變動時先重新匯入"""
+        if self.is_stale():
+            print(f"Excel 檔案已變更，重新讀取：{self.path}")
+            self.import_excel(self.path)
+        if name not in self._memo:
+            self._memo[name] = compute()
+        return self._memo[name]
     
     @abstractmethod
     def get_table(self):
@@ -34,29 +72,37 @@ class Excel(ABC):
     
 
 class SOMReader(Excel):
+    READ_ONLY = True
+
     def __init__(self):
         super().__init__() 
     
     def import_excel(self, path):
         super().import_excel(path)
     
-        if "工程專用" not in self.workbook.sheetnames:
-            raise ValueError(f"工作表 '工程專用' 不存在，請確認名稱是否正確。可用工作表: {self.workbook.sheetnames}")
-
-        self.worksheet = self.workbook["工程專用"]
+        try:
+            if "工程專用" not in self.workbook.sheetnames:
+                raise ValueError(f"工作表 '工程專用' 不存在，請確認名稱是否正確。可用工作表: {self.workbook.sheetnames}")
+
+            # 串流模式只讀一次整張表，之後都用快取，不再碰 workbook
+            worksheet = self.workbook["工程專用"]
+            self._memo["table"] = [list(row) for row in worksheet.iter_rows(values_only=True)]
+        finally:
+            # read_only 模式會一直開著檔案，讀完就關閉
+            self.workbook.close()
         self.path = path
     
     
     def get_table(self):
-        """回傳整張表(含標題)的二維清單"""
-        data = []
-        for row in self.worksheet.iter_rows(values_only=True):
-            data.append(list(row))
-        return data
+        """回傳整張表(含標題)的二維清單（匯入時已讀取）"""
+        return self.memoized("table", lambda: [])
 
 
     def get_pieces(self):
         """去除標題，只取 A、B 欄，攤平成一維清單（不拆逗號）"""
+        return self.memoized("pieces", self._compute_pieces)
+
+    def _compute_pieces(self):
         data = self.get_table()
         if len(data) <= 1:
             return []
@@ -73,124 +119,84 @@ class SOMReader(Excel):
 
 
     def get_keywords(self):
-        """拆逗號，去除括號內容，去重後回傳關鍵字"""
-        pieces = self.get_pieces()
-        seen = set()
-        result = []
-
-        for item in pieces:
-            parts = item.split(',')
-            for part in parts:
-                cleaned = re.sub(r"\(.*?\)", "", part).strip()  # 去除括號
-                if cleaned and cleaned not in seen:
-                    seen.add(cleaned)
-                    result.append(cleaned)
+        """拆分隔符號、去除括號內容、展開範圍，去重後回傳關鍵字"""
+        return self.memoized("keywords", lambda: self.parser.parse(self.get_pieces()))
 
-        return result
         
 
-class ExcelReader:
+class ExcelReader(Excel):
+    # 需要 row_dimensions（列高）判斷邊界，不能用 read_only 模式
+    READ_ONLY = False
+
     def __init__(self):
-        self.path:str = None
-        
-    def get_fileName(self):
-        return self.path.split("/")[-1]
+        super().__init__()
     
     def import_excel(self,path):
-        try:
-            self.workbook = load_workbook(path)
-        except FileNotFoundError:
-            raise FileNotFoundError(f"找不到檔案: {path}")
-        except Exception as e:
-            raise Exception(f"讀取 Excel 檔案失敗: {e}")
+        super().import_excel(path)
 
         if "零件位置" not in self.workbook.sheetnames:
             raise ValueError(f"工作表 '零件位置' 不存在，請確認名稱是否正確。可用工作表: {self.workbook.sheetnames}")
 
         self.worksheet = self.workbook["零件位置"]
         self.path = path
-        
-    def get_table(self):
+    
+    def get_boundary_rows(self) -> list[int]:
+        """高度小於 8 的列（作為邊界），只看有設定列高的列"""
         ws = self.worksheet
-        boundary_rows = []
-
-        # 找出高度小於 8 的列作為邊界
-        for row in range(1, ws.max_row + 1):
-            row_dim = ws.row_dimensions.get(row)
-            height = row_dim.height if row_dim and row_dim.height is not None else None
-            if height is not None and height < 8:
-                boundary_rows.append(row)
+        max_row = ws.max_row
+        return sorted(
+            row for row, row_dim in ws.row_dimensions.items()
+            if 1 <= row <= max_row and row_dim.height is not None and row_dim.height < 8
+        )
+    
+    def _extract(self) -> dict:
+        """
+        一次 iter_rows 取出 C~F 欄，同時產生 table 與 pieces
+        * table：相鄰邊界之間的所有列（含每段的標題列）
+        * pieces：同上但去掉每段標題列，只取 C、D 欄
+        """
+        boundary_rows = self.get_boundary_rows()
 
         # 如果邊界不足，回傳空表
         if len(boundary_rows) < 2:
-            return []
+            return {"table": [], "pieces": []}
 
+        boundaries = set(boundary_rows)
+        first, last = boundary_rows[0], boundary_rows[-1]
         table_data = []
+        pieces = []
 
-        # 擷取邊界之間的資料（不含邊界行），從 C 到 F 欄
-        for i in range(len(boundary_rows) - 1):
-            start = boundary_rows[i] + 1 #這裡要標題
-            end = boundary_rows[i + 1] - 1
-            if start <= end:
-                for row in range(start, end + 1):
-                    row_data = []
-                    for col in range(3, 7):  # C=3, D=4, E=5, F=6
-                        val = ws.cell(row=row, column=col).value
-                        row_data.append(val)
-                    table_data.append(row_data)
-
-        return table_data
+        rows = self.worksheet.iter_rows(
+            min_row=first + 1, max_row=last - 1, min_col=3, max_col=6, values_only=True
+        )
+        for row, values in enumerate(rows, start=first + 1):
+            if row in boundaries:
+                continue
+            table_data.append(list(values))
+
+            # 每段的第一列是標題
+            if row - 1 in boundaries:
+                continue
+            c_val, d_val = values[0], values[1]  # C、D欄
+            if c_val is not None:
+                pieces.append(c_val)
+            if d_val is not None:
+                pieces.append(d_val)
+
+        return {"table": table_data, "pieces": pieces}
+
+    def _extracted(self) -> dict:
+        return self.memoized("extract", self._extract)
+        
+    def get_table(self):
+        return self._extracted()["table"]
 
     @Debug.event("get_pieces","cyan")
     def get_pieces(self):
-        ws = self.worksheet
-        boundary_rows = []
-
-        # 找出高度小於 5 的列（作為邊界）
-        for row in range(1, ws.max_row + 1):
-            row_dim = ws.row_dimensions.get(row)
-            height = row_dim.height if row_dim and row_dim.height is not None else None
-            if height is not None and height < 8:
-                boundary_rows.append(row)
-
-        # 如果邊界數量小於 2，沒有中間資料可取
-        if len(boundary_rows) < 2:
-            return []
-
-        result = []
-
-        # 擷取「每對相鄰邊界之間」的資料（不含邊界行）
-        for i in range(len(boundary_rows) - 1):
-            start = boundary_rows[i] + 2  # 去除header 從+2行開始讀
-            end = boundary_rows[i + 1] - 1
-            if start <= end:
-                for row in range(start, end + 1):
-                    c_val = ws.cell(row=row, column=3).value  # C欄
-                    d_val = ws.cell(row=row, column=4).value  # D欄
-                    if c_val is not None:
-                        result.append(c_val)
-                    if d_val is not None:
-                        result.append(d_val)
-
+        result = self._extracted()["pieces"]
         print(result)
         return result
     
     def get_keywords(self):
-        pieces = self.get_pieces()
-        seen = set()
-        result = []
-
-        for item in pieces:
-            if item:
-                parts = item.split(',')
-                for part in parts:
-                    cleaned = part.strip()
-
-                    # ✅ 去除括號內容，例如 JP1(1-2) -> JP1（不轉小寫）
-                    cleaned = re.sub(r"\(.*?\)", "", cleaned).strip()
+        return self.memoized("keywords", lambda: self.parser.parse(self.get_pieces()))
 
-                    if cleaned and cleaned not in seen:
-                        seen.add(cleaned)
-                        result.append(cleaned)
-
-        return result
@@ -37,4 +37,18 @@ class FilePicker:
     def search_files(self, keyword: str) -> list[File]:
         """依關鍵字過濾檔案名稱，回傳符合的檔案清單"""
         keyword = keyword.lower()
-        return [f for f in self.files if keyword in f.name.lower()]
\ No newline at end of file
+        return [f for f in self.files if keyword in f.name.lower()]
+
+    def search_designator(self, designator: str, board_index) -> list[File]:
+        """依 BoardIndex 找出含有指定 designator 的檔案（依原本的檔案順序）"""
+        paths = set(board_index.find_boards(designator))
+        return [f for f in self.files if f.path in paths]
+
+    def search(self, keyword: str, board_index=None) -> list[File]:
+        """檔名比對與 designator 比對的聯集"""
+        by_name = self.search_files(keyword)
+        if board_index is None:
+            return by_name
+        found = {f.path for f in by_name}
+        found.update(f.path for f in self.search_designator(keyword, board_index))
+        return [f for f in self.files if f.path in found]
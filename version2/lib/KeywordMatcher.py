@@ -0,0 +1,105 @@
+import re
+from collections import deque
+
+_WORD_CHAR = re.compile(r"\w")
+
+
+class KeywordMatcher:
+    """
+    Aho-Corasick 多關鍵字比對
+    每組關鍵字建一次自動機，每段文字只需線性掃描一次。
+
+    結果與 re.compile(r"\\b(k1|k2|...)\\b").findall(text) 相同：
+    - 兩端都必須是 \\b 邊界
+    - 同一起點以關鍵字清單中較前面的為準（regex 交替的優先順序）
+    - 由左到右、不重疊地取命中
+    """
+
+    def __init__(self, keywords: list[str]):
+        self.keywords = list(keywords)
+        self._word_cache: dict[str, bool] = {}
+
+        # trie：goto[state] = {char: next_state}；output[state] = 結束在此的關鍵字 index
+        self.goto: list[dict] = [{}]
+        self.output: list[list[int]] = [[]]
+        self.fail: list[int] = [0]
+
+        for k_idx, keyword in enumerate(self.keywords):
+            if not keyword:
+                continue
+            state = 0
+            for ch in keyword:
+                nxt = self.goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self.goto)
+                    self.goto[state][ch] = nxt
+                    self.goto.append({})
+                    self.output.append([])
+                    self.fail.append(0)
+                state = nxt
+            self.output[state].append(k_idx)
+
+        # BFS 建 fail link，並把 fail 鏈上的 output 併入
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self.goto[state].items():
+                queue.append(nxt)
+                f = self.fail[state]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                self.fail[nxt] = self.goto[f].get(ch, 0)
+                self.output[nxt] = self.output[nxt] + self.output[self.fail[nxt]]
+
+    def _is_word(self, ch: str) -> bool:
+        cached = self._word_cache.get(ch)
+        if cached is None:
+            cached = self._word_cache[ch] = _WORD_CHAR.match(ch) is not None
+        return cached
+
+    def _is_boundary(self, text: str, pos: int) -> bool:
+        """等同 regex 的 \\b：pos 兩側一邊是 \\w、一邊不是"""
+        before = pos > 0 and self._is_word(text[pos - 1])
+        after = pos < len(text) and self._is_word(text[pos])
+        return before != after
+
+    def _candidates(self, text: str) -> dict[int, int]:
+        """起點 -> 該起點優先的關鍵字 index（已通過兩端邊界檢查）"""
+        best: dict[int, int] = {}
+        goto, fail, output = self.goto, self.fail, self.output
+        keywords = self.keywords
+        state = 0
+        for i, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if not output[state]:
+                continue
+            end = i + 1
+            for k_idx in output[state]:
+                start = end - len(keywords[k_idx])
+                if k_idx >= best.get(start, len(keywords)):
+                    continue
+                if self._is_boundary(text, start) and self._is_boundary(text, end):
+                    best[start] = k_idx
+        return best
+
+    def finditer(self, text: str) -> list[tuple[int, str]]:
+        """由左到右、不重疊的命中 [(起點, 關鍵字), ...]"""
+        found = []
+        pos = 0
+        for start, k_idx in sorted(self._candidates(text).items()):
+            if start < pos:
+                continue
+            keyword = self.keywords[k_idx]
+            found.append((start, keyword))
+            pos = start + len(keyword)
+        return found
+
+    def findall(self, text: str) -> list[str]:
+        """由左到右、不重疊的命中關鍵字"""
+        return [keyword for _, keyword in self.finditer(text)]
+
+    def search(self, text: str) -> bool:
+        """文字中是否有任一關鍵字命中"""
+        return bool(self._candidates(text))
@@ -0,0 +1,190 @@
+import math
+from functools import lru_cache
+from typing import Tuple
+
+import numpy as np
+
+from .utils import GridIndex
+
+
+@lru_cache(maxsize=8)
+def ring_directions(step_deg: int) -> Tuple[np.ndarray, np.ndarray]:
+    """range(0, 360, step_deg) 各角度的 (cos, sin)，與 math.cos(math.radians(deg)) 相同"""
+    angles = [math.radians(deg) for deg in range(0, 360, step_deg)]
+    return (
+        np.array([math.cos(a) for a in angles]),
+        np.array([math.sin(a) for a in angles]),
+    )
+
+
+class LabelLayout:
+    """
+    標籤避讓排版
+    已佔用的矩形（元件框 + 已放好的標籤）放在均勻網格索引中，
+    每個標籤的所有「半徑 × 角度」候選點一次用 NumPy 算出並批次檢查衝突。
+
+    結果與原本逐點、逐框比對的版本相同：
+    * 衝突定義為嚴格重疊（邊界相接不算）
+    * 候選點順序：半徑由小到大、同半徑角度由小到大
+    """
+
+    # 先批次檢查最內的幾圈（多數標籤在這裡就找到位置），找不到再一次檢查其餘各圈
+    FIRST_RINGS = 2
+
+    def __init__(self, obstacles: list = (), cell_size: float = 64):
+        self.grid = GridIndex(cell_size)
+        self.count = 0
+        self.rects = np.empty((max(len(obstacles), 16), 4))
+        for rect in obstacles:
+            self.add(rect)
+
+    def add(self, rect: tuple):
+        if self.count == len(self.rects):
+            self.rects = np.concatenate([self.rects, np.empty_like(self.rects)])
+        key = self.count
+        self.rects[key] = rect
+        self.count += 1
+        self.grid.insert(key, rect)
+
+    def nearby(self, x0: float, y0: float, x1: float, y1: float) -> np.ndarray:
+        """與範圍落在相同格子的已佔用矩形 (M, 4)（可能有多的，需再精確比對）"""
+        keys = self.grid.candidates((x0, y0, x1, y1))
+        return self.rects[np.fromiter(keys, dtype=np.intp, count=len(keys))]
+
+    @staticmethod
+    def conflicts(boxes: np.ndarray, others: np.ndarray) -> np.ndarray:
+        """boxes (N, 4) 中每個候選框是否與 others (M, 4) 任一矩形嚴格重疊（邊界相接不算）"""
+        if len(others) == 0:
+            return np.zeros(len(boxes), dtype=bool)
+        b = boxes[:, None, :]
+        overlap = (b[..., 2] > others[:, 0]) & (b[..., 0] < others[:, 2]) & \
+                  (b[..., 3] > others[:, 1]) & (b[..., 1] < others[:, 3])
+        return overlap.any(axis=1)
+
+    @staticmethod
+    def _candidates(cx: float, cy: float, radii: range, step_deg: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(半徑, 角度) 網格上的候選中心 x, y 與半徑"""
+        cos, sin = ring_directions(step_deg)
+        r = np.array(radii, dtype=float)[:, None]
+        return cx + r * cos[None, :], cy + r * sin[None, :], r
+
+    def is_free(self, box: tuple) -> bool:
+        """單一框是否不與任何已佔用矩形重疊（純 Python，給最內圈的快速路徑用）"""
+        x0, y0, x1, y1 = box
+        rects = self.rects
+        for key in self.grid.candidates(box):
+            o = rects[key]
+            if x1 > o[0] and x0 < o[2] and y1 > o[1] and y0 < o[3]:
+                return False
+        return True
+
+    def _first_ring(self, boxes: np.ndarray, in_canvas: np.ndarray):
+        """
+        回傳 (圈 index, 該圈可用遮罩)；都沒有回傳 None
+        網格只查一次（所有候選框的範圍），之後分兩批檢查：多數標籤在最內幾圈就找到位置
+        """
+        if not in_canvas.any():
+            return None
+        x0, y0 = boxes[..., 0].min(), boxes[..., 1].min()
+        x1, y1 = boxes[..., 2].max(), boxes[..., 3].max()
+        others = self.nearby(x0, y0, x1, y1)
+
+        rings, directions = in_canvas.shape
+        for start, stop in ((0, self.FIRST_RINGS), (self.FIRST_RINGS, rings)):
+            if start >= stop:
+                continue
+            chunk = boxes[start:stop].reshape(-1, 4)
+            valid = in_canvas[start:stop] & ~self.conflicts(chunk, others).reshape(-1, directions)
+            found = np.flatnonzero(valid.any(axis=1))
+            if len(found):
+                ring = int(found[0])
+                return start + ring, valid[ring]
+        return None
+
+    def smart(self, labels_info: list[dict], canvas_size, spacing: int = 2, max_radius: int = 100, step_deg: int = 15) -> list[dict]:
+        """
+        smart_label_layout：第一個有可用位置的半徑圈中，
+        取 r + 0.5 * (|dx| + |dy|) 最小者（同分取角度較小者）
+        """
+        width, height = canvas_size
+        for label in labels_info:
+            cx, cy = label['orig_x'], label['orig_y']
+            w, h = label['w'], label['h']
+
+            box = None
+            radii = range(0, max_radius, spacing)
+
+            # 半徑 0：所有角度都是原位置，分數皆為 0，取第一個角度
+            x, y = cx + 0.0, cy + 0.0
+            if len(radii) and 0 <= x <= width and 0 <= y <= height:
+                candidate = (x - w / 2, y - h / 2, x + w / 2, y + h / 2)
+                if self.is_free(candidate):
+                    box = candidate
+                radii = radii[1:]
+
+            if box is None and len(radii):
+                xs, ys, r = self._candidates(cx, cy, radii, step_deg)
+                boxes = np.stack([xs - w / 2, ys - h / 2, xs + w / 2, ys + h / 2], axis=-1)
+                in_canvas = (0 <= xs) & (xs <= width) & (0 <= ys) & (ys <= height)
+
+                found = self._first_ring(boxes, in_canvas)
+                if found is not None:
+                    ring, valid = found
+                    score = r[ring, 0] + 0.5 * (np.abs(xs[ring] - cx) + np.abs(ys[ring] - cy))
+                    score = np.where(valid, score, np.inf)
+                    k = int(np.argmin(score))
+                    x, y = float(xs[ring, k]), float(ys[ring, k])
+                    box = tuple(float(v) for v in boxes[ring, k])
+
+            if box is None:
+                x, y = cx, cy
+                box = (cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2)
+
+            label['x'] = x
+            label['y'] = y
+            self.add(box)
+
+        return labels_info
+
+    def spread(self, labels_info: list[dict], canvas_size, padding: int = 4, spacing: int = 2, max_radius: int = 100, step_deg: int = 30) -> list[dict]:
+        """force_label_spread：依序取第一個在畫布內（不含邊界）且不衝突的位置"""
+        width, height = canvas_size
+        for label in labels_info:
+            cx, cy = label['orig_x'], label['orig_y']
+            w, h = label['w'], label['h']
+
+            box = None
+            radii = range(0, max_radius, spacing)
+
+            # 半徑 0：所有角度都是原位置
+            x, y = cx + 0.0, cy + 0.0
+            if len(radii) and 0 < x < width and 0 < y < height:
+                candidate = (x - w / 2 - padding, y - h / 2 - padding, x + w / 2 + padding, y + h / 2 + padding)
+                if self.is_free(candidate):
+                    box = candidate
+                radii = radii[1:]
+
+            if box is None and len(radii):
+                xs, ys, _ = self._candidates(cx, cy, radii, step_deg)
+                boxes = np.stack([
+                    xs - w / 2 - padding, ys - h / 2 - padding,
+                    xs + w / 2 + padding, ys + h / 2 + padding
+                ], axis=-1)
+                in_canvas = (0 < xs) & (xs < width) & (0 < ys) & (ys < height)
+
+                found = self._first_ring(boxes, in_canvas)
+                if found is not None:
+                    ring, valid = found
+                    k = int(np.argmax(valid))
+                    x, y = float(xs[ring, k]), float(ys[ring, k])
+                    box = tuple(float(v) for v in boxes[ring, k])
+
+            if box is None:
+                # 如果找不到合適點，保留原地
+                x, y = cx, cy
+                box = (cx - w / 2 - padding, cy - h / 2 - padding, cx + w / 2 + padding, cy + h / 2 + padding)
+
+            label['x'], label['y'] = x, y
+            self.add(box)
+
+        return labels_info
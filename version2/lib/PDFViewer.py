@@ -3,23 +3,80 @@ import fitz  # PyMuPDF
 from tkinter import messagebox
 from os import path
 from os.path import isfile
-import re
 
 from .utils import function_runtime, handle_file_open_error
 from .data import BoxInfo, FoundResult
 from .SinglePDF import SinglePDF
+from .SearchIndex import DesignatorIndex, WordHit, is_token
+from .KeywordMatcher import KeywordMatcher
+from .BoardIndex import BoardIndex
 
 from .debug import Debug
 
 class PDFViewer:
-    def __init__(self,front_path:str, back_path:str):
-        self.front = SinglePDF(front_path,"front")
-        self.back = SinglePDF(back_path,"back")
+    def __init__(self,front_path:str, back_path:str, board_index: BoardIndex = None, preloaded: dict = None):
+        """
+        preloaded: 已在背景開好的檔案 {side: (SinglePDF, [(blocks, words), ...])}，
+                   有的話直接沿用，不再重新開檔與抽取文字
+        """
+        preloaded = preloaded or {}
+        self.front = preloaded["front"][0] if "front" in preloaded else SinglePDF(front_path,"front")
+        self.back = preloaded["back"][0] if "back" in preloaded else SinglePDF(back_path,"back")
+        self._preloaded_text = {side: pages for side, (_, pages) in preloaded.items()}
+        
+        # 資料夾的本機文字索引：有最新資料就直接載入，不必重新抽取
+        self.board_index = board_index
         
         # 預設解析度  方大區域& 小地圖
         self.zoom = 5
         self.zoom_mini = 0.7
         
+        # 建立一次反向索引，之後搜尋都是查表
+        self.index = self.build_index()
+        
+        # 非 token 關鍵字用的多關鍵字比對器（同一組關鍵字只建一次）
+        self._matcher: KeywordMatcher = None
+        
+    @Debug.function_runtime
+    def build_index(self) -> DesignatorIndex:
+        """建立兩面所有頁面的 designator 反向索引"""
+        index = DesignatorIndex()
+        for pdf in (self.front, self.back):
+            for page, (blocks, words) in enumerate(self.load_text(pdf)):
+                index.add_blocks(pdf.side, page, blocks)
+                index.add_words(pdf.side, page, words)
+        return index
+
+    def load_text(self, pdf: SinglePDF) -> list[tuple[list, list]]:
+        """每頁的 (blocks, words)：背景預先抽取過就直接使用，否則見 read_text"""
+        pages = self._preloaded_text.get(pdf.side)
+        if pages is not None and len(pages) == pdf.page_count:
+            return pages
+        return self.read_text(pdf, self.board_index)
+
+    @staticmethod
+    def read_text(pdf: SinglePDF, board_index: BoardIndex = None) -> list[tuple[list, list]]:
+        """
+        每頁的 (blocks, words)
+        board_index 有最新資料就直接讀取，否則抽取後寫回
+        """
+        if board_index is not None:
+            try:
+                pages = board_index.load(pdf.path)
+            except Exception as e:
+                print(f"讀取文字索引失敗，改為重新抽取：{e}")
+                pages = None
+            if pages is not None and len(pages) == pdf.page_count:
+                print(f"文字索引命中：{pdf.get_file_name()}")
+                return pages
+
+        pages = [(pdf.get_blocks(page), pdf.get_words(page)) for page in range(pdf.page_count)]
+        if board_index is not None:
+            try:
+                board_index.store(pdf.path, pages)
+            except Exception as e:
+                print(f"寫入文字索引失敗：{e}")
+        return pages
     
 
     @staticmethod
@@ -61,8 +118,28 @@ class PDFViewer:
         """輸出路徑""" 
         return [self.front.path, self.back.path]
     
-    def _search_blocks(self, keywords: list[str], page_idx=0) -> tuple[list[BoxInfo], int, int]:
-        """搜尋指定頁面中包含任一關鍵字的區塊（精確比對 & 只保留命中段）"""
+    def get_pdf(self, side: str) -> SinglePDF:
+        """依 side 取得對應的 SinglePDF"""
+        if side == "front":
+            return self.front
+        if side == "back":
+            return self.back
+        raise ValueError(f"無效的 side 參數: {side}")
+
+    def _pages(self, pdf: SinglePDF, page_idx=None) -> list[int]:
+        """要搜尋的頁碼：None 代表全部頁面"""
+        if page_idx is None:
+            return list(range(pdf.page_count))
+        return [page_idx]
+
+    def get_matcher(self, keywords: list[str]) -> KeywordMatcher:
+        """取得關鍵字比對器，關鍵字組合相同時重複使用"""
+        if self._matcher is None or self._matcher.keywords != keywords:
+            self._matcher = KeywordMatcher(keywords)
+        return self._matcher
+
+    def _search_blocks(self, keywords: list[str], page_idx=None) -> tuple[list[BoxInfo], int, int]:
+        """搜尋指定頁面（None 為全部頁面）中包含任一關鍵字的區塊（精確比對 & 只保留命中段）"""
 
         if not keywords:
             return [], 0, 0
@@ -72,67 +149,127 @@ class PDFViewer:
         if not processed_keywords:
             return [], 0, 0
 
-        # 建立完整單字匹配的 regex（不分大小寫）
-        pattern = re.compile(r"\b(" + "|".join(re.escape(k) for k in processed_keywords) + r")\b")
+        # 全部都是單一 token：直接查反向索引
+        if all(is_token(k) for k in processed_keywords):
+            return self._search_index(processed_keywords, page_idx)
 
-        front_blocks = self.front.get_blocks(page_idx)
-        back_blocks = self.back.get_blocks(page_idx)
+        # 其餘情況：Aho-Corasick 逐區塊線性掃描（等同 \b(k1|k2|...)\b）
+        matcher = self.get_matcher(processed_keywords)
 
+        # 索引中的區塊已依 (side, page, block_no) 去重，順序同原本逐頁掃描
         results = []
-        seen = set()
         front_amount = 0
         back_amount = 0
 
-        for side, blocks in [("front", front_blocks), ("back", back_blocks)]:
-            for b in blocks:
-                if len(b) < 6:
-                    continue
-                x0, y0, x1, y1, text, block_no = b[:6]
-                if not isinstance(text, str):
-                    continue
-
-                # 找出所有命中關鍵字（保留原大小寫）
-                matched = pattern.findall(text)
-                if matched:
-                    key = (side, block_no)
-                    if key not in seen:
-                        seen.add(key)
-
-                        # ✅ 只保留命中的文字內容（逐行過濾）
-                        lines = text.splitlines()
-                        matched_lines = [line.strip() for line in lines if pattern.search(line)]
-
-                        if matched_lines:
-                            results.append(BoxInfo(
-                                x0=round(x0),
-                                y0=round(y0),
-                                x1=round(x1),
-                                y1=round(y1),
-                                text="\n".join(matched_lines),
-                                block_no=block_no,
-                                side=side,
-                                matched_keywords=list(set(matched))  # 若多行命中，也會有多個
-                            ))
-
-                            if side == "front":
-                                front_amount += 1
-                            else:
-                                back_amount += 1
+        for block in self.index.blocks:
+            if page_idx is not None and block.page != page_idx:
+                continue
+
+            # 找出所有命中關鍵字（保留原大小寫）
+            matched = matcher.findall(block.text)
+            if matched:
+                # ✅ 只保留命中的文字內容（逐行過濾）
+                matched_lines = [line.strip() for line in block.lines if matcher.search(line)]
+
+                if matched_lines:
+                    results.append(BoxInfo(
+                        x0=round(block.x0),
+                        y0=round(block.y0),
+                        x1=round(block.x1),
+                        y1=round(block.y1),
+                        text="\n".join(matched_lines),
+                        block_no=block.block_no,
+                        side=block.side,
+                        matched_keywords=list(set(matched)),  # 若多行命中，也會有多個
+                        page=block.page
+                    ))
+
+                    if block.side == "front":
+                        front_amount += 1
+                    else:
+                        back_amount += 1
 
         return results, front_amount, back_amount
 
+    def _search_words(self, keywords: list[str], page_idx=None) -> tuple[list[BoxInfo], int, int]:
+        """字層級搜尋：每個命中的 designator 一個緊貼的框"""
+        processed_keywords = [k.strip() for k in keywords if k.strip()]
+        if not processed_keywords:
+            return [], 0, 0
+
+        if all(is_token(k) for k in processed_keywords):
+            hits = self.index.search_words(processed_keywords, page_idx)
+        else:
+            # 含非 token 關鍵字：逐字以 Aho-Corasick 比對
+            matcher = self.get_matcher(processed_keywords)
+            hits = [
+                WordHit(word, keyword, start)
+                for word in self.index.words
+                if page_idx is None or word.page == page_idx
+                for start, keyword in matcher.finditer(word.text)
+            ]
+
+        results = []
+        amount = {"front": 0, "back": 0}
+        for hit in hits:
+            word = hit.word
+            x0, y0, x1, y1 = hit.rect
+            results.append(BoxInfo(
+                x0=round(x0),
+                y0=round(y0),
+                x1=round(x1),
+                y1=round(y1),
+                text=hit.keyword,
+                block_no=word.block_no,
+                side=word.side,
+                matched_keywords=[hit.keyword],
+                page=word.page
+            ))
+            amount[word.side] += 1
+        return results, amount["front"], amount["back"]
+
+    def _search_index(self, keywords: list[str], page_idx=None) -> tuple[list[BoxInfo], int, int]:
+        """以反向索引搜尋，結果與 regex 逐區塊比對相同"""
+        results = []
+        amount = {"front": 0, "back": 0}
+        for hit in self.index.search(keywords, page_idx):
+            block = hit.block
+            results.append(BoxInfo(
+                x0=round(block.x0),
+                y0=round(block.y0),
+                x1=round(block.x1),
+                y1=round(block.y1),
+                text="\n".join(hit.matched_lines),
+                block_no=block.block_no,
+                side=block.side,
+                matched_keywords=list(hit.matched_keywords),
+                page=block.page
+            ))
+            amount[block.side] += 1
+        return results, amount["front"], amount["back"]
+
     @Debug.function_runtime
-    def search_pdf_single(self, keyword: str, page_idx=0) -> FoundResult:
+    def search_pdf_single(self, keyword: str, page_idx=None) -> FoundResult:
         if not keyword or not keyword.strip():
             return FoundResult(total=0, box=[])
         results,front_amount, back_amount = self._search_blocks([keyword], page_idx)
         return FoundResult(total=len(results),front_amount=front_amount,back_amount=back_amount, box=results)
 
     @Debug.function_runtime
-    def search_pdf_multiple(self, keywords: list[str], page_idx=0) -> FoundResult:
+    def search_pdf_multiple(self, keywords: list[str], page_idx=None, mode: str = "block") -> FoundResult:
+        """
+        mode:
+        * "block"：回傳命中的整個文字區塊
+        * "word"：每個命中的 designator 各自一個緊貼的框
+        """
         if not keywords:
             return FoundResult(total=0, box=[])
-        results,front_amount, back_amount = self._search_blocks(keywords, page_idx)
+        if mode == "word":
+            results,front_amount, back_amount = self._search_words(keywords, page_idx)
+        elif mode == "block":
+            results,front_amount, back_amount = self._search_blocks(keywords, page_idx)
+        else:
+            raise ValueError(f"無效的 mode 參數: {mode}")
         return FoundResult(total=len(results),front_amount=front_amount,back_amount=back_amount, box=results)
 
 
@@ -0,0 +1,75 @@
+import threading
+
+import fitz
+
+
+class PageContext:
+    """
+    單頁分析 context
+    頁面只 load 一次、共用同一個 TextPage，
+    words / blocks / pixmap 第一次用到才計算並保留
+
+    fitz 文件不是 thread-safe：同一份文件的所有 context 共用 SinglePDF 的 lock，
+    每個 fitz 呼叫都在 lock 內進行（背景預取、搜尋、minimap 可能同時存取同一份文件）
+    """
+
+    def __init__(self, doc: fitz.Document, idx: int = 0, lock: threading.RLock = None):
+        self.idx = idx
+        self.lock = lock or threading.RLock()
+        with self.lock:
+            self.page: fitz.Page = doc.load_page(idx)
+
+        self._textpage = None
+        self._words = None
+        self._blocks = None
+        self._pixmaps: dict[float, fitz.Pixmap] = {}
+
+    @property
+    def textpage(self) -> fitz.TextPage:
+        with self.lock:
+            if self._textpage is None:
+                self._textpage = self.page.get_textpage()
+            return self._textpage
+
+    @property
+    def words(self) -> list:
+        """同 page.get_text("words")"""
+        with self.lock:
+            if self._words is None:
+                self._words = self.page.get_text("words", textpage=self.textpage)
+            return self._words
+
+    @property
+    def blocks(self) -> list:
+        """同 page.get_text("blocks")"""
+        with self.lock:
+            if self._blocks is None:
+                self._blocks = self.page.get_text("blocks", textpage=self.textpage)
+            return self._blocks
+
+    def get_pixmap(self, zoom: float = 1, cache: bool = True) -> fitz.Pixmap:
+        """
+        依解析度渲染頁面，zoom=1 等同 page.get_pixmap()
+        cache=False 用於高解析度的一次性渲染，避免整頁大圖常駐記憶體
+        """
+        with self.lock:
+            pix = self._pixmaps.get(zoom)
+            if pix is None:
+                pix = self.page.get_pixmap(matrix=fitz.Matrix(zoom, zoom))
+                if cache:
+                    self._pixmaps[zoom] = pix
+            return pix
+
+    def pixel_size(self, zoom: float) -> tuple[int, int]:
+        """get_pixmap(zoom) 整頁影像的 (寬, 高)，不需渲染"""
+        with self.lock:
+            irect = (self.page.rect * fitz.Matrix(zoom, zoom)).irect
+        return irect.width, irect.height
+
+    def get_clip_pixmap(self, clip: fitz.Rect, zoom: float = 1) -> fitz.Pixmap:
+        """
+        只渲染 clip 範圍（PDF 座標），像素與整頁渲染相同位置一致；
+        結果的 pix.x / pix.y 是此區塊在整頁影像中的左上角
+        """
+        with self.lock:
+            return self.page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), clip=clip)
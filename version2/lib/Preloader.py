@@ -0,0 +1,159 @@
+import os
+import threading
+from concurrent.futures import Executor, Future, ThreadPoolExecutor, as_completed
+from typing import Callable
+
+import fitz
+
+from .data import BoundingBox
+from .BoardIndex import BoardIndex
+from .BoundingBoxCache import BoundingBoxCache
+from .PDFViewer import PDFViewer
+from .SinglePDF import SinglePDF, analyse_page
+from .TaskScheduler import TaskCancelled
+
+
+class PreparedPDF:
+    """
+    單一檔案的預先處理：開檔 → 抽取 / 載入文字 → 計算各頁邊界框
+    在背景執行，完成後 result() 回傳 (SinglePDF, [(blocks, words), ...])
+    """
+
+    def __init__(self, path: str, side: str):
+        self.path = path
+        self.side = side
+        self.future: Future = None
+        self.page_futures: list[Future] = []
+        self.total_pages = 0
+        self.done_pages = 0
+        self._cancel_event = threading.Event()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel_event.is_set()
+
+    def cancel(self):
+        """放棄這個檔案：還沒開始的頁面直接取消，進行中的在下一個檢查點結束"""
+        self._cancel_event.set()
+        if self.future is not None:
+            self.future.cancel()
+        for future in self.page_futures:
+            future.cancel()
+
+    def check(self):
+        if self.cancelled:
+            raise TaskCancelled(self.path)
+
+    def done(self) -> bool:
+        return self.future is not None and self.future.done()
+
+    def result(self, timeout: float = None) -> tuple[SinglePDF, list]:
+        return self.future.result(timeout)
+
+
+class Preloader:
+    """
+    選檔時就在背景預先處理，確認後由 ValidPage 接手結果
+    * 正反面各自最多一個工作；同一面換檔或清除時，舊工作取消並丟棄
+    * 邊界框的各頁送到共用的 process pool，與 ValidPage 使用同一個快取與參數
+    """
+
+    def __init__(
+        self,
+        bbox_cache: BoundingBoxCache,
+        bbox_params: dict,
+        get_executor: Callable[[], Executor],
+        board_index: BoardIndex = None,
+        max_workers: int = 2,
+    ):
+        self.bbox_cache = bbox_cache
+        self.bbox_params = bbox_params
+        self.get_executor = get_executor
+        self.board_index = board_index
+        self.threads = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="Preloader")
+        self.jobs: dict[str, PreparedPDF] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def can_open(path: str) -> bool:
+        """不跳出錯誤視窗的開檔檢查（背景執行緒不能碰 Tk）"""
+        if not path or not os.path.isfile(path):
+            return False
+        try:
+            with fitz.open(path) as doc:
+                return doc.page_count > 0
+        except Exception:
+            return False
+
+    def preload(self, side: str, path: str) -> PreparedPDF | None:
+        """開始（或沿用進行中的）side 的預先處理；path 為空時只取消舊工作"""
+        with self._lock:
+            job = self.jobs.get(side)
+            if job is not None and job.path == path and not job.cancelled:
+                return job
+            if job is not None:
+                print(f"取消預先處理：{job.path}")
+                job.cancel()
+                del self.jobs[side]
+            if not path:
+                return None
+
+            job = PreparedPDF(path, side)
+            job.future = self.threads.submit(self._prepare, job)
+            self.jobs[side] = job
+            return job
+
+    def discard(self, side: str):
+        self.preload(side, None)
+
+    def take(self, side: str, path: str) -> PreparedPDF:
+        """交接：取得 side / path 的預先處理（沒有就立刻開始），之後不再由 Preloader 管理"""
+        job = self.preload(side, path)
+        with self._lock:
+            if self.jobs.get(side) is job:
+                del self.jobs[side]
+        return job
+
+    def shutdown(self):
+        with self._lock:
+            for job in self.jobs.values():
+                job.cancel()
+            self.jobs.clear()
+        self.threads.shutdown(wait=False, cancel_futures=True)
+
+    def _prepare(self, job: PreparedPDF) -> tuple[SinglePDF, list]:
+        job.check()
+        if not self.can_open(job.path):
+            raise ValueError(f"無效的 PDF 檔案: {job.path}")
+        pdf = SinglePDF(job.path, job.side)
+
+        job.check()
+        pages = PDFViewer.read_text(pdf, self.board_index)
+
+        job.check()
+        pending = pdf.lookup_bounding_boxes(cache=self.bbox_cache, **self.bbox_params)
+        job.total_pages = pdf.page_count
+        job.done_pages = pdf.page_count - len(pending)
+        if pending:
+            executor = self.get_executor()
+            futures = {
+                executor.submit(analyse_page, pdf.path, idx, self.bbox_params): (idx, key)
+                for idx, key in pending.items()
+            }
+            job.page_futures = list(futures)
+            # 在登記 page_futures 前就被取消的情況
+            if job.cancelled:
+                job.cancel()
+            job.check()
+            try:
+                for future in as_completed(futures):
+                    job.check()
+                    idx, key = futures[future]
+                    pdf.store_bounding_box(idx, BoundingBox(*future.result()), key, self.bbox_cache, **self.bbox_params)
+                    job.done_pages += 1
+            finally:
+                # 整塊板子寫一次快取檔；中途取消時已算好的頁面也保留
+                self.bbox_cache.flush()
+
+        print(f"預先處理完成：{pdf.get_file_name()}")
+        return pdf, pages
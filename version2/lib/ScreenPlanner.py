@@ -0,0 +1,110 @@
+import heapq
+import math
+
+import numpy as np
+
+
+class ScreenPlanner:
+    """
+    用最少的固定大小視窗（width x height，PDF 座標）蓋住所有元件框（貪婪 set cover）
+
+    * 候選視窗：每個框貼齊視窗四個角落、以及置中的 5 個位置
+    * 每個候選能完整蓋住哪些框：依 x0 排序的掃描索引只取水平方向可能落入的框，再用 NumPy 一次判斷
+    * 覆蓋集合以 int 位元遮罩表示，lazy greedy（heap）每次取新蓋到最多框的視窗，同分取候選順序較前者
+    * 比視窗還大的框無法被蓋住，各自單獨成一組
+    """
+
+    def __init__(self, width: float, height: float):
+        self.width = width
+        self.height = height
+
+    def candidates(self, rects: np.ndarray) -> list[int]:
+        """所有候選視窗的覆蓋位元遮罩（第 i 個 bit = 第 i 個框，已去重）"""
+        W, H = self.width, self.height
+        n = len(rects)
+        order = np.argsort(rects[:, 0], kind="stable")
+        sorted_x0 = rects[order, 0]
+        # 包含框 a 的視窗，左邊界在 [a.x1 - W, a.x0]，能蓋到的框 x0 落在 [a.x1 - W, a.x0 + W]
+        starts = np.searchsorted(sorted_x0, rects[:, 2] - W, side="left")
+        stops = np.searchsorted(sorted_x0, rects[:, 0] + W, side="right")
+
+        seen = set()
+        result = []
+        for a, (ax0, ay0, ax1, ay1) in enumerate(rects.tolist()):
+            if ax1 - ax0 > W or ay1 - ay0 > H:
+                continue
+            near = order[starts[a]:stops[a]]
+            boxes = rects[near]
+
+            # 左上、右上、左下、右下、置中
+            cx, cy = (ax0 + ax1 - W) / 2, (ay0 + ay1 - H) / 2
+            lefts = np.array([ax0, ax1 - W, ax0, ax1 - W, cx])[:, None]
+            tops = np.array([ay0, ay0, ay1 - H, ay1 - H, cy])[:, None]
+            inside = (boxes[None, :, 0] >= lefts) & (boxes[None, :, 2] <= lefts + W) & \
+                     (boxes[None, :, 1] >= tops) & (boxes[None, :, 3] <= tops + H)
+
+            full = np.zeros((len(inside), n), dtype=bool)
+            full[:, near] = inside
+            for row in np.packbits(full, axis=1, bitorder="little"):
+                mask = int.from_bytes(row.tobytes(), "little")
+                if mask not in seen:
+                    seen.add(mask)
+                    result.append(mask)
+        return result
+
+    def plan(self, rects: list) -> list[list[int]]:
+        """回傳每個視窗負責的框 index（依挑選順序，每個框只屬於一個視窗）"""
+        if not rects:
+            return []
+        rects = np.asarray(rects, dtype=float).reshape(-1, 4)
+        n = len(rects)
+        masks = self.candidates(rects)
+
+        heap = [(-mask.bit_count(), k) for k, mask in enumerate(masks)]
+        heapq.heapify(heap)
+        uncovered = (1 << n) - 1
+        groups = []
+        while heap and uncovered:
+            neg_gain, k = heapq.heappop(heap)
+            fresh = masks[k] & uncovered
+            gain = fresh.bit_count()
+            if gain == 0:
+                continue
+            if gain < -neg_gain:
+                # 增益變小了：放回去重新排序（lazy greedy）
+                heapq.heappush(heap, (-gain, k))
+                continue
+            uncovered &= ~fresh
+            groups.append(self._indices(fresh, n))
+
+        # 比視窗大的框：各自一組
+        groups.extend([i] for i in self._indices(uncovered, n))
+        return groups
+
+    @staticmethod
+    def _indices(mask: int, n: int) -> list[int]:
+        bits = np.unpackbits(np.frombuffer(mask.to_bytes((n + 7) // 8, "little"), dtype=np.uint8), bitorder="little")
+        return np.flatnonzero(bits[:n]).tolist()
+
+    def fit(self, rects: list) -> tuple[int, int, int, int]:
+        """
+        包住 rects 的視窗 (x0, y0, x1, y1)：放得下時用固定大小並置中，
+        放不下（單一超大框）時以相同長寬比放大
+        """
+        bx0 = min(r[0] for r in rects)
+        by0 = min(r[1] for r in rects)
+        bx1 = max(r[2] for r in rects)
+        by1 = max(r[3] for r in rects)
+        W, H = self.width, self.height
+
+        scale = max(1.0, (bx1 - bx0) / W, (by1 - by0) / H)
+        w, h = math.ceil(W * scale), math.ceil(H * scale)
+        x0 = self._centered(bx0, bx1, w)
+        y0 = self._centered(by0, by1, h)
+        return x0, y0, x0 + w, y0 + h
+
+    @staticmethod
+    def _centered(lo: float, hi: float, size: int) -> int:
+        """長度 size 的整數區間起點：置中，但仍完整包住 [lo, hi]"""
+        start = round((lo + hi - size) / 2)
+        return min(max(start, math.ceil(hi) - size), math.floor(lo))
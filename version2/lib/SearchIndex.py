@@ -0,0 +1,155 @@
+import re
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, List, Set, Tuple
+
+# 與 regex \b 邊界一致的 token：最長連續的 \w 字元
+TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def is_token(keyword: str) -> bool:
+    """關鍵字是否為單一 token（可直接查索引）"""
+    return TOKEN_PATTERN.fullmatch(keyword) is not None
+
+
+@dataclass
+class IndexedBlock:
+    side: str
+    page: int
+    x0: float
+    y0: float
+    x1: float
+    y1: float
+    block_no: int
+    text: str
+    lines: List[str]
+
+
+@dataclass
+class IndexedWord:
+    side: str
+    page: int
+    x0: float
+    y0: float
+    x1: float
+    y1: float
+    text: str
+    block_no: int
+    line_no: int
+    word_no: int
+
+    def sub_rect(self, start: int, end: int) -> Tuple[float, float, float, float]:
+        """
+        字元 [start, end) 在字框中的範圍（依字元數比例切分）
+        橫書沿 x 切、直書沿 y 切；整個字就是回傳原字框
+        """
+        n = len(self.text)
+        if n == 0 or (start == 0 and end >= n):
+            return self.x0, self.y0, self.x1, self.y1
+        if self.x1 - self.x0 >= self.y1 - self.y0:
+            w = (self.x1 - self.x0) / n
+            return self.x0 + w * start, self.y0, self.x0 + w * end, self.y1
+        h = (self.y1 - self.y0) / n
+        return self.x0, self.y0 + h * start, self.x1, self.y0 + h * end
+
+
+@dataclass
+class WordHit:
+    word: IndexedWord
+    keyword: str
+    start: int
+
+    @property
+    def rect(self) -> Tuple[float, float, float, float]:
+        return self.word.sub_rect(self.start, self.start + len(self.keyword))
+
+
+@dataclass
+class BlockHit:
+    block: IndexedBlock
+    matched_keywords: Set[str] = field(default_factory=set)
+    line_nos: Set[int] = field(default_factory=set)
+
+    @property
+    def matched_lines(self) -> List[str]:
+        """命中的行（依原順序、去頭尾空白）"""
+        return [self.block.lines[i].strip() for i in sorted(self.line_nos)]
+
+
+class DesignatorIndex:
+    """
+    反向索引：designator token -> (區塊, 行)
+    每份文件建立一次，之後每個關鍵字搜尋都只是 dict 查詢
+
+    對「整個關鍵字都是 \\w 字元」的情況，結果與
+    re.compile(r"\\b(k1|k2|...)\\b") 逐區塊 findall 完全相同：
+    \\b 兩側都是邊界，命中的一定是一整段最長的 \\w 連續字元
+    """
+
+    def __init__(self):
+        self.blocks: List[IndexedBlock] = []
+        self.postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        self._seen: Set[Tuple[str, int, int]] = set()
+
+        # 字層級索引：token -> [(字 index, token 起點)]
+        self.words: List[IndexedWord] = []
+        self.word_postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+
+    def add_blocks(self, side: str, page: int, blocks: list):
+        """加入 page.get_text("blocks") 的結果"""
+        for b in blocks:
+            if len(b) < 6:
+                continue
+            x0, y0, x1, y1, text, block_no = b[:6]
+            if not isinstance(text, str):
+                continue
+
+            key = (side, page, block_no)
+            if key in self._seen:
+                continue
+            self._seen.add(key)
+
+            ref = len(self.blocks)
+            lines = text.splitlines()
+            self.blocks.append(IndexedBlock(side, page, x0, y0, x1, y1, block_no, text, lines))
+            for line_no, line in enumerate(lines):
+                for token in set(TOKEN_PATTERN.findall(line)):
+                    self.postings[token].append((ref, line_no))
+
+    def search(self, keywords: list[str], page_idx: int = None) -> List[BlockHit]:
+        """回傳命中的區塊（依加入順序），page_idx=None 代表全部頁面"""
+        hits: Dict[int, BlockHit] = {}
+        for keyword in set(keywords):
+            for ref, line_no in self.postings.get(keyword, ()):
+                block = self.blocks[ref]
+                if page_idx is not None and block.page != page_idx:
+                    continue
+                hit = hits.get(ref)
+                if hit is None:
+                    hit = hits[ref] = BlockHit(block)
+                hit.matched_keywords.add(keyword)
+                hit.line_nos.add(line_no)
+
+        return [hits[ref] for ref in sorted(hits)]
+
+    def add_words(self, side: str, page: int, words: list):
+        """加入 page.get_text("words") 的結果"""
+        for w in words:
+            x0, y0, x1, y1, text, block_no, line_no, word_no = w[:8]
+            ref = len(self.words)
+            self.words.append(IndexedWord(side, page, x0, y0, x1, y1, text, block_no, line_no, word_no))
+            for m in TOKEN_PATTERN.finditer(text):
+                self.word_postings[m.group()].append((ref, m.start()))
+
+    def search_words(self, keywords: list[str], page_idx: int = None) -> List[WordHit]:
+        """字層級搜尋，每個命中的 designator 各自一筆（依加入順序）"""
+        hits = []
+        for keyword in set(keywords):
+            for ref, start in self.word_postings.get(keyword, ()):
+                word = self.words[ref]
+                if page_idx is not None and word.page != page_idx:
+                    continue
+                hits.append((ref, start, WordHit(word, keyword, start)))
+
+        hits.sort(key=lambda h: (h[0], h[1]))
+        return [h[2] for h in hits]
@@ -1,51 +1,58 @@
 import fitz
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor
 from os.path import isfile
 from tkinter import messagebox
 import numpy as np
 import cv2
 from .data import BoundingBox,Union
-from .utils import handle_file_open_error
+from .utils import handle_file_open_error, UnionFind, GridIndex
 from .debug import Debug
+from .DensityEngine import DensityEngine
+from .PageContext import PageContext
 
 class SinglePDF:
     def __init__(self, path: str = None, side: str = None):
         self._path: str = None
         self.doc = None
         self.side = side  # 新增 side 屬性
+        self._contexts: dict[int, PageContext] = {}
+        # 這份文件所有 fitz 呼叫共用的鎖（見 PageContext）
+        self.lock = threading.RLock()
+        self.bounding_box: BoundingBox = None  # 第 0 頁的邊界框
+        self.bounding_boxes: dict[int, BoundingBox] = {}
         if path:
             self.path: str = path
 
-    def get_sobel_bounding_box(self,idx:int = 0 ,debug: bool = False) -> BoundingBox:
-        """根據 pixmap 圖像，使用 Sobel 邊緣檢測找出最大內容區域的邊界"""
+    def get_sobel_bounding_box(
+        self,
+        idx: int = 0,
+        debug: bool = False,
+        pyramid: bool = False,
+        coarse_zoom: float = 0.25
+    ) -> BoundingBox:
+        """
+        根據 pixmap 圖像，使用 Sobel 邊緣檢測找出最大內容區域的邊界
+
+        pyramid=True 時先以 coarse_zoom 的低解析度找最大邊緣區域，
+        再只以原解析度渲染四條邊界帶做細修（debug 模式不適用）
+        """
         page = self.get_page(idx)
-        pixmap = page.get_pixmap()
-        img = np.frombuffer(pixmap.samples, dtype=np.uint8).reshape((pixmap.height, pixmap.width, pixmap.n))
-        if img.shape[2] == 4:
-            img = img[:, :, :3]
-        height, width = img.shape[:2]
+        if pyramid and not debug and page.rotation == 0:
+            return self._get_sobel_bounding_box_pyramid(page, coarse_zoom)
 
-        # 轉灰階並做 Sobel 邊緣偵測
-        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-        sobelx = cv2.Sobel(gray, cv2.CV_64F, 1, 0, ksize=3)
-        sobely = cv2.Sobel(gray, cv2.CV_64F, 0, 1, ksize=3)
-        sobel = cv2.magnitude(sobelx, sobely)
-        sobel = np.uint8(np.clip(sobel, 0, 255))
+        pixmap = self.get_pixmap(1, idx)
+        img = self._pixmap_to_array(pixmap)
+        height, width = img.shape[:2]
 
-        # 二值化 + 膨脹以連結斷裂邊界
-        _, edge_bin = cv2.threshold(sobel, 30, 255, cv2.THRESH_BINARY)
-        kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (15, 15))
-        dilated_edge = cv2.dilate(edge_bin, kernel, iterations=1)
+        sobel, dilated_edge = self._sobel_edge_map(img)
 
         # 找最大連通區域
-        num_labels, labels, stats, _ = cv2.connectedComponentsWithStats(dilated_edge)
-        if num_labels <= 1:
+        bbox = self._largest_component(dilated_edge)
+        if bbox is None:
             return BoundingBox(0, 0, width, height)
-
-        stats = stats[1:]  # 去掉背景
-        max_stat = max(stats, key=lambda s: s[cv2.CC_STAT_AREA])
-        x, y, w, h = max_stat[:4]
-        
-        bbox = BoundingBox(x, y, x + w, y + h)
         
         if debug:
             import matplotlib.pyplot as plt
@@ -73,6 +80,110 @@ class SinglePDF:
         
         return bbox
 
+    @staticmethod
+    def _pixmap_to_array(pixmap: fitz.Pixmap) -> np.ndarray:
+        """pixmap 轉 numpy（去掉 alpha 通道）"""
+        img = np.frombuffer(pixmap.samples, dtype=np.uint8).reshape((pixmap.height, pixmap.width, pixmap.n))
+        if img.shape[2] == 4:
+            img = img[:, :, :3]
+        return img
+
+    @staticmethod
+    def _sobel_edge_map(img: np.ndarray, kernel_size: int = 15) -> tuple[np.ndarray, np.ndarray]:
+        """Sobel 邊緣偵測 + 二值化 + 膨脹，回傳 (sobel, dilated_edge)"""
+        # 轉灰階並做 Sobel 邊緣偵測
+        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+        sobelx = cv2.Sobel(gray, cv2.CV_64F, 1, 0, ksize=3)
+        sobely = cv2.Sobel(gray, cv2.CV_64F, 0, 1, ksize=3)
+        sobel = cv2.magnitude(sobelx, sobely)
+        sobel = np.uint8(np.clip(sobel, 0, 255))
+
+        # 二值化 + 膨脹以連結斷裂邊界
+        _, edge_bin = cv2.threshold(sobel, 30, 255, cv2.THRESH_BINARY)
+        kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (kernel_size, kernel_size))
+        dilated_edge = cv2.dilate(edge_bin, kernel, iterations=1)
+        return sobel, dilated_edge
+
+    @staticmethod
+    def _largest_component(binary: np.ndarray) -> Union[BoundingBox, None]:
+        """找面積最大的連通區域外框，沒有前景則回傳 None"""
+        num_labels, labels, stats, _ = cv2.connectedComponentsWithStats(binary)
+        if num_labels <= 1:
+            return None
+
+        stats = stats[1:]  # 去掉背景
+        max_stat = max(stats, key=lambda s: s[cv2.CC_STAT_AREA])
+        x, y, w, h = max_stat[:4]
+        return BoundingBox(x, y, x + w, y + h)
+
+    def _get_sobel_bounding_box_pyramid(self, page: fitz.Page, coarse_zoom: float = 0.25) -> BoundingBox:
+        """
+        金字塔模式：低解析度找最大邊緣區域，再以原解析度細修四條邊界帶
+        結果與全頁 Sobel 誤差在幾個 pixel 內
+        """
+        full = page.rect.irect
+        width, height = full.width, full.height
+
+        # Step 1: 低解析度整頁，kernel 跟著縮小（保持奇數且至少 3）
+        coarse_pix = page.get_pixmap(matrix=fitz.Matrix(coarse_zoom, coarse_zoom))
+        coarse_kernel = max(3, int(15 * coarse_zoom) | 1)
+        _, coarse_edge = self._sobel_edge_map(self._pixmap_to_array(coarse_pix), coarse_kernel)
+
+        coarse = self._largest_component(coarse_edge)
+        if coarse is None:
+            return BoundingBox(0, 0, width, height)
+
+        # 換算回原解析度
+        x0 = int(coarse.x0 / coarse_zoom)
+        y0 = int(coarse.y0 / coarse_zoom)
+        x1 = min(int(np.ceil(coarse.x1 / coarse_zoom)), width)
+        y1 = min(int(np.ceil(coarse.y1 / coarse_zoom)), height)
+
+        # Step 2: 只渲染邊界帶
+        # slop：低解析度造成的誤差；邊界帶再多留膨脹範圍
+        slop = int(np.ceil(3 / coarse_zoom))
+        margin = slop + 15
+
+        def strip_edges(sx0, sy0, sx1, sy1, band):
+            """
+            渲染 clip 區域，只保留穿過 band（確定在板內側的區域）的連通邊緣，
+            回傳 (有邊緣的欄, 有邊緣的列)，座標為整頁原解析度
+            """
+            clip = fitz.Rect(max(sx0, 0), max(sy0, 0), min(sx1, width), min(sy1, height))
+            if clip.is_empty:
+                return None
+            pix = page.get_pixmap(clip=clip)
+            _, edge = self._sobel_edge_map(self._pixmap_to_array(pix))
+            _, labels = cv2.connectedComponents(edge)
+
+            bx0, by0 = max(band[0] - pix.x, 0), max(band[1] - pix.y, 0)
+            bx1, by1 = max(band[2] - pix.x, 0), max(band[3] - pix.y, 0)
+            keep = np.unique(labels[by0:by1, bx0:bx1])
+            keep = keep[keep != 0]
+            if len(keep) == 0:
+                return None
+
+            mask = np.isin(labels, keep)
+            cols = np.flatnonzero(mask.any(axis=0))
+            rows = np.flatnonzero(mask.any(axis=1))
+            return cols + pix.x, rows + pix.y
+
+        left = strip_edges(x0 - margin, y0 - margin, x0 + margin, y1 + margin,
+                           (x0 + slop, y0, x0 + margin, y1))
+        right = strip_edges(x1 - margin, y0 - margin, x1 + margin, y1 + margin,
+                            (x1 - margin, y0, x1 - slop, y1))
+        top = strip_edges(x0 - margin, y0 - margin, x1 + margin, y0 + margin,
+                          (x0, y0 + slop, x1, y0 + margin))
+        bottom = strip_edges(x0 - margin, y1 - margin, x1 + margin, y1 + margin,
+                             (x0, y1 - margin, x1, y1 - slop))
+
+        return BoundingBox(
+            int(left[0][0]) if left else x0,
+            int(top[1][0]) if top else y0,
+            int(right[0][-1]) + 1 if right else x1,
+            int(bottom[1][-1]) + 1 if bottom else y1,
+        )
+
     @Debug.event("get density", "blue")
     def get_density_bounding_box_from_sobel(
         self,
@@ -84,7 +195,8 @@ class SinglePDF:
         large_win: int = 200,
         large_stride: int = 100,
         top_k: int = 10,
-        padding: int = 5
+        padding: int = 5,
+        backend: str = "integral"
     ) -> BoundingBox:
         """使用滑動視窗密度分析，於 sobel 框內尋找文字最密集的區域"""
         page = self.get_page(idx)
@@ -107,41 +219,20 @@ class SinglePDF:
                 cv2.rectangle(heatmap, (px0, py0), (px1, py1), 255, -1)
 
         # Step 2: 小視窗滑動尋找高密度 seed
-        small_seeds = []
-        for y in range(sobel_bbox.y0 - small_win, sobel_bbox.y1 + small_stride, small_stride):
-            for x in range(sobel_bbox.x0 - small_win, sobel_bbox.x1 + small_stride, small_stride):
-                sx0 = max(x, 0)
-                sy0 = max(y, 0)
-                sx1 = min(x + small_win, width)
-                sy1 = min(y + small_win, height)
-                if sx1 <= sx0 or sy1 <= sy0:
-                    continue  # 避免錯誤視窗
-                score = np.sum(heatmap[sy0:sy1, sx0:sx1] == 255)
-                if score > 0:
-                    small_seeds.append((score, sx0, sy0, sx1, sy1))
-
+        top_small = self._small_window_seeds(
+            heatmap, sobel_bbox, small_win, small_stride, top_k, 1, backend
+        )
 
-        if not small_seeds:
+        if not top_small:
             return sobel_bbox  # fallback：找不到任何內容就回傳原 sobel 框
 
-        top_small = sorted(small_seeds, key=lambda s: s[0], reverse=True)[:top_k]
-
         # Step 3: 大視窗掃描涵蓋小 seed 的視窗
-        large_windows = []
-        for y in range(sobel_bbox.y0 - large_win, sobel_bbox.y1 + large_stride, large_stride):
-            for x in range(sobel_bbox.x0 - large_win, sobel_bbox.x1 + large_stride, large_stride):
-                lx0 = max(x, 0)
-                ly0 = max(y, 0)
-                lx1 = min(x + large_win, width)
-                ly1 = min(y + large_win, height)
-                if lx1 <= lx0 or ly1 <= ly0:
-                    continue
-                overlaps = [
-                    1 for _, sx0, sy0, sx1, sy1 in top_small
-                    if lx0 <= sx0 <= lx1 and ly0 <= sy0 <= ly1
-                ]
-                if overlaps:
-                    large_windows.append((len(overlaps), lx0, ly0, lx1, ly1))
+        large_windows = self._large_window_cover(
+            top_small,
+            range(sobel_bbox.x0 - large_win, sobel_bbox.x1 + large_stride, large_stride),
+            range(sobel_bbox.y0 - large_win, sobel_bbox.y1 + large_stride, large_stride),
+            large_win, width, height, rule="anchor"
+        )
 
         # Step 4: 根據結果合併邊界
         if large_windows:
@@ -165,7 +256,7 @@ class SinglePDF:
             import matplotlib.pyplot as plt
 
             # 原圖 + 紅框：結果圖
-            pix = page.get_pixmap()
+            pix = self.get_pixmap(1, idx)
             img = np.frombuffer(pix.samples, dtype=np.uint8).reshape((pix.height, pix.width, pix.n))
             img_result = img.copy()
             cv2.rectangle(img_result, (x0, y0), (x1, y1), (0, 0, 255), 3)  # 結果框
@@ -211,7 +302,8 @@ class SinglePDF:
         large_stride: int = 100,
         top_k: int = 10,
         padding: int = 2,
-        min_score: int = 5
+        min_score: int = 5,
+        backend: str = "integral"
     ) -> BoundingBox:
         """
         根據 Sobel 預測的邊界框，在範圍內進行密度分析，
@@ -254,6 +346,11 @@ class SinglePDF:
         min_score : int, 預設 5
             小視窗中至少要有多少像素值為 255（代表文字）才算是有效密度視窗。  
             - 可以過濾掉空白或雜訊區域。
+
+        backend : str, 預設 "integral"
+            小視窗密度的計算方式。  
+            - "integral"：積分影像查表，全部視窗一次向量化算完。  
+            - "loop"：逐視窗 np.sum（舊版寫法，結果相同）。
         
         傳回：
         -------
@@ -281,40 +378,20 @@ class SinglePDF:
         heatmap = cv2.morphologyEx(heatmap, cv2.MORPH_OPEN, kernel)
 
         # Step 2: 小視窗滑動尋找高密度 seed
-        small_seeds = []
-        for y in range(sobel_bbox.y0 - small_win, sobel_bbox.y1 + small_stride, small_stride):
-            for x in range(sobel_bbox.x0 - small_win, sobel_bbox.x1 + small_stride, small_stride):
-                sx0 = max(x, 0)
-                sy0 = max(y, 0)
-                sx1 = min(x + small_win, width)
-                sy1 = min(y + small_win, height)
-                if sx1 <= sx0 or sy1 <= sy0:
-                    continue
-                score = np.sum(heatmap[sy0:sy1, sx0:sx1] == 255)
-                if score >= min_score:
-                    small_seeds.append((score, sx0, sy0, sx1, sy1))
+        top_small = self._small_window_seeds(
+            heatmap, sobel_bbox, small_win, small_stride, top_k, min_score, backend
+        )
 
-        if not small_seeds:
+        if not top_small:
             return sobel_bbox
 
-        top_small = sorted(small_seeds, key=lambda s: s[0], reverse=True)[:top_k]
-
         # Step 3: 大視窗掃描涵蓋小 seed 的視窗
-        large_windows = []
-        for y in range(sobel_bbox.y0 - large_win, sobel_bbox.y1 + large_stride, large_stride):
-            for x in range(sobel_bbox.x0 - large_win, sobel_bbox.x1 + large_stride, large_stride):
-                lx0 = max(x, 0)
-                ly0 = max(y, 0)
-                lx1 = min(x + large_win, width)
-                ly1 = min(y + large_win, height)
-                if lx1 <= lx0 or ly1 <= ly0:
-                    continue
-                overlaps = [
-                    1 for _, sx0, sy0, sx1, sy1 in top_small
-                    if min(sx1, lx1) - max(sx0, lx0) > 0 and min(sy1, ly1) - max(sy0, ly0) > 0
-                ]
-                if overlaps:
-                    large_windows.append((len(overlaps), lx0, ly0, lx1, ly1))
+        large_windows = self._large_window_cover(
+            top_small,
+            range(sobel_bbox.x0 - large_win, sobel_bbox.x1 + large_stride, large_stride),
+            range(sobel_bbox.y0 - large_win, sobel_bbox.y1 + large_stride, large_stride),
+            large_win, width, height, rule="intersect"
+        )
 
         # Step 4: 根據結果合併邊界
         if large_windows:
@@ -349,7 +426,7 @@ class SinglePDF:
             cv2.rectangle(vis, (sobel_bbox.x0, sobel_bbox.y0), (sobel_bbox.x1, sobel_bbox.y1), (255, 0, 0), 2)
 
             # 原圖
-            pix = page.get_pixmap()
+            pix = self.get_pixmap(1, idx)
             img = np.frombuffer(pix.samples, dtype=np.uint8).reshape((pix.height, pix.width, pix.n))
             img_result = img.copy()
             if pix.n == 4:
@@ -374,6 +451,66 @@ class SinglePDF:
 
 
 
+    @staticmethod
+    def _small_window_seeds(
+        heatmap: np.ndarray,
+        sobel_bbox: BoundingBox,
+        small_win: int,
+        small_stride: int,
+        top_k: int,
+        min_score: int,
+        backend: str = "integral"
+    ) -> list[tuple]:
+        """小視窗掃描 sobel 框，回傳分數前 top_k 的 seed [(score, x0, y0, x1, y1), ...]"""
+        height, width = heatmap.shape[:2]
+        xs = range(sobel_bbox.x0 - small_win, sobel_bbox.x1 + small_stride, small_stride)
+        ys = range(sobel_bbox.y0 - small_win, sobel_bbox.y1 + small_stride, small_stride)
+
+        if backend == "integral":
+            engine = DensityEngine(heatmap)
+            windows = DensityEngine.grid(xs, ys, small_win, width, height)
+            return engine.top_seeds(windows, min_score, top_k)
+
+        if backend != "loop":
+            raise ValueError(f"無效的 backend 參數: {backend}")
+
+        small_seeds = []
+        for y in ys:
+            for x in xs:
+                sx0 = max(x, 0)
+                sy0 = max(y, 0)
+                sx1 = min(x + small_win, width)
+                sy1 = min(y + small_win, height)
+                if sx1 <= sx0 or sy1 <= sy0:
+                    continue  # 避免錯誤視窗
+                score = np.sum(heatmap[sy0:sy1, sx0:sx1] == 255)
+                if score >= min_score:
+                    small_seeds.append((score, sx0, sy0, sx1, sy1))
+
+        return sorted(small_seeds, key=lambda s: s[0], reverse=True)[:top_k]
+
+    @staticmethod
+    def _large_window_cover(
+        top_small: list[tuple],
+        xs: range,
+        ys: range,
+        large_win: int,
+        width: int,
+        height: int,
+        rule: str = "intersect",
+        skip_empty: bool = True
+    ) -> list[tuple]:
+        """大視窗掃描，回傳至少涵蓋一個 seed 的視窗 [(count, x0, y0, x1, y1), ...]"""
+        windows = DensityEngine.grid(xs, ys, large_win, width, height, skip_empty)
+        seeds = np.array([s[1:5] for s in top_small], dtype=np.int64).reshape(-1, 4)
+        counts = DensityEngine.overlap_counts(windows, seeds, rule)
+
+        hit = np.flatnonzero(counts)
+        return [
+            (int(counts[i]), *map(int, windows[i]))
+            for i in hit
+        ]
+
     @Debug.event("get bounding v2", "blue")
     def get_trimmed_bounding_box(self, idx: int = 0) -> Union[BoundingBox, None]:
         import matplotlib.pyplot as plt
@@ -382,7 +519,7 @@ class SinglePDF:
 
         # === 1. 準備圖像與尺寸 ===
         page = self.get_page(idx)
-        pix = page.get_pixmap()
+        pix = self.get_pixmap(1, idx)
         img = np.frombuffer(pix.samples, dtype=np.uint8).reshape((pix.height, pix.width, pix.n))
         if img.shape[2] == 4:  # 有 alpha
             img = img[:, :, :3]
@@ -466,7 +603,7 @@ class SinglePDF:
 
         # === 1. 準備圖像與尺寸 ===
         page = self.get_page(idx)
-        pix = page.get_pixmap()
+        pix = self.get_pixmap(1, idx)
         img = np.frombuffer(pix.samples, dtype=np.uint8).reshape((pix.height, pix.width, pix.n))
         if img.shape[2] == 4:
             img = img[:, :, :3]
@@ -601,7 +738,7 @@ class SinglePDF:
         import numpy as np
         
         page = self.get_page(idx)
-        pix = page.get_pixmap()
+        pix = self.get_pixmap(1, idx)
         img = np.frombuffer(pix.samples, dtype=np.uint8).reshape((pix.height, pix.width, pix.n))
         if img.shape[2] == 4:
             img = img[:, :, :3]
@@ -645,15 +782,12 @@ class SinglePDF:
         top_small = sorted(density_map_small, key=lambda s: s[0], reverse=True)[:top_k]
 
         # 再使用大視窗包含 top_small 區域
-        large_windows = []
-        for y in range(y_sob - large_win, y_sob + h_sob, large_stride):
-            for x in range(x_sob - large_win, x_sob + w_sob, large_stride):
-                lx0, ly0 = max(x, 0), max(y, 0)
-                lx1, ly1 = min(x + large_win, width), min(y + large_win, height)
-                overlaps = [1 for _, sx0, sy0, sx1, sy1 in top_small
-                            if lx0 <= sx0 <= lx1 and ly0 <= sy0 <= ly1]
-                if overlaps:
-                    large_windows.append((len(overlaps), lx0, ly0, lx1, ly1))
+        large_windows = self._large_window_cover(
+            top_small,
+            range(x_sob - large_win, x_sob + w_sob, large_stride),
+            range(y_sob - large_win, y_sob + h_sob, large_stride),
+            large_win, width, height, rule="anchor", skip_empty=False
+        )
 
         # Step 5: 生成精準紅框
         if not large_windows:
@@ -688,25 +822,225 @@ class SinglePDF:
 
 
     @Debug.event("get bounding box v6","blue")
-    def get_trimmed_bounding_box_v6(self, idx:int = 0):
-        # step.1 準備資料
-        page = self.get_page(idx)
-        pix = page.get_pixmap()
-        img = np.frombuffer(pix.samples, dtype=np.uint8).reshape((pix.height, pix.width, pix.n))
-        if img.shape[2] == 4:
-            img = img[:, :, :3]
-        height, width = img.shape[:2]
-        
-        # step.2 sobel
-        sobel = self.get_sobel_bounding_box(idx)
+    def get_trimmed_bounding_box_v6(self, idx:int = 0, density_backend: str = "integral", sobel_pyramid: bool = False):
+        # step.1 sobel（pyramid 模式不渲染整頁原解析度）
+        sobel = self.get_sobel_bounding_box(idx, pyramid=sobel_pyramid)
         final = self.get_density_bounding_box_from_sobel_v2(
-            sobel,idx,debug=True,
+            sobel,idx,debug=True,backend=density_backend,
         )
         
-        self.bounding_box = final
+        self.set_bounding_box(final, idx)
         
         return final
     
+    def get_board_bounding_box(self, idx: int = 0, method: str = "raster", **params) -> BoundingBox:
+        """
+        依 method 選擇邊界框演算法
+        * "raster"：get_trimmed_bounding_box_v6（渲染 + Sobel）
+        * "vector"：get_trimmed_bounding_box_vector（向量路徑，掃描檔自動退回 raster）
+        分析過程會直接呼叫 page 的 fitz 方法，所以整段持有文件的 lock
+        """
+        if method not in ("raster", "vector"):
+            raise ValueError(f"無效的 method 參數: {method}")
+        with self.lock:
+            if method == "raster":
+                return self.get_trimmed_bounding_box_v6(idx, **params)
+            return self.get_trimmed_bounding_box_vector(idx, **params)
+
+    def set_bounding_box(self, bbox: BoundingBox, idx: int = 0):
+        """記錄某頁的邊界框；第 0 頁同時寫入 self.bounding_box"""
+        self.bounding_boxes[idx] = bbox
+        if idx == 0:
+            self.bounding_box = bbox
+
+    def lookup_bounding_boxes(self, pages: list[int] = None, cache=None, **params) -> dict[int, str]:
+        """
+        快取命中的頁面直接寫入 bounding_boxes，回傳還需要計算的 {頁碼: 快取 key}
+        （沒有快取時 key 為 None）
+        """
+        pages = list(range(self.page_count)) if pages is None else list(pages)
+        pending: dict[int, str] = {}
+        for idx in pages:
+            key, bbox = cache.lookup(self, idx, params) if cache else (None, None)
+            if bbox is not None:
+                self.set_bounding_box(bbox, idx)
+            else:
+                pending[idx] = key
+        if cache and pages:
+            # 整塊板子印一行摘要，不逐頁印
+            print(f"邊界框快取命中 {len(pages) - len(pending)}/{len(pages)} 頁：{self.get_file_name()}")
+        return pending
+
+    def store_bounding_box(self, idx: int, bbox: BoundingBox, key: str = None, cache=None, **params):
+        """寫入計算好的邊界框，有快取時一併寫入快取（只到記憶體，整塊板子算完再 cache.flush()）"""
+        if cache:
+            cache.set(key, params, bbox, self.get_file_name())
+        self.set_bounding_box(bbox, idx)
+
+    @Debug.event("get bounding boxes", "blue")
+    def get_bounding_boxes(
+        self,
+        pages: list[int] = None,
+        cache=None,
+        executor: Executor = None,
+        max_workers: int = None,
+        **params
+    ) -> dict[int, BoundingBox]:
+        """
+        計算多頁的邊界框（預設全部頁面），回傳 {頁碼: BoundingBox}
+        - cache：BoundingBoxCache，命中的頁面不重算
+        - 未命中的頁面超過一頁時分派到 process pool 平行計算，
+          可傳入共用的 executor，否則臨時建立一個
+        """
+        pages = list(range(self.page_count)) if pages is None else list(pages)
+        pending = self.lookup_bounding_boxes(pages, cache, **params)
+
+        if len(pending) == 1 and executor is None:
+            idx, key = next(iter(pending.items()))
+            self.store_bounding_box(idx, self.get_board_bounding_box(idx, **params), key, cache, **params)
+        elif pending:
+            own_executor = executor is None
+            if own_executor:
+                executor = ProcessPoolExecutor(
+                    max_workers=max_workers or min(len(pending), os.cpu_count() or 1),
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            try:
+                futures = {
+                    idx: executor.submit(analyse_page, self.path, idx, params)
+                    for idx in pending
+                }
+                for idx, future in futures.items():
+                    self.store_bounding_box(idx, BoundingBox(*future.result()), pending[idx], cache, **params)
+            finally:
+                if own_executor:
+                    executor.shutdown()
+
+        # 整塊板子一次寫入快取檔
+        if cache:
+            cache.flush()
+        return {idx: self.bounding_boxes[idx] for idx in pages}
+
+    @Debug.event("get bounding box vector", "blue")
+    def get_trimmed_bounding_box_vector(
+        self,
+        idx: int = 0,
+        density_backend: str = "integral",
+        sobel_pyramid: bool = False
+    ) -> BoundingBox:
+        """
+        不渲染 pixmap：以向量路徑找板子外框，再用文字密度收斂
+        頁面沒有向量內容（掃描檔）時退回 get_trimmed_bounding_box_v6
+        """
+        outline = self.get_vector_bounding_box(idx)
+        if outline is None:
+            print("頁面沒有可用的向量路徑，改用 raster 流程")
+            return self.get_trimmed_bounding_box_v6(idx, density_backend, sobel_pyramid)
+
+        final = self.get_density_bounding_box_from_sobel_v2(
+            outline, idx, backend=density_backend,
+        )
+        self.set_bounding_box(final, idx)
+        return final
+
+    def get_vector_bounding_box(
+        self,
+        idx: int = 0,
+        gap: float = 7.0,
+        max_image_ratio: float = 0.5
+    ) -> Union[BoundingBox, None]:
+        """
+        以 page.get_drawings() 的線段與文字框找最大的相連區域，
+        等同 Sobel + 15x15 膨脹 + 最大連通區的向量版本：
+        - 每段線段 / 文字框各往外擴 gap（膨脹半徑）
+        - 擴張後相交的視為相連（併查集 + 網格索引）
+        - 取擴張面積總和最大的群組外框
+
+        頁面以圖片為主（掃描檔）或沒有任何內容時回傳 None
+        """
+        page = self.get_page(idx)
+        page_rect = page.rect
+        page_area = page_rect.width * page_rect.height
+
+        # 掃描檔：圖片面積佔頁面大半
+        image_area = sum(abs(fitz.Rect(info["bbox"])) for info in page.get_image_info())
+        if page_area <= 0 or image_area > page_area * max_image_ratio:
+            return None
+
+        rects = self._drawing_segments(page)
+        rects += [tuple(w[:4]) for w in self.get_words(idx)]
+        if not rects:
+            return None
+
+        expanded = [(x0 - gap, y0 - gap, x1 + gap, y1 + gap) for x0, y0, x1, y1 in rects]
+
+        # 擴張後相交即相連
+        uf = UnionFind(len(expanded))
+        grid = GridIndex(cell_size=max(4 * gap, 1))
+        for i, r in enumerate(expanded):
+            for j in grid.query(r):
+                uf.union(i, j)
+            grid.insert(i, r)
+
+        areas = {}
+        bounds = {}
+        for i, r in enumerate(expanded):
+            root = uf.find(i)
+            areas[root] = areas.get(root, 0) + (r[2] - r[0]) * (r[3] - r[1])
+            b = bounds.get(root)
+            bounds[root] = r if b is None else (
+                min(b[0], r[0]), min(b[1], r[1]), max(b[2], r[2]), max(b[3], r[3])
+            )
+
+        best = max(areas, key=areas.get)
+        x0, y0, x1, y1 = bounds[best]
+        return BoundingBox(
+            max(int(np.floor(x0)), 0),
+            max(int(np.floor(y0)), 0),
+            min(int(np.ceil(x1)), int(np.ceil(page_rect.width))),
+            min(int(np.ceil(y1)), int(np.ceil(page_rect.height))),
+        )
+
+    @staticmethod
+    def _drawing_segments(page: fitz.Page) -> list[tuple]:
+        """
+        把向量路徑拆成線段外框；矩形/四邊形拆成四條邊，
+        因為邊緣偵測只會在邊上有反應，不能用整個路徑外框代替
+        """
+        white = (1.0, 1.0, 1.0)
+        segments = []
+
+        def edge(p, q):
+            segments.append((min(p.x, q.x), min(p.y, q.y), max(p.x, q.x), max(p.y, q.y)))
+
+        for d in page.get_drawings():
+            color, fill = d.get("color"), d.get("fill")
+            if (color is None or tuple(color) == white) and (fill is None or tuple(fill) == white):
+                continue  # 白色/不可見路徑在白底上不會產生邊緣
+
+            for item in d["items"]:
+                kind = item[0]
+                if kind == "l":
+                    edge(item[1], item[2])
+                elif kind == "re":
+                    r = item[1]
+                    edge(r.tl, r.tr)
+                    edge(r.tr, r.br)
+                    edge(r.br, r.bl)
+                    edge(r.bl, r.tl)
+                elif kind == "qu":
+                    q = item[1]
+                    edge(q.ul, q.ur)
+                    edge(q.ur, q.lr)
+                    edge(q.lr, q.ll)
+                    edge(q.ll, q.ul)
+                elif kind == "c":
+                    xs = [p.x for p in item[1:5]]
+                    ys = [p.y for p in item[1:5]]
+                    segments.append((min(xs), min(ys), max(xs), max(ys)))
+
+        return segments
+
     def visualize_and_group_words(self, idx: int = 0, threshold: int = 10):
         import cv2
         import numpy as np
@@ -714,7 +1048,7 @@ class SinglePDF:
         import matplotlib.pyplot as plt
 
         page = self.get_page(idx)
-        pix = page.get_pixmap()
+        pix = self.get_pixmap(1, idx)
         img = np.frombuffer(pix.samples, dtype=np.uint8).reshape((pix.height, pix.width, pix.n))
         if img.shape[2] == 4:
             img = img[:, :, :3]
@@ -797,29 +1131,50 @@ class SinglePDF:
         plt.axis("off")
         plt.show()
     
+    @property
+    def page_count(self) -> int:
+        """PDF 總頁數"""
+        with self.lock:
+            return self.doc.page_count if self.doc else 0
+
     def get_file_name(self) -> str:
         """
         回傳PDF的檔名
         """
         return self.path.split("/")[-1]
             
+    def get_context(self, idx: int = 0) -> PageContext:
+        """get: 單頁分析 context（每頁只建立一次）"""
+        with self.lock:
+            ctx = self._contexts.get(idx)
+            if ctx is None:
+                ctx = PageContext(self.doc, idx, self.lock)
+                self._contexts[idx] = ctx
+            return ctx
+
     def get_page(self,idx:int=0):
         """get: pdf page"""
-        return self.doc.load_page(idx)
+        return self.get_context(idx).page
 
-    def get_pixmap(self,zoom,idx:int=0):
-        # 解析度
-        mat = fitz.Matrix(zoom,zoom)
-        
-        return self.get_page(idx).get_pixmap(matrix=mat)
+    def get_pixmap(self,zoom,idx:int=0,cache:bool=True):
+        """依解析度渲染，cache=False 不保留結果（高解析度大圖用）"""
+        return self.get_context(idx).get_pixmap(zoom, cache)
+    
+    def get_clip_pixmap(self, clip, zoom, idx: int = 0):
+        """只渲染 clip 範圍（PDF 座標），不保留結果"""
+        return self.get_context(idx).get_clip_pixmap(clip, zoom)
+
+    def get_pixel_size(self, zoom, idx: int = 0) -> tuple[int, int]:
+        """get_pixmap(zoom) 整頁影像的 (寬, 高)"""
+        return self.get_context(idx).pixel_size(zoom)
     
     def get_blocks(self,idx:int=0):
         """建立搜尋頁面source"""
-        return self.get_page(idx).get_text("blocks")
+        return self.get_context(idx).blocks
     
     def get_words(self,idx:int=0):
         """建立搜尋頁面source"""
-        return self.get_page(idx).get_text("words")
+        return self.get_context(idx).words
 
     @property
     def path(self):
@@ -842,8 +1197,12 @@ class SinglePDF:
             return
 
         print(f"PDF path changed to: {value}")
-        self._path = value
-        self.doc = self.open_pdf_file(value)
+        with self.lock:
+            self._path = value
+            self.doc = self.open_pdf_file(value)
+            self._contexts = {}
+        self.bounding_box = None
+        self.bounding_boxes = {}
 
     @staticmethod
     def is_valid_pdf(path: str) -> tuple[bool, str]:
@@ -869,3 +1228,12 @@ class SinglePDF:
         """fitz開檔"""
         return fitz.open(path)
 
+
+def analyse_page(path: str, idx: int, params: dict) -> tuple[int, int, int, int]:
+    """
+    process pool 用的工作函式：在子行程開檔並計算單頁邊界框
+    只回傳 tuple，避免傳遞 fitz 物件
+    """
+    pdf = SinglePDF(path)
+    bbox = pdf.get_board_bounding_box(idx, **params)
+    return tuple(int(v) for v in bbox.as_tuple())
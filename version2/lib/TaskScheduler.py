@@ -0,0 +1,161 @@
+import queue
+import threading
+import tkinter as tk
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Hashable
+
+
+class TaskCancelled(Exception):
+    """工作已被取消（或被同 key 的新工作取代）"""
+
+
+class Task:
+    """
+    交給背景執行的一件工作
+    work(task) 在 worker 執行緒中執行，透過 task.progress() 回報進度；
+    每次回報進度同時是取消檢查點，已取消時會丟出 TaskCancelled
+    """
+
+    def __init__(self, scheduler: "TaskScheduler", key: Hashable):
+        self.scheduler = scheduler
+        self.key = key
+        self._cancel_event = threading.Event()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel_event.is_set()
+
+    def cancel(self):
+        self._cancel_event.set()
+
+    def check(self):
+        """已取消就丟出 TaskCancelled，讓 worker 在階段之間提早結束"""
+        if self.cancelled:
+            raise TaskCancelled(self.key)
+
+    def progress(self, percent: int, text: str = None):
+        """回報進度（在主執行緒呼叫 on_progress）"""
+        self.check()
+        self.scheduler.post(self, "progress", (percent, text))
+
+
+class TaskScheduler:
+    """
+    背景工作排程器
+    * 工作在 worker pool 執行，不可以碰任何 Tk 元件
+    * 進度、結果、錯誤都放進 queue，由主執行緒以 after 輪詢後呼叫 callback
+    * 同一個 key 同時只保留最新的工作：新工作送出時，舊的會被取消，
+      舊工作之後送來的訊息一律丟棄（不會和新工作搶著更新畫面）
+    """
+
+    def __init__(self, root: tk.Misc, max_workers: int = 2, poll_ms: int = 50):
+        self.root = root
+        self.poll_ms = poll_ms
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="TaskScheduler")
+        self.messages: queue.Queue = queue.Queue()
+        self.active: dict[Hashable, Task] = {}
+        self.callbacks: dict[Task, dict[str, Callable]] = {}
+        self._polling = False
+
+    def submit(
+        self,
+        key: Hashable,
+        work: Callable[[Task], Any],
+        on_done: Callable[[Any], None] = None,
+        on_progress: Callable[[int, str], None] = None,
+        on_error: Callable[[Exception], None] = None,
+        on_cancel: Callable[[], None] = None,
+    ) -> Task:
+        """
+        送出工作（只能在主執行緒呼叫），callback 都在主執行緒執行
+        同 key 還有工作在跑時先取消它（coalescing）
+        """
+        self.cancel(key)
+
+        task = Task(self, key)
+        self.active[key] = task
+        self.callbacks[task] = {
+            "done": on_done,
+            "progress": on_progress,
+            "error": on_error,
+            "cancel": on_cancel,
+        }
+        self.executor.submit(self._run, task, work)
+        self._schedule_poll()
+        return task
+
+    def cancel(self, key: Hashable) -> bool:
+        """取消 key 目前的工作；回傳是否真的有工作被取消"""
+        task = self.active.pop(key, None)
+        if task is None:
+            return False
+        task.cancel()
+        return True
+
+    def is_active(self, key: Hashable) -> bool:
+        return key in self.active
+
+    def shutdown(self):
+        for key in list(self.active):
+            self.cancel(key)
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def post(self, task: Task, kind: str, payload: Any = None):
+        """worker 執行緒用：把訊息交給主執行緒"""
+        self.messages.put((task, kind, payload))
+
+    def _run(self, task: Task, work: Callable[[Task], Any]):
+        try:
+            task.check()
+            result = work(task)
+            task.check()
+        except TaskCancelled:
+            self.post(task, "cancel")
+        except Exception as e:
+            self.post(task, "error", e)
+        else:
+            self.post(task, "done", result)
+
+    def _schedule_poll(self):
+        if not self._polling:
+            self._polling = True
+            self.root.after(self.poll_ms, self._poll)
+
+    def _poll(self):
+        """主執行緒：處理 queue 中所有訊息"""
+        while True:
+            try:
+                task, kind, payload = self.messages.get_nowait()
+            except queue.Empty:
+                break
+
+            callbacks = self.callbacks.get(task)
+            if callbacks is None:
+                continue
+
+            finished = kind in ("done", "error", "cancel")
+            if finished:
+                del self.callbacks[task]
+                if self.active.get(task.key) is task:
+                    del self.active[task.key]
+
+            # 已取消的工作：只通知取消，不再套用進度或結果
+            if task.cancelled and kind != "cancel":
+                kind = "cancel" if finished else None
+            callback = callbacks.get(kind) if kind else None
+            if callback is None:
+                continue
+
+            try:
+                if kind == "progress":
+                    callback(*payload)
+                elif kind in ("done", "error"):
+                    callback(payload)
+                else:
+                    callback()
+            except Exception as e:
+                print(f"工作 {task.key} 的 {kind} callback 失敗：{e}")
+
+        self._polling = False
+        if self.callbacks:
+            self._schedule_poll()
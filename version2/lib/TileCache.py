@@ -0,0 +1,60 @@
+import threading
+from collections import OrderedDict
+from typing import Hashable
+
+from PIL import Image
+
+
+class TileCache:
+    """
+    已合成好的 zoom 影像 LRU 快取（PIL.Image）
+    以位元組計算容量，超過 max_bytes 時從最久沒用到的開始淘汰；
+    背景預取與主執行緒會同時存取，所以所有操作都上鎖
+    """
+
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.used_bytes = 0
+        self._items: OrderedDict[Hashable, Image.Image] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def image_bytes(image: Image.Image) -> int:
+        return image.width * image.height * len(image.getbands())
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._items
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._items)
+
+    def get(self, key: Hashable) -> Image.Image | None:
+        with self._lock:
+            image = self._items.get(key)
+            if image is not None:
+                self._items.move_to_end(key)
+            return image
+
+    def put(self, key: Hashable, image: Image.Image):
+        size = self.image_bytes(image)
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self.used_bytes -= self.image_bytes(old)
+
+            # 單張就超過容量：不快取
+            if size > self.max_bytes:
+                return
+
+            self._items[key] = image
+            self.used_bytes += size
+            while self.used_bytes > self.max_bytes:
+                _, evicted = self._items.popitem(last=False)
+                self.used_bytes -= self.image_bytes(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self.used_bytes = 0
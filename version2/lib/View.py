@@ -1,7 +1,9 @@
-from sklearn.cluster import DBSCAN
 from collections import defaultdict
+import math
 
 from lib.data.models import FoundResult, ZoomScreen
+from .utils import cluster_points, ClusterTree, route_order
+from .ScreenPlanner import ScreenPlanner
 from .debug import Debug
 
 class ViewResult:
@@ -9,6 +11,7 @@ class ViewResult:
         self.result: FoundResult = None
         self.cur_idx = 0
         self.screens = []
+        self.trees: dict[tuple[str, int], ClusterTree] = {}
     
     def check_bounds(self, direction: str) -> bool:
         """索引邊界"""
@@ -39,15 +42,117 @@ class ViewResult:
     def set_result(self,result:FoundResult):
         self.result = result
         self.side_group = self.result.get_by_side()
+        # 依 (side, page) 分組，正面在前、頁碼由小到大
+        self.page_group = dict(sorted(
+            self.result.get_by_page().items(),
+            key=lambda item: (item[0][0] != "front", item[0][1])
+        ))
+        # 分群階層每次搜尋只建一次，之後改 zoom / 視窗大小都直接切
+        self.trees = {}
         if self.result.total > 0:
             self.cur_idx = 0
             
     
+    def cluster_tree(self, side: str, page: int) -> ClusterTree:
+        """(side, page) 的 single-linkage 階層，第一次用到時建立"""
+        key = (side, page)
+        if key not in self.trees:
+            self.trees[key] = ClusterTree([box.center for box in self.page_group[key]])
+        return self.trees[key]
+
+    def cluster_labels(self, side: str, page: int, points: list, eps: float, backend: str = "tree") -> list:
+        """
+        每個點的群組編號（距離 <= eps 相連，等同 DBSCAN min_samples=1）
+        * "tree"：切開快取的 single-linkage 階層，換 eps 不用重算
+        * "grid"：網格 + 併查集，不需額外套件
+        * "sklearn"：sklearn DBSCAN（需安裝 scikit-learn）
+        """
+        if backend == "tree":
+            return self.cluster_tree(side, page).cut(eps)
+        if backend == "grid":
+            return cluster_points(points, eps)
+        if backend == "sklearn":
+            from sklearn.cluster import DBSCAN
+            return list(DBSCAN(eps=eps, min_samples=1).fit(points).labels_)
+        raise ValueError(f"無效的 backend 參數: {backend}")
+
+    @Debug.event("plan screens", color="blue")
+    def plan_screens(self, output_size=(640, 480), zoom=5) -> list[ZoomScreen]:
+        """
+        以固定大小的視窗（output_size / zoom，顯示時不需縮放）蓋住每個 (side, page) 的所有元件，
+        視窗數盡量少（貪婪 set cover）；每個元件只屬於一個視窗
+
+        同一個視窗內的元件中心距離不會超過視窗對角線，所以先在對角線切開快取的
+        single-linkage 階層，各群組分開規劃（結果與整頁一起規劃相同）；
+        改 zoom / 輸出大小時重新呼叫即可，不用重建階層
+        """
+        if self.result.total == 0:
+            print("❌ 搜尋結果為 0，跳過分群")
+            return []
+
+        planner = ScreenPlanner(output_size[0] / zoom, output_size[1] / zoom)
+        result_screens = []
+
+        for (side, page), box_list in self.page_group.items():
+            if not box_list:
+                continue
+            rects = [(b.x0, b.y0, b.x1, b.y1) for b in box_list]
+            for group in self.plan_groups(side, page, rects, planner):
+                x0, y0, x1, y1 = planner.fit([rects[i] for i in group])
+                result_screens.append(ZoomScreen(
+                    side=side,
+                    x0=x0,
+                    y0=y0,
+                    x1=x1,
+                    y1=y1,
+                    zoom=zoom,
+                    labels=[box_list[i] for i in group],
+                    page=page
+                ))
+            print(f"🔍 {side} p{page}：{len(box_list)} 個元件 → {len(result_screens)} 個視窗（累計）")
+
+        self.screens = result_screens
+        return result_screens
+
+    def plan_groups(self, side: str, page: int, rects: list, planner: ScreenPlanner) -> list[list[int]]:
+        """(side, page) 每個視窗負責的元件 index：依視窗對角線切開階層後，各群組各自做 set cover"""
+        components = defaultdict(list)
+        eps = math.hypot(planner.width, planner.height)
+        for i, label in enumerate(self.cluster_tree(side, page).cut(eps)):
+            components[label].append(i)
+
+        groups = []
+        for members in components.values():
+            for group in planner.plan([rects[i] for i in members]):
+                groups.append([members[i] for i in group])
+        return groups
+
+    @Debug.event("order screens", color="blue")
+    def order_screens(self) -> list[ZoomScreen]:
+        """
+        依走訪路徑排序 self.screens：(side, page) 順序不變（正面在前），
+        同一頁內依視窗中心的最近鄰 + 2-opt 短路徑排序，切換下一個時 zoom / minimap 不會來回跳
+        """
+        groups = defaultdict(list)
+        for screen in self.screens:
+            groups[(screen.side, screen.page)].append(screen)
+
+        ordered = []
+        for key in sorted(groups, key=lambda k: (k[0] != "front", k[1])):
+            screens = groups[key]
+            centers = [((s.x0 + s.x1) / 2, (s.y0 + s.y1) / 2) for s in screens]
+            ordered.extend(screens[i] for i in route_order(centers))
+
+        self.screens = ordered
+        self.cur_idx = 0
+        return ordered
+
     @Debug.event("DBSCAN", color="blue")
-    def group_DBSCAN(self, zoom_width=400, zoom_height=300, zoom=5) -> list[ZoomScreen]:
+    def group_DBSCAN(self, zoom_width=400, zoom_height=300, zoom=5, backend="tree") -> list[ZoomScreen]:
         """
-        對 self.side_group 中的 BoxInfo 做 DBSCAN 分群，並依分群結果產生 ZoomScreen 區塊。
+        對 self.page_group 中每個 (side, page) 的 BoxInfo 做 DBSCAN 分群，並依分群結果產生 ZoomScreen 區塊。
         如果沒有任何搜尋結果，或個別面為空，會直接跳過或回傳空陣列。
+        backend 見 cluster_labels，預設切開快取的階層，改 zoom / 視窗大小時可直接重新呼叫
         """
         # 防呆：如果總體沒結果，直接返回
         if self.result.total == 0:
@@ -57,17 +162,17 @@ class ViewResult:
         eps = min(zoom_width, zoom_height) / zoom / 2  # 聚落半徑
         result_screens = []
         
-        for side, box_list in self.side_group.items():
+        for (side, page), box_list in self.page_group.items():
             if not box_list:
-                print(f"⚠️ {side} 沒有任何 box，略過")
+                print(f"⚠️ {side} p{page} 沒有任何 box，略過")
                 continue
 
-            print(f"🔍 處理 {side}，共 {len(box_list)} 個元件")
+            print(f"🔍 處理 {side} p{page}，共 {len(box_list)} 個元件")
             points = [box.center for box in box_list]
-            clustering = DBSCAN(eps=eps, min_samples=1).fit(points)
+            labels = self.cluster_labels(side, page, points, eps, backend)
 
             clusters = defaultdict(list)
-            for label, box in zip(clustering.labels_, box_list):
+            for label, box in zip(labels, box_list):
                 clusters[label].append(box)
 
             print(clusters)
@@ -103,7 +208,8 @@ class ViewResult:
                     x1=int(x1),
                     y1=int(y1),
                     zoom=zoom,
-                    labels=cluster_boxes 
+                    labels=cluster_boxes,
+                    page=page
                 ))
                 
         self.screens = result_screens
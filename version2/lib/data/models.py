@@ -84,11 +84,12 @@ class BoxInfo:
     block_no: int
     side: str  # 'front' or 'back'
     matched_keywords: List[str] = field(default_factory=list)
+    page: int = 0  # 頁碼（從 0 開始）
 
     def __str__(self):
         keywords = ', '.join(self.matched_keywords)
         return (
-            f"[{self.side}] block {self.block_no}: "
+            f"[{self.side} p{self.page}] block {self.block_no}: "
             f"({self.x0},{self.y0})-({self.x1},{self.y1}) "
             f"text: {self.text.strip()} "
             f"{'(matched: ' + keywords + ')' if keywords else ''}"
@@ -107,7 +108,8 @@ class BoxInfo:
             text=self.text,
             block_no=self.block_no,
             side=self.side,
-            matched_keywords=self.matched_keywords.copy()
+            matched_keywords=self.matched_keywords.copy(),
+            page=self.page
         )
 
 @dataclass
@@ -140,6 +142,18 @@ class FoundResult:
 
         print(result)
         return result
+
+    def get_by_page(self) -> Dict[Tuple[str, int], List[BoxInfo]]:
+        """
+        根據 (side, page) 將 box 分類並回傳字典。
+        
+        Returns:
+            Dict[Tuple[str, int], List[BoxInfo]]: 例如 {("front", 0): [...], ("back", 1): [...]}
+        """
+        result: Dict[Tuple[str, int], List[BoxInfo]] = {}
+        for b in self.box:
+            result.setdefault((b.side, b.page), []).append(b)
+        return result
     
     
 @dataclass
@@ -149,6 +163,7 @@ class ZoomArea:
     y0: int
     x1: int
     y1: int
+    page: int = 0
     
 @dataclass
 class ZoomScreen:
@@ -160,6 +175,7 @@ class ZoomScreen:
     y1: int
     zoom: int
     labels: List = field(default_factory=list)
+    page: int = 0
     
     @property
     def display(self) -> ZoomArea:
@@ -169,10 +185,11 @@ class ZoomScreen:
             y0=int(self.y0 * self.zoom),
             x1=int(self.x1 * self.zoom),
             y1=int(self.y1 * self.zoom),
+            page=self.page,
         )
     
     def __str__(self):
-        info = f"[{self.side}] Zoom: ({self.x0},{self.y0}) - ({self.x1},{self.y1})"
+        info = f"[{self.side} p{self.page}] Zoom: ({self.x0},{self.y0}) - ({self.x1},{self.y1})"
         if self.labels:
             label_infos = []
             for i, label in enumerate(self.labels, 1):
@@ -207,5 +224,6 @@ class ZoomScreen:
             x1=output_size[0],
             y1=output_size[1],
             zoom=1,
-            labels=new_labels
+            labels=new_labels,
+            page=self.page
         )
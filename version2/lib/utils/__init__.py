@@ -1 +1,2 @@
-from .decorators import *
\ No newline at end of file
+from .decorators import *
+from .spatial import *
\ No newline at end of file
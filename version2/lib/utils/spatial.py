@@ -0,0 +1,213 @@
+from bisect import bisect_right
+from collections import defaultdict
+import math
+
+import numpy as np
+
+__all__ = ["UnionFind", "GridIndex", "cluster_points", "ClusterTree", "route_order"]
+
+
+class UnionFind:
+    """併查集（path halving + union by size）"""
+
+    def __init__(self, n: int):
+        self.parent = list(range(n))
+        self.size = [1] * n
+
+    def find(self, i: int) -> int:
+        parent = self.parent
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    def union(self, a: int, b: int) -> bool:
+        ra, rb = self.find(a), self.find(b)
+        if ra == rb:
+            return False
+        if self.size[ra] < self.size[rb]:
+            ra, rb = rb, ra
+        self.parent[rb] = ra
+        self.size[ra] += self.size[rb]
+        return True
+
+    def labels(self) -> list[int]:
+        """每個元素的群組編號，依群組第一次出現的順序由 0 開始編"""
+        mapping = {}
+        result = []
+        for i in range(len(self.parent)):
+            root = self.find(i)
+            if root not in mapping:
+                mapping[root] = len(mapping)
+            result.append(mapping[root])
+        return result
+
+
+class GridIndex:
+    """均勻網格空間索引：矩形依涵蓋的格子登記，查詢只看鄰近格子"""
+
+    def __init__(self, cell_size: float):
+        self.cell_size = max(float(cell_size), 1e-9)
+        self.cells: dict[tuple[int, int], list] = defaultdict(list)
+        self.rects: dict = {}
+
+    def _cell_range(self, rect) -> tuple[range, range]:
+        size = self.cell_size
+        x0, y0, x1, y1 = rect
+        return (
+            range(math.floor(x0 / size), math.floor(x1 / size) + 1),
+            range(math.floor(y0 / size), math.floor(y1 / size) + 1),
+        )
+
+    def insert(self, key, rect):
+        self.rects[key] = rect
+        xs, ys = self._cell_range(rect)
+        for cx in xs:
+            for cy in ys:
+                self.cells[(cx, cy)].append(key)
+
+    def candidates(self, rect) -> set:
+        """與 rect 落在相同格子的 key（可能有誤報，需再精確比對）"""
+        found = set()
+        xs, ys = self._cell_range(rect)
+        for cx in xs:
+            for cy in ys:
+                found.update(self.cells.get((cx, cy), ()))
+        return found
+
+    def query(self, rect) -> list:
+        """與 rect 有交集（含邊界相接）的 key"""
+        x0, y0, x1, y1 = rect
+        result = []
+        for key in self.candidates(rect):
+            ox0, oy0, ox1, oy1 = self.rects[key]
+            if ox0 <= x1 and x0 <= ox1 and oy0 <= y1 and y0 <= oy1:
+                result.append(key)
+        return result
+
+
+def cluster_points(points: list, eps: float) -> list[int]:
+    """
+    歐氏距離 <= eps 的點連在一起的群組（single-linkage），等同 DBSCAN(eps, min_samples=1)
+    點放進邊長 eps 的網格，只比對相鄰 3x3 格，線性時間；
+    回傳每個點的群組編號（依第一次出現的順序）
+    """
+    n = len(points)
+    uf = UnionFind(n)
+    if n == 0:
+        return []
+    if eps <= 0:
+        # 只有完全重疊的點會同群
+        first = {}
+        for i, p in enumerate(points):
+            uf.union(first.setdefault(tuple(p), i), i)
+        return uf.labels()
+
+    # 格子略大於 eps：除法的捨入誤差不會讓距離 eps 的兩點隔開兩格
+    cell = eps * (1 + 1e-9)
+    cells: dict[tuple[int, int], list[int]] = defaultdict(list)
+    for i, (x, y) in enumerate(points):
+        cx, cy = math.floor(x / cell), math.floor(y / cell)
+        for ox_cell in (-1, 0, 1):
+            for oy_cell in (-1, 0, 1):
+                for j in cells.get((cx + ox_cell, cy + oy_cell), ()):
+                    ox, oy = points[j]
+                    # 比較實際距離 <= eps（與 sklearn 相同），不是距離平方 <= eps 平方；
+                    # 算法與 ClusterTree 完全相同，邊界上兩者結果一致
+                    dx, dy = x - ox, y - oy
+                    if math.sqrt(dx * dx + dy * dy) <= eps:
+                        uf.union(i, j)
+        cells[(cx, cy)].append(i)
+    return uf.labels()
+
+
+class ClusterTree:
+    """
+    single-linkage 階層（最小生成樹）
+    建一次 O(n^2)（向量化 Prim），之後任意 eps 的分群只要把權重 <= eps 的邊併起來，O(n)；
+    cut(eps) 與 cluster_points(points, eps) 結果相同
+    """
+
+    def __init__(self, points: list):
+        self.n = len(points)
+        edges = self._prim(np.asarray(points, dtype=float).reshape(-1, 2))
+        # 依邊長排序（同長依加入順序），cut 時只取前綴
+        edges.sort(key=lambda e: e[0])
+        self.weights = [w for w, _, _ in edges]
+        self.edges = [(a, b) for _, a, b in edges]
+
+    @staticmethod
+    def _prim(points: np.ndarray) -> list[tuple[float, int, int]]:
+        """最小生成樹的邊 (距離, a, b)"""
+        n = len(points)
+        if n < 2:
+            return []
+        xs, ys = points[:, 0], points[:, 1]
+        in_tree = np.zeros(n, dtype=bool)
+        best = np.full(n, np.inf)
+        parent = np.zeros(n, dtype=np.intp)
+
+        edges = []
+        cur = 0
+        for _ in range(n - 1):
+            in_tree[cur] = True
+            dx = xs - xs[cur]
+            dy = ys - ys[cur]
+            dist = np.sqrt(dx * dx + dy * dy)
+            closer = dist < best
+            best[closer] = dist[closer]
+            parent[closer] = cur
+            best[in_tree] = np.inf
+
+            cur = int(np.argmin(best))
+            edges.append((float(best[cur]), int(parent[cur]), cur))
+        return edges
+
+    def cut(self, eps: float) -> list[int]:
+        """在 eps 切開，回傳每個點的群組編號（依第一次出現的順序）"""
+        uf = UnionFind(self.n)
+        for a, b in self.edges[:bisect_right(self.weights, max(eps, 0.0))]:
+            uf.union(a, b)
+        return uf.labels()
+
+
+def route_order(points: list, max_passes: int = 50) -> list[int]:
+    """
+    走訪所有點的短路徑（不回到起點）：從最靠左上的點出發，最近鄰建立初始路徑，再用 2-opt 反轉區段改善
+    回傳點的 index 順序；距離矩陣與每輪 2-opt 的候選都用 NumPy 一次算完，數百個點仍很快
+    """
+    n = len(points)
+    if n <= 2:
+        return sorted(range(n), key=lambda i: (points[i][0] + points[i][1], i))
+    pts = np.asarray(points, dtype=float).reshape(-1, 2)
+    dist = np.sqrt(((pts[:, None, :] - pts[None, :, :]) ** 2).sum(axis=2))
+
+    # 最近鄰
+    start = int(np.argmin(pts.sum(axis=1)))
+    visited = np.zeros(n, dtype=bool)
+    route = [start]
+    visited[start] = True
+    for _ in range(n - 1):
+        row = np.where(visited, np.inf, dist[route[-1]])
+        nxt = int(np.argmin(row))
+        route.append(nxt)
+        visited[nxt] = True
+    route = np.array(route)
+
+    # 2-opt：反轉 route[i+1..j]，起點固定；j 為最後一點時只有一條邊改變
+    for _ in range(max_passes):
+        improved = False
+        for i in range(n - 2):
+            a, b = route[i], route[i + 1]
+            js = np.arange(i + 2, n)
+            c = route[js]
+            d = route[np.minimum(js + 1, n - 1)]
+            delta = dist[a, c] - dist[a, b] + np.where(js < n - 1, dist[b, d] - dist[c, d], 0.0)
+            k = int(np.argmin(delta))
+            if delta[k] < -1e-9:
+                j = js[k]
+                route[i + 1:j + 1] = route[i + 1:j + 1][::-1].copy()
+                improved = True
+        if not improved:
+            break
+    return route.tolist()
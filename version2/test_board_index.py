@@ -0,0 +1,148 @@
+import os
+import sqlite3
+
+import pytest
+
+from lib.BoardIndex import BoardIndex
+from lib.FilePicker import FilePicker
+
+
+def designator_texts(*designators):
+    return [(40, 60 + i * 30, text) for i, text in enumerate(designators)]
+
+
+@pytest.fixture
+def index(tmp_path):
+    try:
+        return BoardIndex(str(tmp_path / "index" / "board_index.sqlite3"))
+    except sqlite3.OperationalError:
+        pytest.skip("sqlite 沒有 FTS5")
+
+
+@pytest.fixture
+def folder(tmp_path, make_pdf):
+    """T / B 兩面 + 一個不相干的板子"""
+    folder = tmp_path / "boards"
+    folder.mkdir()
+    make_pdf(folder / "PR810_T.pdf", pages=2, texts=lambda p: designator_texts(("C924", "C921")[p], "JP1-2"))
+    make_pdf(folder / "PR810_B.pdf", texts=designator_texts("R5, C924"))
+    make_pdf(folder / "OTHER.pdf", texts=designator_texts("U10"))
+    return folder
+
+
+def paths(folder):
+    return sorted(str(path) for path in folder.glob("*.pdf"))
+
+
+def test_store_and_load_round_trip(index, folder):
+    path = str(folder / "PR810_T.pdf")
+    assert index.load(path) is None
+    assert not index.is_fresh(path)
+
+    assert index.update_file(path)
+    assert index.is_fresh(path)
+    assert index.load(path) == BoardIndex.extract(path)
+    # 沒有變動就不重建
+    assert not index.update_file(path)
+
+
+def test_content_change_is_reindexed(index, folder, make_pdf):
+    path = str(folder / "OTHER.pdf")
+    index.update_file(path)
+    stat = os.stat(path)
+
+    make_pdf(path, texts=designator_texts("U11", "Q7"))
+    # 同一秒內改寫時 mtime 可能相同，確保不會誤判成沒變
+    os.utime(path, (stat.st_atime, stat.st_mtime + 10))
+    assert not index.is_fresh(path)
+    assert index.load(path) is None
+
+    assert index.update_file(path)
+    assert index.load(path) == BoardIndex.extract(path)
+    assert index.find_boards("Q7") == [path]
+    assert index.find_boards("U10") == []
+
+
+def test_touch_keeps_index_via_hash(index, folder, monkeypatch):
+    path = str(folder / "PR810_B.pdf")
+    index.update_file(path)
+    expected = index.load(path)
+    stat = os.stat(path)
+    os.utime(path, (stat.st_atime, stat.st_mtime + 100))
+
+    hashed = []
+    original = BoardIndex.file_hash
+    monkeypatch.setattr(BoardIndex, "file_hash", staticmethod(lambda p: (hashed.append(p), original(p))[1]))
+
+    # mtime 變了、內容沒變：比對 hash 後只更新 mtime
+    assert index.is_fresh(path)
+    assert hashed == [path]
+    assert not index.update_file(path)
+    assert hashed == [path]
+    assert index.load(path) == expected
+
+
+def test_update_prunes_folder_by_prefix(index, folder, tmp_path, make_pdf):
+    # 名稱以 boards 開頭的另一個資料夾不受影響
+    sibling = tmp_path / "boards2"
+    sibling.mkdir()
+    other = make_pdf(sibling / "X.pdf", texts=designator_texts("C924"))
+    index.update([other])
+
+    assert index.update(paths(folder), prune_folder=str(folder)) == 3
+    os.remove(folder / "PR810_B.pdf")
+    assert index.update(paths(folder), prune_folder=str(folder)) == 0
+
+    assert sorted(index.find_boards("C924")) == sorted([str(folder / "PR810_T.pdf"), other])
+    assert index.load(str(folder / "PR810_B.pdf")) is None
+
+
+def test_update_skips_broken_file(index, folder):
+    broken = folder / "broken.pdf"
+    broken.write_bytes(b"not a pdf")
+    assert index.update(paths(folder)) == 3
+    assert index.load(str(broken)) is None
+
+
+def test_find_boards(index, folder):
+    index.update(paths(folder))
+    top, bottom = str(folder / "PR810_T.pdf"), str(folder / "PR810_B.pdf")
+
+    assert sorted(index.find_boards("C924")) == sorted([top, bottom])
+    assert index.find_boards("c921") == [top]
+    # 以 token 比對：C92 不會命中 C924
+    assert index.find_boards("C92") == []
+    assert index.find_boards("U99") == []
+    assert index.find_boards("  ") == []
+    # 以片語查詢：含 - 的 designator、FTS5 關鍵字、引號都不會變成查詢語法
+    assert index.find_boards("JP1-2") == [top]
+    assert index.find_boards("AND") == []
+    assert index.find_boards("C924 OR") == []
+    assert index.find_boards('C"924') == []
+    assert index.find_boards("-") == []
+
+
+def test_find_boards_query_error_returns_empty(index, folder):
+    index.update(paths(folder))
+    # 查詢失敗（例如 FTS 表損毀）時當作沒有命中
+    conn = sqlite3.connect(index.path)
+    conn.execute("DROP TABLE page_text")
+    conn.close()
+    assert index.find_boards("C924") == []
+
+
+def test_file_picker_search_by_name_and_designator(index, folder):
+    picker = FilePicker(str(folder))
+    index.update([f.path for f in picker.files])
+
+    def names(files):
+        return [f.name for f in files]
+
+    assert names(picker.search("other")) == ["OTHER.pdf"]
+    assert names(picker.search("C924")) == []
+    assert names(picker.search_designator("C924", index)) == ["PR810_T.pdf", "PR810_B.pdf"]
+    # 檔名與 designator 的聯集，依原本的檔案順序
+    assert names(picker.search("U10", index)) == ["OTHER.pdf"]
+    assert names(picker.search("PR810", index)) == ["PR810_T.pdf", "PR810_B.pdf"]
+    assert names(picker.search("R5", index)) == ["PR810_B.pdf"]
+    assert names(picker.search("B", index)) == ["PR810_B.pdf"]
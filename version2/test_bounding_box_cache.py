@@ -0,0 +1,95 @@
+import json
+
+import fitz
+
+from lib.BoundingBoxCache import BoundingBoxCache
+from lib.data import BoundingBox
+from lib.SinglePDF import SinglePDF
+
+
+def board_texts(p):
+    return [(40, 60, f"C{p} R{p}")]
+
+
+def test_set_is_written_only_on_flush(tmp_path):
+    path = tmp_path / "cache.json"
+    cache = BoundingBoxCache(str(path))
+    cache.set("a", {"method": "raster"}, BoundingBox(1, 2, 3, 4))
+    assert not path.exists()
+
+    cache.flush()
+    assert json.loads(path.read_text("utf-8"))["a"]["bbox"] == [1, 2, 3, 4]
+    assert BoundingBoxCache(str(path)).get("a", {"method": "raster"}) == BoundingBox(1, 2, 3, 4)
+    assert BoundingBoxCache(str(path)).get("a", {"method": "vector"}) is None
+
+
+def test_evicts_least_recently_used(tmp_path):
+    path = tmp_path / "cache.json"
+    cache = BoundingBoxCache(str(path), max_entries=3)
+    for key in "abc":
+        cache.set(key, {}, BoundingBox(0, 0, 1, 1))
+    assert cache.get("a", {}) is not None  # a 變成最近使用
+    cache.set("d", {}, BoundingBox(0, 0, 1, 1))
+    cache.flush()
+
+    assert list(BoundingBoxCache(str(path)).entries) == ["c", "a", "d"]
+
+
+def test_page_hash_includes_fonts(tmp_path, make_pdf):
+    helv = fitz.open(make_pdf(tmp_path / "helv.pdf", texts=board_texts))
+    courier = fitz.open(make_pdf(tmp_path / "courier.pdf", texts=board_texts, base_font="/Courier"))
+    same = fitz.open(make_pdf(tmp_path / "same.pdf", texts=board_texts))
+
+    assert helv[0].read_contents() == courier[0].read_contents()
+    assert BoundingBoxCache.page_hash(helv[0]) != BoundingBoxCache.page_hash(courier[0])
+    assert BoundingBoxCache.page_hash(helv[0]) == BoundingBoxCache.page_hash(same[0])
+
+
+def test_board_is_saved_once(tmp_path, monkeypatch, make_pdf):
+    cache = BoundingBoxCache(str(tmp_path / "cache.json"))
+    saves = []
+    original = cache._save
+    monkeypatch.setattr(cache, "_save", lambda: (saves.append(1), original()))
+    pdf = SinglePDF(make_pdf(tmp_path / "board.pdf", pages=3, texts=board_texts))
+    monkeypatch.setattr(pdf, "get_board_bounding_box", lambda idx, **params: BoundingBox(idx, 0, 10, 10))
+
+    # executor 為 None 且只有一頁未命中時在本行程計算，其餘頁面先放進快取
+    for idx in (1, 2):
+        cache.set(cache.lookup(pdf, idx, {})[0], {}, BoundingBox(idx, 0, 10, 10))
+    assert pdf.get_bounding_boxes(cache=cache)[0] == BoundingBox(0, 0, 10, 10)
+    assert len(saves) == 1
+
+    # 全部命中時沒有東西要寫
+    assert SinglePDF(pdf.path).get_bounding_boxes(cache=cache)[0] == BoundingBox(0, 0, 10, 10)
+    assert len(saves) == 1
+
+
+def test_hits_are_reported_once_per_board(tmp_path, make_pdf, capsys):
+    cache = BoundingBoxCache(str(tmp_path / "cache.json"))
+    pdf = SinglePDF(make_pdf(tmp_path / "board.pdf", pages=3, texts=board_texts))
+    for idx in (0, 2):
+        cache.set(cache.lookup(pdf, idx, {})[0], {}, BoundingBox(idx, 0, 10, 10))
+    capsys.readouterr()
+
+    assert list(pdf.lookup_bounding_boxes(cache=cache)) == [1]
+    lines = [line for line in capsys.readouterr().out.splitlines() if "快取命中" in line]
+    assert lines == ["邊界框快取命中 2/3 頁：board.pdf"]
+
+
+def test_lookup_after_store_has_nothing_pending(tmp_path, make_pdf):
+    cache = BoundingBoxCache(str(tmp_path / "cache.json"))
+    pdf = SinglePDF(make_pdf(tmp_path / "board.pdf", pages=3, texts=board_texts))
+    params = {"method": "raster"}
+
+    pending = pdf.lookup_bounding_boxes(cache=cache, **params)
+    assert list(pending) == [0, 1, 2]
+    for idx, key in pending.items():
+        pdf.store_bounding_box(idx, BoundingBox(idx, 0, 10, 10), key, cache, **params)
+
+    assert pdf.lookup_bounding_boxes(cache=cache, **params) == {}
+    # 另開一份同內容的 PDF 也直接命中，邊界框寫回 bounding_boxes
+    again = SinglePDF(pdf.path)
+    assert again.lookup_bounding_boxes(cache=cache, **params) == {}
+    assert again.bounding_boxes == {idx: BoundingBox(idx, 0, 10, 10) for idx in range(3)}
+    # 參數不同視為 miss
+    assert list(again.lookup_bounding_boxes(cache=cache, method="vector")) == [0, 1, 2]
@@ -0,0 +1,109 @@
+import numpy as np
+import pytest
+
+from lib.data import BoundingBox
+from lib.DensityEngine import DensityEngine
+from lib.SinglePDF import SinglePDF
+
+
+def random_heatmap(rng, height=240, width=320):
+    """幾個實心矩形的熱度圖（0 / 255），接近文字區塊膨脹後的樣子"""
+    heatmap = np.zeros((height, width), dtype=np.uint8)
+    for _ in range(rng.integers(0, 30)):
+        x, y = rng.integers(0, width), rng.integers(0, height)
+        heatmap[y:y + rng.integers(1, 40), x:x + rng.integers(1, 60)] = 255
+    return heatmap
+
+
+def test_scores_match_numpy_sum():
+    rng = np.random.default_rng(0)
+    heatmap = random_heatmap(rng)
+    engine = DensityEngine(heatmap)
+    # 含超出範圍、反向、空的視窗
+    boxes = np.array([
+        [0, 0, 320, 240],
+        [-10, -10, 50, 50],
+        [300, 200, 400, 300],
+        [50, 50, 40, 60],
+        [10, 10, 10, 10],
+        *rng.integers(-20, 340, size=(200, 4)),
+    ], dtype=np.int64)
+
+    expected = [
+        np.sum(heatmap[max(y0, 0):max(y1, 0), max(x0, 0):max(x1, 0)] == 255)
+        for x0, y0, x1, y1 in boxes
+    ]
+    assert engine.scores(boxes).tolist() == expected
+
+
+def test_grid_follows_loop_order_and_clipping():
+    boxes = DensityEngine.grid(range(-20, 60, 20), range(-20, 40, 20), 30, 50, 30)
+    expected = []
+    for y in range(-20, 40, 20):
+        for x in range(-20, 60, 20):
+            x0, y0, x1, y1 = max(x, 0), max(y, 0), min(x + 30, 50), min(y + 30, 30)
+            if x1 > x0 and y1 > y0:
+                expected.append([x0, y0, x1, y1])
+    assert boxes.tolist() == expected
+
+
+@pytest.mark.parametrize("seed", range(20))
+@pytest.mark.parametrize("min_score", [1, 5])
+def test_integral_seeds_match_loop_backend(seed, min_score):
+    # 同分時兩者都要保留掃描順序，所以整個 seed 列表（含順序）要一樣
+    rng = np.random.default_rng(seed)
+    heatmap = random_heatmap(rng)
+    sobel_bbox = BoundingBox(*map(int, rng.integers(0, 100, 2)), *map(int, rng.integers(150, 320, 2)))
+    args = (heatmap, sobel_bbox, 50, 25, 10, min_score)
+    assert SinglePDF._small_window_seeds(*args, "integral") == SinglePDF._small_window_seeds(*args, "loop")
+
+
+def test_unknown_backend_raises():
+    with pytest.raises(ValueError):
+        SinglePDF._small_window_seeds(np.zeros((10, 10), np.uint8), BoundingBox(0, 0, 10, 10), 5, 5, 3, 1, "gpu")
+
+
+def loop_large_windows(top_small, xs, ys, large_win, width, height, rule, skip_empty=True):
+    """向量化以前的大視窗迴圈（v1/v5 用 anchor，v2 用 intersect；v5 不略過空視窗）"""
+    large_windows = []
+    for y in ys:
+        for x in xs:
+            lx0, ly0 = max(x, 0), max(y, 0)
+            lx1, ly1 = min(x + large_win, width), min(y + large_win, height)
+            if skip_empty and (lx1 <= lx0 or ly1 <= ly0):
+                continue
+            if rule == "anchor":
+                overlaps = [1 for _, sx0, sy0, sx1, sy1 in top_small
+                            if lx0 <= sx0 <= lx1 and ly0 <= sy0 <= ly1]
+            else:
+                overlaps = [1 for _, sx0, sy0, sx1, sy1 in top_small
+                            if min(sx1, lx1) - max(sx0, lx0) > 0 and min(sy1, ly1) - max(sy0, ly0) > 0]
+            if overlaps:
+                large_windows.append((len(overlaps), lx0, ly0, lx1, ly1))
+    return large_windows
+
+
+@pytest.mark.parametrize("seed", range(20))
+@pytest.mark.parametrize("rule, skip_empty", [("anchor", True), ("intersect", True), ("anchor", False)])
+def test_large_window_cover_matches_loop(seed, rule, skip_empty):
+    rng = np.random.default_rng(seed)
+    heatmap = random_heatmap(rng)
+    height, width = heatmap.shape
+    sobel_bbox = BoundingBox(*map(int, rng.integers(0, 100, 2)), *map(int, rng.integers(150, 320, 2)))
+    top_small = SinglePDF._small_window_seeds(heatmap, sobel_bbox, 50, 25, 10, 1)
+    xs = range(sobel_bbox.x0 - 200, sobel_bbox.x1 + 100, 100)
+    ys = range(sobel_bbox.y0 - 200, sobel_bbox.y1 + 100, 100)
+
+    expected = loop_large_windows(top_small, xs, ys, 200, width, height, rule, skip_empty)
+    assert SinglePDF._large_window_cover(top_small, xs, ys, 200, width, height, rule, skip_empty) == expected
+
+
+def test_overlap_counts_edge_cases():
+    windows = np.array([[0, 0, 10, 10]])
+    # 邊界相接：intersect 不算，anchor（左上角在框內含邊界）算
+    seeds = np.array([[10, 0, 20, 10], [5, 5, 6, 6], [-5, -5, 1, 1]])
+    assert DensityEngine.overlap_counts(windows, seeds, "intersect").tolist() == [2]
+    assert DensityEngine.overlap_counts(windows, seeds, "anchor").tolist() == [2]
+    assert DensityEngine.overlap_counts(windows, np.zeros((0, 4)), "anchor").tolist() == [0]
+    with pytest.raises(ValueError):
+        DensityEngine.overlap_counts(windows, seeds, "center")
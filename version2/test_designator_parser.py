@@ -0,0 +1,46 @@
+import pytest
+
+from lib.DesignatorParser import DesignatorParser
+
+
+@pytest.fixture
+def parser():
+    return DesignatorParser()
+
+
+def test_keeps_case(parser):
+    # PDF 索引與比對區分大小寫，所以關鍵字不能被轉成大寫
+    assert parser.parse(["c1, r2", "Cx5"]) == ["c1", "r2", "Cx5"]
+
+
+def test_splits_and_strips_parentheses(parser):
+    assert parser.parse(["JP1(1-2)、C5；R7 U3", "L1（NC）"]) == ["JP1", "C5", "R7", "U3", "L1"]
+
+
+def test_dedupes_in_first_seen_order(parser):
+    assert parser.parse(["C2, C1", "C2", None, "", "C1"]) == ["C2", "C1"]
+
+
+@pytest.mark.parametrize("token, expected", [
+    ("C101-C103", ["C101", "C102", "C103"]),
+    ("R5~R7", ["R5", "R6", "R7"]),
+    ("r5~r6", ["r5", "r6"]),
+    ("C101-103", ["C101", "C102", "C103"]),
+    ("C001-C003", ["C001", "C002", "C003"]),
+    # 不是範圍：接腳寫法、前綴不同、反向、單一位數簡寫
+    ("JP1-2", ["JP1-2"]),
+    ("C1-R3", ["C1-R3"]),
+    ("C5-C3", ["C5-C3"]),
+    ("C5-C5", ["C5-C5"]),
+])
+def test_expand(parser, token, expected):
+    assert parser.expand(token) == expected
+
+
+def test_range_spaces_are_joined(parser):
+    assert parser.parse(["C1 - C3"]) == ["C1", "C2", "C3"]
+
+
+def test_oversized_range_is_kept_verbatim(parser):
+    token = f"C1-C{DesignatorParser.MAX_RANGE + 1}"
+    assert parser.expand(token) == [token]
@@ -0,0 +1,80 @@
+import random
+
+import pytest
+from openpyxl import Workbook
+
+from lib.ExcelReader import ExcelReader
+
+
+def make_sheet(path, rng):
+    """隨機的「零件位置」表：部分列高 < 8 作為邊界，C~F 欄隨機填值"""
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "零件位置"
+    rows = rng.randint(0, 60)
+    for row in range(1, rows + 1):
+        if rng.random() < 0.15:
+            ws.row_dimensions[row].height = rng.choice([3, 5, 7.5])
+        elif rng.random() < 0.2:
+            ws.row_dimensions[row].height = rng.choice([8, 15])
+        for col in range(1, 8):
+            if rng.random() < 0.6:
+                ws.cell(row=row, column=col, value=rng.choice(["C1", "R5, R6", "U3(1-2)", "", 12, None]))
+    wb.save(path)
+    return str(path)
+
+
+def boundary_rows(ws):
+    rows = []
+    for row in range(1, ws.max_row + 1):
+        row_dim = ws.row_dimensions.get(row)
+        height = row_dim.height if row_dim and row_dim.height is not None else None
+        if height is not None and height < 8:
+            rows.append(row)
+    return rows
+
+
+def cell_table(ws):
+    """原本逐格讀取的 get_table"""
+    bounds = boundary_rows(ws)
+    table = []
+    for i in range(len(bounds) - 1):
+        for row in range(bounds[i] + 1, bounds[i + 1]):
+            table.append([ws.cell(row=row, column=col).value for col in range(3, 7)])
+    return table
+
+
+def cell_pieces(ws):
+    """原本逐格讀取的 get_pieces（每段去掉標題列，只取 C、D 欄）"""
+    bounds = boundary_rows(ws)
+    result = []
+    for i in range(len(bounds) - 1):
+        for row in range(bounds[i] + 2, bounds[i + 1]):
+            for col in (3, 4):
+                value = ws.cell(row=row, column=col).value
+                if value is not None:
+                    result.append(value)
+    return result
+
+
+@pytest.mark.parametrize("seed", range(30))
+def test_single_pass_matches_cell_reads(tmp_path, seed):
+    path = make_sheet(tmp_path / "board.xlsx", random.Random(seed))
+    reader = ExcelReader()
+    reader.import_excel(path)
+    # 參考答案用另一個 reader 算，逐格 cell() 建立的空儲存格不會影響受測的那一個
+    expected_pieces = cell_pieces(reader.worksheet)
+    expected_table = cell_table(reader.worksheet)
+
+    reader = ExcelReader()
+    reader.import_excel(path)
+    assert reader.get_table() == expected_table
+    assert reader.get_pieces() == expected_pieces
+
+
+def test_missing_sheet_raises(tmp_path):
+    wb = Workbook()
+    wb.active.title = "Sheet"
+    wb.save(tmp_path / "other.xlsx")
+    with pytest.raises(ValueError):
+        ExcelReader().import_excel(str(tmp_path / "other.xlsx"))
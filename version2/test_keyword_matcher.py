@@ -0,0 +1,45 @@
+import random
+import re
+
+import pytest
+
+from lib.KeywordMatcher import KeywordMatcher
+
+ALPHABET = "CRJPU12-+ _,.\n（"
+KEYWORD_POOL = ["C1", "C12", "C1-2", "R1", "R12", "J", "JP1-2", "TP+3", "+3", "1", "-", "U1 ", "C", "（C1"]
+
+
+def regex_for(keywords):
+    """原本的寫法"""
+    return re.compile(r"\b(" + "|".join(re.escape(k) for k in keywords) + r")\b")
+
+
+def random_case(rng):
+    keywords = rng.sample(KEYWORD_POOL, rng.randint(1, 6))
+    text = "".join(rng.choice(ALPHABET) for _ in range(rng.randint(0, 40)))
+    return keywords, text
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_matches_regex(seed):
+    rng = random.Random(seed)
+    for _ in range(1000):
+        keywords, text = random_case(rng)
+        pattern = regex_for(keywords)
+        matcher = KeywordMatcher(keywords)
+        assert matcher.findall(text) == pattern.findall(text), (keywords, text)
+        assert matcher.finditer(text) == [(m.start(), m.group(1)) for m in pattern.finditer(text)]
+        assert matcher.search(text) == (pattern.search(text) is not None)
+
+
+def test_earlier_keyword_wins_at_same_start():
+    # regex 交替依順序嘗試：C1 在前時 "C12" 裡的 C1 後面不是邊界，改由 C12 命中
+    assert KeywordMatcher(["C1", "C12"]).findall("C12 C1") == ["C12", "C1"]
+    assert KeywordMatcher(["C1-2", "C1"]).findall("C1-2") == ["C1-2"]
+    assert KeywordMatcher(["C1", "C1-2"]).findall("C1-2") == ["C1"]
+
+
+def test_whole_word_and_case_sensitive():
+    matcher = KeywordMatcher(["C1"])
+    assert matcher.findall("C10 AC1 C1_ c1") == []
+    assert matcher.findall("(C1),C1") == ["C1", "C1"]
@@ -0,0 +1,123 @@
+import copy
+import math
+import random
+
+import pytest
+
+from lib.LabelLayout import LabelLayout
+
+
+def is_conflict(r, others):
+    for other in others:
+        if not (r[2] <= other[0] or r[0] >= other[2] or r[3] <= other[1] or r[1] >= other[3]):
+            return True
+    return False
+
+
+def loop_smart(labels_info, component_boxes, canvas_size, spacing=2):
+    """原本 smart_label_layout 的逐點、逐框版本"""
+    placed = []
+
+    def rect(x, y, w, h):
+        return (x - w / 2, y - h / 2, x + w / 2, y + h / 2)
+
+    for label in labels_info:
+        cx, cy = label['orig_x'], label['orig_y']
+        w, h = label['w'], label['h']
+        best_score = float('inf')
+        best_pos = None
+        for r in range(0, 100, spacing):
+            for deg in range(0, 360, 15):
+                angle = math.radians(deg)
+                x = cx + r * math.cos(angle)
+                y = cy + r * math.sin(angle)
+                if not (0 <= x <= canvas_size[0] and 0 <= y <= canvas_size[1]):
+                    continue
+                candidate_box = rect(x, y, w, h)
+                if is_conflict(candidate_box, component_boxes + placed):
+                    continue
+                total_score = r + 0.5 * (abs(x - cx) + abs(y - cy))
+                if total_score < best_score:
+                    best_score = total_score
+                    best_pos = (x, y, candidate_box)
+            if best_pos:
+                break
+        if best_pos:
+            x, y, box = best_pos
+        else:
+            x, y = cx, cy
+            box = rect(cx, cy, w, h)
+        label['x'], label['y'] = x, y
+        placed.append(box)
+    return labels_info
+
+
+def loop_spread(labels_info, component_boxes, output_size, padding=4, spacing=2, max_radius=100):
+    """原本 force_label_spread 的逐點、逐框版本"""
+    placed = []
+
+    def rect(x, y, w, h):
+        return (x - w / 2 - padding, y - h / 2 - padding, x + w / 2 + padding, y + h / 2 + padding)
+
+    for label in labels_info:
+        cx, cy = label['orig_x'], label['orig_y']
+        w, h = label['w'], label['h']
+        placed_rect = None
+        for r in range(0, max_radius, spacing):
+            for angle_deg in range(0, 360, 30):
+                angle_rad = math.radians(angle_deg)
+                x = cx + r * math.cos(angle_rad)
+                y = cy + r * math.sin(angle_rad)
+                if not (0 < x < output_size[0] and 0 < y < output_size[1]):
+                    continue
+                box = rect(x, y, w, h)
+                if not is_conflict(box, component_boxes + placed):
+                    label['x'], label['y'] = x, y
+                    placed.append(box)
+                    placed_rect = box
+                    break
+            if placed_rect:
+                break
+        if not placed_rect:
+            label['x'], label['y'] = cx, cy
+            placed.append(rect(cx, cy, w, h))
+    return labels_info
+
+
+def random_layout(rng, canvas=(640, 480)):
+    """一群擠在一起的元件（可能貼邊），每個元件一個標籤"""
+    cx, cy = rng.uniform(-20, canvas[0] + 20), rng.uniform(-20, canvas[1] + 20)
+    spread = rng.choice([10, 40, 150])
+    components, labels = [], []
+    for _ in range(rng.randint(1, 40)):
+        x, y = cx + rng.gauss(0, spread), cy + rng.gauss(0, spread)
+        w, h = rng.uniform(5, 40), rng.uniform(5, 20)
+        components.append((x, y, x + w, y + h))
+        labels.append({'orig_x': x + w / 2, 'orig_y': y + h / 2, 'w': rng.uniform(15, 50), 'h': 12})
+    return components, labels
+
+
+def positions(labels):
+    return [(label['x'], label['y']) for label in labels]
+
+
+@pytest.mark.parametrize("seed", range(60))
+def test_smart_matches_pairwise_loop(seed):
+    components, labels = random_layout(random.Random(seed))
+    expected = loop_smart(copy.deepcopy(labels), components, (640, 480))
+    actual = LabelLayout(components).smart(copy.deepcopy(labels), (640, 480))
+    assert positions(actual) == positions(expected)
+
+
+@pytest.mark.parametrize("seed", range(60))
+def test_spread_matches_pairwise_loop(seed):
+    components, labels = random_layout(random.Random(seed))
+    expected = loop_spread(copy.deepcopy(labels), components, (640, 480))
+    actual = LabelLayout(components).spread(copy.deepcopy(labels), (640, 480))
+    assert positions(actual) == positions(expected)
+
+
+def test_touching_edges_do_not_conflict():
+    layout = LabelLayout([(0, 0, 10, 10)])
+    assert layout.is_free((10, 0, 20, 10))
+    assert not layout.is_free((9, 0, 20, 10))
@@ -0,0 +1,79 @@
+import random
+
+import cv2
+import fitz
+import numpy as np
+import pytest
+from PIL import Image, ImageDraw
+
+from lib.CV2ImageProcessor import CV2ImageProcessor, blend_in_place
+from lib.data import BoundingBox
+
+
+@pytest.fixture(scope="module")
+def pixmap():
+    doc = fitz.open()
+    page = doc.new_page(width=200, height=150)
+    page.draw_rect(fitz.Rect(20, 20, 180, 130), color=(0.2, 0.4, 0.8), fill=(0.9, 0.8, 0.1), width=2)
+    page.insert_text((30, 60), "C1 R5 U10", fontsize=12)
+    return page.get_pixmap()
+
+
+def pil_highlight(image, blocks, factor):
+    """原本的 draw_block_highlight：整頁 overlay + alpha_composite"""
+    h, w = image.shape[:2]
+    overlay = Image.new("RGBA", (w, h), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(overlay)
+    for x0, y0, x1, y1 in blocks:
+        draw.rectangle([int(x0 * factor), int(y0 * factor), int(x1 * factor), int(y1 * factor)], fill=(255, 255, 0, 128))
+    base = Image.fromarray(image).convert("RGB").convert("RGBA")
+    return np.array(Image.alpha_composite(base, overlay))
+
+
+def pil_board_mask(image, bbox, factor):
+    """原本的 draw_bounding_box：整頁半透明黑 + 挖洞"""
+    h, w = image.shape[:2]
+    overlay = Image.new("RGBA", (w, h), (0, 0, 0, 128))
+    ImageDraw.Draw(overlay).rectangle(
+        [int(bbox.x0 * factor), int(bbox.y0 * factor), int(bbox.x1 * factor), int(bbox.y1 * factor)],
+        fill=(0, 0, 0, 0),
+    )
+    return np.array(Image.alpha_composite(Image.fromarray(image).convert("RGBA"), overlay))
+
+
+def random_rect(rng):
+    x0, y0 = rng.uniform(-30, 210), rng.uniform(-30, 160)
+    return x0, y0, x0 + rng.uniform(0, 80), y0 + rng.uniform(0, 60)
+
+
+def test_blend_matches_alpha_composite():
+    rng = np.random.default_rng(0)
+    image = rng.integers(0, 256, size=(20, 30, 4), dtype=np.uint8)
+    image[..., 3] = 255
+    for color, alpha in [((255, 255, 0), 128), ((0, 0, 0), 128), ((10, 200, 30), 77)]:
+        overlay = Image.new("RGBA", (30, 20), (*color, alpha))
+        expected = np.array(Image.alpha_composite(Image.fromarray(image), overlay))
+        actual = image.copy()
+        blend_in_place(actual, (0, 0, 30, 20), color, alpha)
+        assert np.array_equal(actual, expected)
+
+
+@pytest.mark.parametrize("seed", range(10))
+@pytest.mark.parametrize("zoom", [1, 0.8])
+def test_highlight_and_mask_match_pil(pixmap, seed, zoom):
+    rng = random.Random(seed)
+    processor = CV2ImageProcessor(pixmap, [], zoom)
+    blocks = [random_rect(rng) for _ in range(rng.randint(0, 8))]
+    bbox = BoundingBox(*map(int, random_rect(rng)))
+
+    expected = pil_board_mask(pil_highlight(processor.image, blocks, zoom), bbox, zoom)
+    processor.draw_block_highlight(blocks)
+    processor.draw_bounding_box(bbox)
+    assert np.array_equal(processor.image, expected)
+
+
+def test_swap_to_bgr_matches_pil_conversion(pixmap):
+    processor = CV2ImageProcessor(pixmap, [], 1)
+    expected = cv2.cvtColor(np.array(Image.fromarray(processor.image).convert("RGB")), cv2.COLOR_RGB2BGR)
+    processor.swap_to_bgr()
+    assert np.array_equal(processor.image, expected)
@@ -0,0 +1,33 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import fitz
+
+from lib.SinglePDF import SinglePDF
+
+
+def board_texts(p):
+    return [(30 + (i % 5) * 70, 40 + (i // 5) * 50, f"C{p}{i}") for i in range(20)]
+
+
+def test_contexts_share_document_lock(tmp_path, make_pdf):
+    pdf = SinglePDF(make_pdf(tmp_path / "a.pdf", pages=2, texts=board_texts, fontsize=8))
+    assert pdf.get_context(0).lock is pdf.lock
+    assert pdf.get_context(1).lock is pdf.lock
+
+
+def test_concurrent_access_matches_serial(tmp_path, make_pdf):
+    path = make_pdf(tmp_path / "a.pdf", pages=2, texts=board_texts, fontsize=8)
+    expected = SinglePDF(path)
+    words = [expected.get_words(i) for i in range(2)]
+    clip = fitz.Rect(10, 10, 200, 150)
+    tile = expected.get_clip_pixmap(clip, 3, 1).samples
+
+    pdf = SinglePDF(path)
+
+    def job(n):
+        if n % 2:
+            return pdf.get_clip_pixmap(clip, 3, 1).samples == tile
+        return pdf.get_words(n % 4 // 2) == words[n % 4 // 2] and pdf.get_pixel_size(3, 0) == (1200, 900)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        assert all(pool.map(job, range(64)))
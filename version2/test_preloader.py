@@ -0,0 +1,201 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import pytest
+
+import lib.Preloader as preloader_module
+from lib.BoundingBoxCache import BoundingBoxCache
+from lib.data import BoundingBox
+from lib.PDFViewer import PDFViewer
+from lib.Preloader import Preloader
+from lib.SinglePDF import SinglePDF
+from lib.TaskScheduler import Task, TaskCancelled
+from view.ValidPage import ValidPage
+
+PARAMS = {"method": "raster"}
+
+
+def board_texts(p):
+    return [(40, 60, f"C{p} R{p}"), (40, 90, f"U{p}")]
+
+
+class FakeAnalysis:
+    """取代 analyse_page：回傳固定的邊界框；released 清除時卡住，用來控制取消的時間點"""
+
+    def __init__(self):
+        self.calls = []
+        self.started = threading.Event()
+        self.released = threading.Event()
+        self.released.set()
+
+    def __call__(self, path, idx, params):
+        self.calls.append(idx)
+        self.started.set()
+        self.released.wait(5)
+        return idx, 0, 100, 100
+
+
+@pytest.fixture
+def pool():
+    # 共用 process pool 的替身
+    executor = ThreadPoolExecutor(max_workers=1)
+    yield executor
+    executor.shutdown(wait=True, cancel_futures=True)
+
+
+@pytest.fixture
+def analysis(monkeypatch):
+    fake = FakeAnalysis()
+    monkeypatch.setattr(preloader_module, "analyse_page", fake)
+    yield fake
+    fake.released.set()
+
+
+@pytest.fixture
+def preloader(tmp_path, pool):
+    loader = Preloader(BoundingBoxCache(str(tmp_path / "cache.json")), PARAMS, lambda: pool)
+    yield loader
+    loader.shutdown()
+
+
+@pytest.fixture
+def board(tmp_path, make_pdf):
+    return make_pdf(tmp_path / "T.pdf", pages=3, texts=board_texts)
+
+
+def test_take_returns_prepared_pdf_and_text(preloader, analysis, board):
+    preloader.preload("front", board)
+    job = preloader.take("front", board)
+    pdf, pages = job.result(timeout=10)
+
+    assert isinstance(pdf, SinglePDF) and pdf.path == board and pdf.side == "front"
+    assert pdf.bounding_boxes == {idx: BoundingBox(idx, 0, 100, 100) for idx in range(3)}
+    assert (job.total_pages, job.done_pages) == (3, 3)
+    assert pages == PDFViewer.read_text(SinglePDF(board), None)
+    # 交接後不再由 Preloader 管理
+    assert "front" not in preloader.jobs
+    # 結果已寫入快取檔，下次不必重算
+    assert BoundingBoxCache(preloader.bbox_cache.path).get(
+        BoundingBoxCache.page_hash(pdf.get_page(0)), PARAMS) == BoundingBox(0, 0, 100, 100)
+
+
+def test_same_path_reuses_job(preloader, analysis, board):
+    job = preloader.preload("front", board)
+    assert preloader.preload("front", board) is job
+    assert preloader.take("front", board) is job
+    assert not job.cancelled
+    job.result(timeout=10)
+
+
+def test_different_path_restarts(preloader, analysis, board, tmp_path, make_pdf):
+    analysis.released.clear()
+    old = preloader.preload("front", board)
+    # 等舊工作確實在執行（還沒開始的工作取消後 result() 是 CancelledError）
+    assert analysis.started.wait(10)
+    other = make_pdf(tmp_path / "T2.pdf", texts=board_texts)
+    new = preloader.preload("front", other)
+
+    assert new is not old and old.cancelled and not new.cancelled
+    assert preloader.jobs == {"front": new}
+    analysis.released.set()
+    with pytest.raises(TaskCancelled):
+        old.result(timeout=10)
+    assert new.result(timeout=10)[0].path == other
+
+    # path 為空：只取消
+    preloader.discard("front")
+    assert preloader.jobs == {}
+
+
+def test_take_without_preload_starts_job(preloader, analysis, board):
+    job = preloader.take("back", board)
+    assert preloader.jobs == {}
+    pdf, _ = job.result(timeout=10)
+    assert pdf.side == "back" and analysis.calls
+
+
+def test_cancel_before_page_futures_are_registered(tmp_path, pool, analysis, board):
+    analysis.released.clear()
+    jobs = []
+
+    def get_executor():
+        # 查完快取、送出頁面之前剛好被取消
+        jobs[0].cancel()
+        return pool
+
+    loader = Preloader(BoundingBoxCache(str(tmp_path / "cache.json")), PARAMS, get_executor)
+    jobs.append(loader.preload("front", board))
+    job = jobs[0]
+    with pytest.raises(TaskCancelled):
+        job.result(timeout=10)
+    # 只有一個 worker：最多一頁已經開始，其他頁都被取消
+    assert len(job.page_futures) == 3
+    assert sum(future.cancelled() for future in job.page_futures) >= 2
+    analysis.released.set()
+    loader.shutdown()
+
+
+def test_cancel_after_page_futures_are_registered(preloader, analysis, board):
+    analysis.released.clear()
+    job = preloader.preload("front", board)
+    assert analysis.started.wait(10)
+    job.cancel()
+    analysis.released.set()
+
+    with pytest.raises(TaskCancelled):
+        job.result(timeout=10)
+    assert sum(future.cancelled() for future in job.page_futures) >= 1
+    assert job.done_pages < 3
+
+
+def test_invalid_path_fails(preloader, tmp_path):
+    job = preloader.take("front", str(tmp_path / "missing.pdf"))
+    with pytest.raises(ValueError):
+        job.result(timeout=10)
+    assert not Preloader.can_open(str(tmp_path / "missing.pdf"))
+
+
+class RecordingScheduler:
+    def __init__(self):
+        self.posts = []
+
+    def post(self, task, kind, payload):
+        self.posts.append((kind, payload))
+
+
+def valid_page(preloader):
+    """ValidPage.run_pdf_processing 只用到 preloader 與 controller，不需要建立 Tk 視窗"""
+    return SimpleNamespace(preloader=preloader, controller=SimpleNamespace(shared_data={}))
+
+
+def test_run_pdf_processing_uses_preloaded_jobs(preloader, analysis, board, tmp_path, make_pdf):
+    back = make_pdf(tmp_path / "B.pdf", texts=board_texts)
+    front_job = preloader.preload("front", board)
+    scheduler = RecordingScheduler()
+
+    viewer = ValidPage.run_pdf_processing(valid_page(preloader), Task(scheduler, "valid"), board, back)
+    assert viewer.front is front_job.result()[0]
+    assert viewer.back.path == back
+    assert scheduler.posts[-1] == ("progress", (100, None))
+    assert preloader.jobs == {}
+
+
+def test_run_pdf_processing_raises_failed_job(preloader, analysis, board, tmp_path):
+    missing = str(tmp_path / "missing.pdf")
+    preloader.preload("back", missing)
+    with pytest.raises(ValueError):
+        ValidPage.run_pdf_processing(valid_page(preloader), Task(RecordingScheduler(), "valid"), board, missing)
+
+
+def test_run_pdf_processing_cancel_stops_both_jobs(preloader, analysis, board, tmp_path, make_pdf):
+    analysis.released.clear()
+    back = make_pdf(tmp_path / "B.pdf", texts=board_texts)
+    jobs = [preloader.preload("front", board), preloader.preload("back", back)]
+    task = Task(RecordingScheduler(), "valid")
+    task.cancel()
+
+    with pytest.raises(TaskCancelled):
+        ValidPage.run_pdf_processing(valid_page(preloader), task, board, back)
+    assert all(job.cancelled for job in jobs)
+    analysis.released.set()
@@ -0,0 +1,93 @@
+import random
+
+import numpy as np
+import pytest
+
+from lib.data import FoundResult
+from lib.data.models import BoxInfo
+from lib.ScreenPlanner import ScreenPlanner
+from lib.View import ViewResult
+
+W, H = 128, 96
+
+
+def random_rects(rng, count, width=1200, height=800):
+    rects = []
+    for _ in range(count):
+        x, y = rng.randint(0, width), rng.randint(0, height)
+        w, h = rng.randint(4, 30), rng.randint(3, 12)
+        if rng.random() < 0.02:
+            w = 300  # 比視窗還寬
+        rects.append((x, y, x + w, y + h))
+    return rects
+
+
+def naive_candidates(rects):
+    """每個框的 5 個候選位置逐一比對所有框"""
+    masks = []
+    for ax0, ay0, ax1, ay1 in rects:
+        if ax1 - ax0 > W or ay1 - ay0 > H:
+            continue
+        cx, cy = (ax0 + ax1 - W) / 2, (ay0 + ay1 - H) / 2
+        for left, top in [(ax0, ay0), (ax1 - W, ay0), (ax0, ay1 - H), (ax1 - W, ay1 - H), (cx, cy)]:
+            mask = 0
+            for i, (x0, y0, x1, y1) in enumerate(rects):
+                if x0 >= left and x1 <= left + W and y0 >= top and y1 <= top + H:
+                    mask |= 1 << i
+            if mask not in masks:
+                masks.append(mask)
+    return masks
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_candidates_match_naive(seed):
+    rects = random_rects(random.Random(seed), 60, 400, 300)
+    planner = ScreenPlanner(W, H)
+    assert planner.candidates(np.asarray(rects, dtype=float)) == naive_candidates(rects)
+
+
+@pytest.mark.parametrize("seed", range(30))
+def test_plan_partitions_and_covers(seed):
+    rng = random.Random(seed)
+    rects = random_rects(rng, rng.randint(1, 200))
+    planner = ScreenPlanner(W, H)
+    groups = planner.plan(rects)
+
+    assert sorted(i for group in groups for i in group) == list(range(len(rects)))
+    for group in groups:
+        x0, y0, x1, y1 = planner.fit([rects[i] for i in group])
+        for i in group:
+            rx0, ry0, rx1, ry1 = rects[i]
+            assert x0 <= rx0 and y0 <= ry0 and rx1 <= x1 and ry1 <= y1
+        oversized = len(group) == 1 and (rects[group[0]][2] - rects[group[0]][0] > W or rects[group[0]][3] - rects[group[0]][1] > H)
+        if not oversized:
+            assert (x1 - x0, y1 - y0) == (W, H)
+
+
+def test_close_boxes_share_one_window():
+    planner = ScreenPlanner(W, H)
+    assert planner.plan([(10, 10, 20, 15), (100, 80, 120, 90), (50, 40, 60, 45)]) == [[0, 1, 2]]
+    assert planner.plan([(0, 0, 10, 10), (200, 0, 210, 10)]) == [[0], [1]]
+    assert planner.plan([]) == []
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_per_component_plan_matches_whole_page(seed):
+    # plan_screens 先在視窗對角線切開快取的階層再各自規劃，選出的視窗與整頁一起規劃相同
+    rng = random.Random(seed)
+    rects = random_rects(rng, rng.randint(1, 300), rng.choice([600, 1500]), rng.choice([600, 1500]))
+    boxes = [BoxInfo(*r, f"C{i}", i, "front") for i, r in enumerate(rects)]
+    view = ViewResult()
+    view.set_result(FoundResult(total=len(boxes), front_amount=len(boxes), back_amount=0, box=boxes))
+
+    planner = ScreenPlanner(W, H)
+    whole = sorted(map(tuple, planner.plan(rects)))
+    assert sorted(map(tuple, view.plan_groups("front", 0, rects, planner))) == whole
+
+
+def test_plan_screens_uses_output_size_over_zoom():
+    boxes = [BoxInfo(100, 100, 110, 105, "C1", 0, "front"), BoxInfo(400, 300, 410, 305, "C2", 1, "back")]
+    view = ViewResult()
+    view.set_result(FoundResult(total=2, front_amount=1, back_amount=1, box=boxes))
+    screens = view.plan_screens((640, 480), zoom=5)
+    assert [(s.side, s.x1 - s.x0, s.y1 - s.y0, s.zoom) for s in screens] == [("front", 128, 96, 5), ("back", 128, 96, 5)]
@@ -0,0 +1,144 @@
+import random
+import re
+
+import pytest
+
+from lib.PDFViewer import PDFViewer
+from lib.KeywordMatcher import KeywordMatcher
+from lib.SearchIndex import DesignatorIndex, IndexedWord, WordHit, is_token
+
+TOKENS = ["C1", "C12", "R5", "U10", "c1", "JP1", "2", "TP"]
+SEPARATORS = [" ", ",", "-", "+", "\n", "_", "(", ")"]
+
+
+def random_blocks(rng, count=30):
+    blocks = []
+    for block_no in range(count):
+        text = "".join(rng.choice(TOKENS) + rng.choice(SEPARATORS) for _ in range(rng.randint(1, 8)))
+        blocks.append((0, block_no * 10, 50, block_no * 10 + 8, text, block_no, 0))
+    return blocks
+
+
+def regex_search(blocks, keywords):
+    """原本逐區塊的 regex 比對：{block_no: (命中的關鍵字, 命中的行)}"""
+    pattern = re.compile(r"\b(" + "|".join(re.escape(k) for k in keywords) + r")\b")
+    found = {}
+    for *_, text, block_no, _ in blocks:
+        matched = pattern.findall(text)
+        if matched:
+            lines = [line.strip() for line in text.splitlines() if pattern.search(line)]
+            found[block_no] = (set(matched), lines)
+    return found
+
+
+def test_is_token():
+    assert is_token("C12") and is_token("R_5")
+    assert not is_token("JP1-2") and not is_token("TP+3") and not is_token("")
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_index_matches_regex(seed):
+    rng = random.Random(seed)
+    blocks = random_blocks(rng)
+    index = DesignatorIndex()
+    index.add_blocks("front", 0, blocks)
+    # 重複加入同一頁不會產生重複區塊
+    index.add_blocks("front", 0, blocks)
+
+    for _ in range(20):
+        keywords = rng.sample(TOKENS, rng.randint(1, 4))
+        found = {
+            hit.block.block_no: (hit.matched_keywords, hit.matched_lines)
+            for hit in index.search(keywords)
+        }
+        assert found == regex_search(blocks, keywords)
+
+
+def test_page_filter():
+    index = DesignatorIndex()
+    index.add_blocks("front", 0, [(0, 0, 1, 1, "C1 R5", 0, 0)])
+    index.add_blocks("back", 1, [(0, 0, 1, 1, "C1", 0, 0)])
+    assert [(h.block.side, h.block.page) for h in index.search(["C1"])] == [("front", 0), ("back", 1)]
+    assert [(h.block.side, h.block.page) for h in index.search(["C1"], page_idx=1)] == [("back", 1)]
+
+
+def lines_pdf(make_pdf, path, lines):
+    return make_pdf(path, size=(600, 400), rect=None, texts=[(40, 40 + i * 30, text) for i, text in enumerate(lines)])
+
+
+def test_viewer_index_path_matches_matcher_path(tmp_path, make_pdf):
+    front = lines_pdf(make_pdf, tmp_path / "T.pdf", ["C1, C12 R5", "U10 JP1-2", "c1 TP+3"])
+    back = lines_pdf(make_pdf, tmp_path / "B.pdf", ["C1", "R5-R7 C12"])
+    viewer = PDFViewer(front, back)
+
+    def summary(result):
+        return [(b.side, b.page, b.block_no, b.text, sorted(b.matched_keywords)) for b in result.box]
+
+    keywords = ["C1", "R5", "c1", "C12"]
+    # 加一個非 token 的關鍵字會走 Aho-Corasick 逐區塊掃描；該關鍵字不存在時結果應一樣
+    assert summary(viewer.search_pdf_multiple(keywords)) == summary(viewer.search_pdf_multiple(keywords + ["X-9"]))
+    assert viewer.search_pdf_multiple(keywords).total > 0
+
+
+def word(text, x0=100, y0=10, x1=160, y1=20):
+    return IndexedWord("front", 0, x0, y0, x1, y1, text, 0, 0, 0)
+
+
+def test_sub_rect_stays_inside_word():
+    horizontal = word("C1,R5")
+    for start, end in [(0, 2), (3, 5), (2, 3), (0, 5)]:
+        x0, y0, x1, y1 = horizontal.sub_rect(start, end)
+        assert horizontal.x0 <= x0 < x1 <= horizontal.x1
+        assert (y0, y1) == (horizontal.y0, horizontal.y1)
+    assert horizontal.sub_rect(3, 5) == (136, 10, 160, 20)
+
+    # 直書沿 y 切
+    vertical = word("JP1-2", x0=10, y0=100, x1=20, y1=150)
+    assert vertical.sub_rect(0, 3) == (10, 100, 20, 130)
+    assert word("").sub_rect(0, 0) == (100, 10, 160, 20)
+
+
+def test_word_hit_rect_and_search_words():
+    index = DesignatorIndex()
+    index.add_words("front", 0, [(100, 10, 160, 20, "C1,R5", 0, 0, 0), (0, 0, 20, 10, "R5", 1, 0, 0)])
+    index.add_words("back", 1, [(0, 0, 20, 10, "C1", 0, 0, 0)])
+
+    hits = index.search_words(["R5", "C1"])
+    assert [(h.word.side, h.word.text, h.keyword, h.start) for h in hits] == [
+        ("front", "C1,R5", "C1", 0), ("front", "C1,R5", "R5", 3), ("front", "R5", "R5", 0), ("back", "C1", "C1", 0),
+    ]
+    assert hits[1].rect == (136, 10, 160, 20)
+    assert hits[2].rect == (0, 0, 20, 10)
+    assert [h.word.side for h in index.search_words(["C1"], page_idx=1)] == ["back"]
+
+
+def test_finditer_positions_inside_word():
+    # 非 token 關鍵字走 KeywordMatcher，起點用來切字框
+    assert KeywordMatcher(["JP1-2", "C1"]).finditer("C1,JP1-2") == [(0, "C1"), (3, "JP1-2")]
+    assert WordHit(word("C1,JP1-2", x1=180), "JP1-2", 3).rect == (130, 10, 180, 20)
+
+
+@pytest.mark.parametrize("keywords", [["C1", "R5", "c1", "C12"], ["R7", "U10", "2"], ["JP1-2", "TP+3", "C1"]])
+def test_word_mode_matches_block_mode(tmp_path, make_pdf, keywords):
+    front = lines_pdf(make_pdf, tmp_path / "T.pdf", ["C1, C12 R5", "U10 JP1-2", "c1 TP+3"])
+    back = lines_pdf(make_pdf, tmp_path / "B.pdf", ["C1", "R5-R7 C12"])
+    viewer = PDFViewer(front, back)
+
+    blocks = viewer.search_pdf_multiple(keywords)
+    words = viewer.search_pdf_multiple(keywords, mode="word")
+    assert words.total > 0
+    # 命中的 designator 與頁面相同，只是框從整個區塊縮到單一 designator
+    assert {(b.side, b.page, b.block_no, k) for b in blocks.box for k in b.matched_keywords} == \
+        {(w.side, w.page, w.block_no, w.text) for w in words.box}
+    block_rects = {(b.side, b.page, b.block_no): b for b in blocks.box}
+    for w in words.box:
+        b = block_rects[(w.side, w.page, w.block_no)]
+        assert b.x0 - 1 <= w.x0 < w.x1 <= b.x1 + 1 and b.y0 - 1 <= w.y0 < w.y1 <= b.y1 + 1
+    assert (words.front_amount, words.back_amount) == (
+        sum(w.side == "front" for w in words.box), sum(w.side == "back" for w in words.box))
+
+
+def test_unknown_search_mode_raises(tmp_path, make_pdf):
+    viewer = PDFViewer(lines_pdf(make_pdf, tmp_path / "T.pdf", ["C1"]), lines_pdf(make_pdf, tmp_path / "B.pdf", ["C1"]))
+    with pytest.raises(ValueError):
+        viewer.search_pdf_multiple(["C1"], mode="line")
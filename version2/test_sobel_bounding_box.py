@@ -0,0 +1,33 @@
+import random
+
+import pytest
+
+from lib.data import BoundingBox
+from lib.SinglePDF import SinglePDF
+
+
+def make_board(make_pdf, path, rng):
+    """隨機位置的板框 + 框內元件文字 + 框外的小標題"""
+    x0, y0 = rng.randint(20, 200), rng.randint(20, 150)
+    x1, y1 = rng.randint(500, 780), rng.randint(350, 580)
+    width = rng.choice([0.5, 1, 2])
+    texts = [(rng.randint(x0 + 10, x1 - 40), rng.randint(y0 + 20, y1 - 10), f"C{i}", 8)
+             for i in range(rng.randint(0, 10))]
+    texts.append((rng.randint(0, 700), 595, "title", 6))
+    return make_pdf(path, size=(800, 600), rect=(x0, y0, x1, y1), rect_width=width, texts=texts)
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_pyramid_matches_full_resolution(tmp_path, make_pdf, seed):
+    pdf = SinglePDF(make_board(make_pdf, tmp_path / f"board{seed}.pdf", random.Random(seed)))
+    full = pdf.get_sobel_bounding_box(0)
+    coarse = pdf.get_sobel_bounding_box(0, pyramid=True)
+    assert max(
+        abs(full.x0 - coarse.x0), abs(full.y0 - coarse.y0),
+        abs(full.x1 - coarse.x1), abs(full.y1 - coarse.y1),
+    ) <= 2
+
+
+def test_pyramid_blank_page_returns_whole_page(tmp_path, make_pdf):
+    pdf = SinglePDF(make_pdf(tmp_path / "blank.pdf", size=(300, 200), rect=None))
+    assert pdf.get_sobel_bounding_box(0, pyramid=True) == BoundingBox(0, 0, 300, 200)
@@ -0,0 +1,129 @@
+import math
+import random
+
+import pytest
+
+from lib.utils.spatial import ClusterTree, UnionFind, cluster_points, route_order
+
+
+def brute_force_labels(points, eps):
+    """O(n^2) 對照：距離 <= eps 的點併在一起"""
+    uf = UnionFind(len(points))
+    for i, (x, y) in enumerate(points):
+        for j in range(i):
+            dx, dy = x - points[j][0], y - points[j][1]
+            if math.sqrt(dx * dx + dy * dy) <= eps:
+                uf.union(i, j)
+    return uf.labels()
+
+
+def boundary_layout(rng, eps, n):
+    """一半的點剛好放在某個既有點的 eps 圓上（捨入後落在邊界兩側）"""
+    points = []
+    for _ in range(n):
+        if points and rng.random() < 0.5:
+            x, y = rng.choice(points)
+            angle = rng.uniform(0, 2 * math.pi)
+            points.append((x + eps * math.cos(angle), y + eps * math.sin(angle)))
+        else:
+            points.append((rng.uniform(0, 100), rng.uniform(0, 100)))
+    return points
+
+
+def pythagorean_layout(rng, n):
+    """整數座標，相鄰點距離剛好是 eps（3-4-5、5-12-13 ...），邊界沒有捨入誤差"""
+    a, b, c = rng.choice([(3, 4, 5), (5, 12, 13), (8, 15, 17), (0, 6, 6)])
+    points = []
+    for _ in range(n):
+        if points and rng.random() < 0.6:
+            x, y = rng.choice(points)
+            dx, dy = (a, b) if rng.random() < 0.5 else (b, a)
+            points.append((x + rng.choice((-1, 1)) * dx, y + rng.choice((-1, 1)) * dy))
+        else:
+            points.append((rng.randint(0, 200), rng.randint(0, 200)))
+    return points, c
+
+
+def test_empty_and_single():
+    assert cluster_points([], 5) == []
+    assert cluster_points([(1, 2)], 5) == [0]
+    assert ClusterTree([]).cut(5) == []
+    assert ClusterTree([(1, 2)]).cut(5) == [0]
+
+
+def test_zero_eps_merges_only_identical_points():
+    points = [(0, 0), (1, 0), (0, 0), (1, 0.5)]
+    assert cluster_points(points, 0) == [0, 1, 0, 2]
+    assert ClusterTree(points).cut(0) == [0, 1, 0, 2]
+
+
+def test_exact_eps_is_connected():
+    assert cluster_points([(0, 0), (3, 4), (6, 8)], 5) == [0, 0, 0]
+    assert cluster_points([(0, 0), (3, 4.000001)], 5) == [0, 1]
+    assert ClusterTree([(0, 0), (3, 4), (6, 8)]).cut(5) == [0, 0, 0]
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_grid_and_tree_match_brute_force_on_boundary(seed):
+    rng = random.Random(seed)
+    for _ in range(100):
+        eps = rng.choice([0.3, 1.1, 5.5, 7.3, 33.3])
+        points = boundary_layout(rng, eps, rng.randint(2, 40))
+        expected = brute_force_labels(points, eps)
+        assert cluster_points(points, eps) == expected
+        assert ClusterTree(points).cut(eps) == expected
+
+
+def test_tree_cut_at_any_eps_matches_grid():
+    rng = random.Random(7)
+    points = [(rng.uniform(0, 400), rng.uniform(0, 300)) for _ in range(300)]
+    tree = ClusterTree(points)
+    for eps in (0.5, 3, 10, 25, 80, 500):
+        assert tree.cut(eps) == cluster_points(points, eps)
+
+
+def test_matches_sklearn_dbscan():
+    DBSCAN = pytest.importorskip("sklearn.cluster").DBSCAN
+
+    def canon(labels):
+        mapping = {}
+        return [mapping.setdefault(label, len(mapping)) for label in labels]
+
+    rng = random.Random(0)
+    for _ in range(200):
+        if rng.random() < 0.5:
+            points, eps = pythagorean_layout(rng, rng.randint(2, 40))
+        else:
+            eps = rng.choice([5.5, 10.0, 30.0])
+            points = [(rng.randint(0, 800) / 2, rng.randint(0, 1200) / 2) for _ in range(rng.randint(1, 200))]
+        expected = canon(DBSCAN(eps=eps, min_samples=1).fit(points).labels_)
+        assert cluster_points(points, eps) == expected
+        assert ClusterTree(points).cut(eps) == expected
+
+
+def route_length(points, route):
+    return sum(math.dist(points[a], points[b]) for a, b in zip(route, route[1:]))
+
+
+def test_route_small_inputs():
+    assert route_order([]) == []
+    assert route_order([(5, 5)]) == [0]
+    assert route_order([(9, 9), (1, 1)]) == [1, 0]
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_route_is_two_opt_optimal(seed):
+    rng = random.Random(seed)
+    points = [(rng.uniform(0, 1000), rng.uniform(0, 1000)) for _ in range(rng.randint(3, 80))]
+    route = route_order(points)
+
+    assert sorted(route) == list(range(len(points)))
+    # 從最靠左上的點出發
+    assert route[0] == min(range(len(points)), key=lambda i: points[i][0] + points[i][1])
+    # 任何一段反轉都不會更短（起點固定）
+    length = route_length(points, route)
+    for i in range(1, len(route)):
+        for j in range(i + 1, len(route)):
+            reversed_route = route[:i] + route[i:j + 1][::-1] + route[j + 1:]
+            assert route_length(points, reversed_route) >= length - 1e-6
+    assert length <= route_length(points, list(range(len(points)))) + 1e-6
@@ -0,0 +1,105 @@
+import threading
+import time
+
+import pytest
+
+from lib.TaskScheduler import TaskCancelled, TaskScheduler
+
+
+class FakeRoot:
+    """只提供 after 的 Tk 替身：callback 由測試的主執行緒依序執行"""
+
+    def __init__(self):
+        self.pending = []
+        self.main = threading.get_ident()
+        self.calls_on_main = True
+
+    def after(self, ms, func):
+        self.pending.append(func)
+
+    def run_until(self, condition, timeout=5.0):
+        end = time.monotonic() + timeout
+        while time.monotonic() < end:
+            pending, self.pending = self.pending, []
+            for func in pending:
+                self.calls_on_main &= threading.get_ident() == self.main
+                func()
+            if condition():
+                return
+            time.sleep(0.005)
+        raise AssertionError("timeout")
+
+
+@pytest.fixture
+def root():
+    return FakeRoot()
+
+
+@pytest.fixture
+def scheduler(root):
+    scheduler = TaskScheduler(root)
+    yield scheduler
+    scheduler.shutdown()
+
+
+def test_progress_and_result_run_on_main_thread(root, scheduler):
+    log = []
+
+    def work(task):
+        for i in range(3):
+            task.progress(i * 10, f"step {i}")
+        return "ok"
+
+    scheduler.submit("job", work, on_done=log.append, on_progress=lambda p, t: log.append((p, t)))
+    root.run_until(lambda: "ok" in log)
+    assert log == [(0, "step 0"), (10, "step 1"), (20, "step 2"), "ok"]
+    assert root.calls_on_main
+    assert not scheduler.is_active("job")
+    assert not scheduler.callbacks
+
+
+def test_new_task_with_same_key_cancels_old_one(root, scheduler):
+    log = []
+    release = threading.Event()
+
+    def slow(task):
+        release.wait(5)
+        task.progress(50, "stale")
+        return "old"
+
+    scheduler.submit("search", slow, on_done=lambda v: log.append(("done", v)),
+                     on_progress=lambda p, t: log.append(("progress", t)), on_cancel=lambda: log.append("cancel old"))
+    scheduler.submit("search", lambda task: "new", on_done=lambda v: log.append(("done", v)))
+    release.set()
+    root.run_until(lambda: "cancel old" in log and ("done", "new") in log)
+
+    # 舊工作的進度與結果都不會套用
+    assert ("done", "old") not in log and ("progress", "stale") not in log
+    assert not scheduler.callbacks
+
+
+def test_error_and_explicit_cancel(root, scheduler):
+    log = []
+    started = threading.Event()
+
+    def wait_for_cancel(task):
+        started.set()
+        while True:
+            task.check()
+            time.sleep(0.005)
+
+    scheduler.submit("bad", lambda task: 1 / 0, on_error=lambda e: log.append(type(e)))
+    scheduler.submit("loop", wait_for_cancel, on_cancel=lambda: log.append("cancelled"))
+    assert started.wait(5)
+    assert scheduler.cancel("loop")
+    assert not scheduler.cancel("loop")
+    root.run_until(lambda: ZeroDivisionError in log and "cancelled" in log)
+
+
+def test_check_raises_after_cancel(scheduler):
+    task = scheduler.submit("idle", lambda task: None)
+    task.cancel()
+    with pytest.raises(TaskCancelled):
+        task.check()
+    with pytest.raises(TaskCancelled):
+        task.progress(10)
@@ -0,0 +1,79 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image
+
+from lib.TileCache import TileCache
+
+
+def tile(width, height=1, mode="L"):
+    return Image.new(mode, (width, height))
+
+
+def test_image_bytes_counts_bands():
+    assert TileCache.image_bytes(tile(10, 2)) == 20
+    assert TileCache.image_bytes(tile(10, 2, "RGB")) == 60
+    assert TileCache.image_bytes(tile(10, 2, "RGBA")) == 80
+
+
+def test_evicts_least_recently_used():
+    cache = TileCache(max_bytes=30)
+    for key in "abc":
+        cache.put(key, tile(10))
+    assert cache.get("a") is not None  # a 變成最近使用
+    cache.put("d", tile(10))
+
+    assert "b" not in cache
+    assert list(cache._items) == ["c", "a", "d"]
+    assert cache.used_bytes == 30
+
+    # 一張大圖可能一次擠掉好幾張
+    cache.put("e", tile(25))
+    assert list(cache._items) == ["e"]
+    assert cache.used_bytes == 25
+
+
+def test_overwrite_replaces_size():
+    cache = TileCache(max_bytes=100)
+    cache.put("a", tile(40))
+    cache.put("b", tile(30))
+    cache.put("a", tile(10))
+    assert cache.used_bytes == 40
+    assert len(cache) == 2
+    # 覆寫也算使用，a 移到最後
+    assert list(cache._items) == ["b", "a"]
+
+    # 覆寫成更大的圖時先扣掉舊的再淘汰，不會把自己擠掉
+    cache.put("a", tile(90))
+    assert list(cache._items) == ["a"]
+    assert cache.used_bytes == 90
+
+
+def test_item_larger_than_budget_is_not_cached():
+    cache = TileCache(max_bytes=50)
+    cache.put("a", tile(20))
+    cache.put("huge", tile(51))
+    assert "huge" not in cache
+    assert list(cache._items) == ["a"]
+    assert cache.used_bytes == 20
+
+    # 同一個 key 覆寫成過大的圖：舊的也移除
+    cache.put("a", tile(60))
+    assert len(cache) == 0
+    assert cache.used_bytes == 0
+    assert cache.get("a") is None
+
+
+def test_clear_and_concurrent_puts():
+    cache = TileCache(max_bytes=500)
+
+    def job(n):
+        cache.put(n % 40, tile(10 + n % 7))
+        cache.get((n * 7) % 40)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(job, range(2000)))
+    assert cache.used_bytes == sum(TileCache.image_bytes(image) for image in cache._items.values())
+    assert cache.used_bytes <= cache.max_bytes
+
+    cache.clear()
+    assert len(cache) == 0 and cache.used_bytes == 0
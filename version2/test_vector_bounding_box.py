@@ -0,0 +1,56 @@
+from lib.data import BoundingBox
+from lib.SinglePDF import SinglePDF
+
+
+def make_board(make_pdf, path, image_rect=None):
+    """畫一個板框 + 幾個元件文字；image_rect 有值時另外嵌入一張圖片"""
+    texts = [(150 + i * 150, 200, text) for i, text in enumerate(["C1", "R5", "U10"])]
+    return make_pdf(path, size=(800, 600), rect=(100, 80, 700, 500), texts=texts, image_rect=image_rect)
+
+
+def test_vector_box_without_images(tmp_path, make_pdf):
+    pdf = SinglePDF(make_board(make_pdf, tmp_path / "board.pdf"))
+    bbox = pdf.get_vector_bounding_box(0)
+    assert bbox is not None
+    assert bbox.x0 <= 100 and bbox.y0 <= 80 and bbox.x1 >= 700 and bbox.y1 >= 500
+
+
+def test_vector_box_with_small_image(tmp_path, make_pdf):
+    # 小圖片不影響向量流程（以前 abs(tuple) 會丟 TypeError）
+    pdf = SinglePDF(make_board(make_pdf, tmp_path / "logo.pdf", image_rect=(110, 90, 140, 120)))
+    assert pdf.get_vector_bounding_box(0) is not None
+
+
+def test_scanned_page_returns_none(tmp_path, make_pdf):
+    pdf = SinglePDF(make_board(make_pdf, tmp_path / "scan.pdf", image_rect=(0, 0, 800, 600)))
+    assert pdf.get_vector_bounding_box(0) is None
+
+
+def record_raster(monkeypatch, pdf):
+    """把 raster 流程換成只記錄呼叫的替身"""
+    calls = []
+
+    def raster(idx, *args, **kwargs):
+        calls.append(idx)
+        return BoundingBox(0, 0, 800, 600)
+
+    monkeypatch.setattr(pdf, "get_trimmed_bounding_box_v6", raster)
+    return calls
+
+
+def test_vector_method_uses_vector_path(tmp_path, make_pdf, monkeypatch):
+    pdf = SinglePDF(make_board(make_pdf, tmp_path / "board.pdf"))
+    calls = record_raster(monkeypatch, pdf)
+    bbox = pdf.get_board_bounding_box(0, method="vector")
+
+    assert calls == []
+    assert bbox.x1 > bbox.x0 and bbox.y1 > bbox.y0
+    assert pdf.bounding_boxes[0] == bbox
+
+
+def test_vector_method_falls_back_to_raster_on_scanned_page(tmp_path, make_pdf, monkeypatch):
+    pdf = SinglePDF(make_board(make_pdf, tmp_path / "scan.pdf", image_rect=(0, 0, 800, 600)))
+    calls = record_raster(monkeypatch, pdf)
+
+    assert pdf.get_board_bounding_box(0, method="vector") == BoundingBox(0, 0, 800, 600)
+    assert calls == [0]
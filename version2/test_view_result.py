@@ -0,0 +1,65 @@
+import random
+
+import pytest
+
+from lib.data import FoundResult
+from lib.data.models import BoxInfo
+from lib.View import ViewResult
+
+
+def random_result(rng, count=120):
+    boxes = []
+    for i in range(count):
+        side, page = rng.choice([("front", 0), ("front", 1), ("back", 0)])
+        x, y = rng.uniform(0, 800), rng.uniform(0, 600)
+        boxes.append(BoxInfo(x, y, x + rng.uniform(3, 25), y + rng.uniform(3, 10), f"C{i}", i, side, [f"C{i}"], page))
+    return FoundResult(total=len(boxes), front_amount=0, back_amount=0, box=boxes)
+
+
+def screen_tuples(screens):
+    return [(s.side, s.page, s.x0, s.y0, s.x1, s.y1, [b.block_no for b in s.labels]) for s in screens]
+
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("backend", ["grid", "sklearn"])
+def test_dbscan_backends_give_same_screens(seed, backend):
+    if backend == "sklearn":
+        pytest.importorskip("sklearn")
+    view = ViewResult()
+    view.set_result(random_result(random.Random(seed)))
+    for zoom in (2, 5, 10):
+        tree = screen_tuples(view.group_DBSCAN(zoom=zoom, backend="tree"))
+        assert screen_tuples(view.group_DBSCAN(zoom=zoom, backend=backend)) == tree
+
+
+def test_cluster_tree_is_reused_until_new_result():
+    view = ViewResult()
+    view.set_result(random_result(random.Random(0)))
+    view.group_DBSCAN(zoom=5)
+    tree = view.cluster_tree("front", 0)
+    view.group_DBSCAN(zoom=3)
+    assert view.cluster_tree("front", 0) is tree
+
+    view.set_result(random_result(random.Random(1)))
+    assert view.cluster_tree("front", 0) is not tree
+
+
+def test_unknown_backend_raises():
+    view = ViewResult()
+    view.set_result(random_result(random.Random(0)))
+    with pytest.raises(ValueError):
+        view.group_DBSCAN(backend="kmeans")
+
+
+def test_order_screens_keeps_side_page_groups():
+    view = ViewResult()
+    view.set_result(random_result(random.Random(3), count=200))
+    screens = view.plan_screens((640, 480), zoom=5)
+    before = sorted(screen_tuples(screens))
+    ordered = view.order_screens()
+
+    assert sorted(screen_tuples(ordered)) == before
+    keys = [(s.side, s.page) for s in ordered]
+    # 正面在前、頁碼由小到大，同一頁的視窗連在一起
+    assert keys == sorted(keys, key=lambda k: (k[0] != "front", k[1]))
+    assert view.cur_idx == 0
@@ -0,0 +1,56 @@
+import random
+
+import numpy as np
+import pytest
+
+from lib.CV2ImageProcessor import DisplayEngine
+from lib.data import FoundResult
+from lib.data.models import BoxInfo, ZoomScreen
+from lib.SinglePDF import SinglePDF
+
+ZOOM = 5
+
+
+@pytest.fixture(scope="module")
+def pdfs(tmp_path_factory, make_pdf):
+    """正反面各一頁：線條 + 文字，元件框散在整頁（含貼邊的）"""
+    result = {}
+    for side in ("front", "back"):
+        texts = [(15 + (i % 4) * 70, 40 + (i // 4) * 50, f"C{i}") for i in range(12)]
+        path = make_pdf(tmp_path_factory.mktemp(side) / f"{side}.pdf", size=(300, 200),
+                        rect=(10, 10, 290, 190), texts=texts, fontsize=9)
+        result[side] = SinglePDF(path, side)
+    return result
+
+
+def random_result(rng):
+    boxes = []
+    for side in ("front", "back"):
+        for i in range(rng.randint(1, 15)):
+            x, y = rng.uniform(-5, 295), rng.uniform(-5, 195)
+            boxes.append(BoxInfo(x, y, x + rng.uniform(2, 30), y + rng.uniform(2, 12), f"C{i}", i, side))
+    return FoundResult(total=len(boxes), front_amount=0, back_amount=0, box=boxes)
+
+
+@pytest.mark.parametrize("thickness", [1, 2, 3])
+def test_clip_tiles_match_full_page_crop(pdfs, thickness):
+    rng = random.Random(thickness)
+    result = random_result(rng)
+
+    full = DisplayEngine()
+    full.set_result_pages(
+        {(side, 0): pdf.get_pixmap(ZOOM, 0, cache=False) for side, pdf in pdfs.items()},
+        result, ZOOM, 1, thickness, (0, 0, 255),
+    )
+    tiles = DisplayEngine()
+    tiles.set_zoom_source(pdfs, result, ZOOM, 1, thickness, (0, 0, 255))
+
+    for _ in range(40):
+        side = rng.choice(["front", "back"])
+        # 包含超出頁面左上、右下的視窗
+        x0, y0 = rng.uniform(-20, 290), rng.uniform(-20, 190)
+        screen = ZoomScreen(side=side, x0=x0, y0=y0, x1=x0 + rng.uniform(10, 128), y1=y0 + rng.uniform(10, 96), zoom=ZOOM)
+        expected = full.get_zoom_crop(screen)
+        actual = tiles.get_zoom_crop(screen)
+        assert actual.shape == expected.shape
+        assert np.array_equal(actual, expected)
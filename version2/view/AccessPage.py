@@ -1,13 +1,16 @@
+import threading
 import tkinter as tk
 from tkinter import ttk
 from tkinter import filedialog
 from tkinter import messagebox
 from tkinter import Toplevel, Scrollbar, Canvas
+from PIL import ImageTk
 
 from lib.PDFViewer import PDFViewer
 from lib.ExcelReader import SOMReader
 from lib.data.models import FoundResult
 from lib.CV2ImageProcessor import DisplayEngine
+from lib.TileCache import TileCache
 
 from lib.View import ViewResult
 from lib.debug import Debug
@@ -36,6 +39,13 @@ class AccessPage(tk.Frame):
         self.zoom_engine = DisplayEngine()
         self.minimap_engine = DisplayEngine()
         
+        # 已合成的 zoom 影像快取 & 前後一筆的背景預取
+        self.zoom_output_size = (640, 480)
+        self.tile_cache = TileCache()
+        self.tile_generation = 0
+        self.prefetch_event = threading.Event()
+        self.prefetch_thread = None
+        
         self.bind("<<PDF_ENGINE_UPDATE>>", self.on_pdf_engine_update)
 
         self.build_ui()
@@ -349,95 +359,153 @@ class AccessPage(tk.Frame):
     # Func: 搜尋按鈕
     @Debug.event("開始搜尋",color="yellow")
     def search_pdf(self):
-        """搜尋function"""
-        self.progress_component.enable()
-        self.progress_component.change_progress(self.search_start, self.search_done)
+        """搜尋function（重複按下時，還沒跑完的舊搜尋會被取消）"""
+        self.progress_component.change_progress(
+            self.search_start, self.search_done, self.search_apply, key="search"
+        )
         
-    # search 運算
+    # search 運算（背景執行緒：不碰 Tk 元件，也不改畫面正在用的 ViewResult / DisplayEngine）
     def search_start(self,set_progress):
         # excel 拿到關鍵字
         set_progress(5,"讀取關鍵字")
         keywords = self.excel_reader.get_keywords()
         # 搜尋結果
         set_progress(10,"搜尋PDF...")
-        result = self.pdf_viewer.search_pdf_multiple(keywords)
+        result = self.pdf_viewer.search_pdf_multiple(keywords, mode="word")
         
         print("搜尋資料：",keywords)
         print(result)
         
         # 更新狀態
         set_progress(30,"物件運算中...")
-        self.view_result.set_result(result)
-        # DBSCAN運算
-        print(self.view_result.group_DBSCAN())
+        view_result = ViewResult()
+        view_result.set_result(result)
+        # 以最少的固定大小視窗蓋住所有元件（視窗大小 = 輸出大小 / zoom，顯示時不需縮放）
+        view_result.plan_screens(self.zoom_output_size, zoom=5)
+        # 依走訪路徑排序，下一個 / 上一個時畫面移動最少
+        print(view_result.order_screens())
         set_progress(80,"繪圖...")
-        self.set_pdf_zoom_and_minimap()
+        minimap_engine = self.build_minimap(view_result)
+        zoom_engine = self.build_pdf_zoom(view_result)
+        set_progress(95,"繪圖...")
+        return view_result, minimap_engine, zoom_engine
+
+    # search 結果套用（主執行緒）
+    def search_apply(self, outcome):
+        self.view_result, self.minimap_engine, self.zoom_engine = outcome
+        # 新的搜尋結果：舊的快取影像全部作廢
+        self.tile_generation += 1
+        self.tile_cache.clear()
         
         # View: 更新搜尋結果
-        self.update_search_result(result)
+        self.update_search_result(self.view_result.result)
         
         # View 呈現 呈現兩張PDF Zoom區塊&Minimap
-        set_progress(100,"繪圖...")
-        self.display_pdf()
+        self.progress_component.set_progress(100,"繪圖...")
+        if self.view_result.screens_length() > 0:
+            self.update_ui()
     
     # search 運算結束
     def search_done(self):
         self.progress_component.disable()
     
         
-    def set_minimap(self):
-        """minimap搜尋結果 設定資料""" 
+    def result_pages(self, result: FoundResult) -> list[tuple[str, int]]:
+        """需要呈現的 (side, page)：兩面第 0 頁 + 所有有搜尋結果的頁面"""
+        keys = {("front", 0), ("back", 0)} | set(result.get_by_page())
+        return sorted(keys, key=lambda k: (k[0] != "front", k[1]))
+
+    def build_minimap(self, view_result: ViewResult) -> DisplayEngine:
+        """minimap搜尋結果 設定資料（建立新的 DisplayEngine，不動畫面上正在用的）""" 
         zoom = 0.8
         scale = 1
-        self.minimap_engine.set_result(
-            (
-                self.pdf_viewer.front.get_pixmap(zoom),
-                self.pdf_viewer.back.get_pixmap(zoom),
-            ),
-            self.view_result.result,
+        pages = self.result_pages(view_result.result)
+        engine = DisplayEngine()
+        engine.set_result_pages(
+            {
+                (side, page): self.pdf_viewer.get_pdf(side).get_pixmap(zoom, page)
+                for side, page in pages
+            },
+            view_result.result,
             zoom,
             scale
         )
-        self.minimap_engine.draw_bounding_box(
-            (
-                self.pdf_viewer.front.bounding_box,
-                self.pdf_viewer.back.bounding_box
-            )
+        engine.draw_bounding_boxes(
+            {
+                (side, page): self.pdf_viewer.get_pdf(side).bounding_boxes.get(page)
+                for side, page in pages
+            }
         )
+        return engine
     
-    def set_pdf_zoom(self):
-        """zoom搜尋結果 設定資料"""
+    def build_pdf_zoom(self, view_result: ViewResult) -> DisplayEngine:
+        """zoom搜尋結果 設定資料（每個區塊顯示時才 clip 渲染）"""
         zoom = 5
-        self.zoom_engine.set_result(
-            (
-                self.pdf_viewer.front.get_pixmap(zoom),
-                self.pdf_viewer.back.get_pixmap(zoom),
-            ),
-            self.view_result.result,
+        engine = DisplayEngine()
+        engine.set_zoom_source(
+            {"front": self.pdf_viewer.front, "back": self.pdf_viewer.back},
+            view_result.result,
             zoom,
             1,
             1,
             (0,0,255)
         )
-
-    def set_pdf_zoom_and_minimap(self):
-        """Function: 設定結果資料"""
-        self.set_minimap()
-        self.set_pdf_zoom()
+        return engine
         
         
+    def tile_key(self, idx: int) -> tuple:
+        screen = self.view_result.screens[idx]
+        return (self.tile_generation, idx, screen.side, self.zoom_output_size)
+
+    def compose_tile(self, idx: int):
+        """合成第 idx 個 zoom 影像並放入快取（已有就直接回傳）"""
+        key = self.tile_key(idx)
+        image = self.tile_cache.get(key)
+        if image is None:
+            image = self.zoom_engine.compose_zoom(self.view_result.screens[idx], self.zoom_output_size)
+            self.tile_cache.put(key, image)
+        return image
+
+    def prefetch_neighbours(self):
+        """通知背景執行緒預先合成前後一筆"""
+        if self.prefetch_thread is None:
+            self.prefetch_thread = threading.Thread(target=self.prefetch_worker, daemon=True)
+            self.prefetch_thread.start()
+        self.prefetch_event.set()
+
+    def prefetch_worker(self):
+        """背景預取：只產生 PIL 影像，PhotoImage 一律在主執行緒建立"""
+        while True:
+            self.prefetch_event.wait()
+            self.prefetch_event.clear()
+            generation = self.tile_generation
+            cur_idx = self.view_result.cur_idx
+            for idx in (cur_idx + 1, cur_idx - 1):
+                # 使用者已換頁或重新搜尋：放棄這輪
+                if generation != self.tile_generation or self.prefetch_event.is_set():
+                    break
+                if 0 <= idx < self.view_result.screens_length():
+                    try:
+                        self.compose_tile(idx)
+                    except Exception as e:
+                        print(f"預取第 {idx} 筆失敗：{e}")
+
     def display_zoom(self,cur_page):
         """View: zoom 呈現"""
-        img_tk = self.zoom_engine.get_zoom(self.view_result.screens[self.view_result.cur_idx])
+        image = self.compose_tile(self.view_result.cur_idx)
+        img_tk = ImageTk.PhotoImage(image)
         self.zoom_label.configure(image=img_tk)
         self.zoom_label.image = img_tk  # 防止被 GC 回收
+        self.prefetch_neighbours()
     
     def display_minimap(self,cur_page):
         """View: mini map呈現"""
+        screen = self.view_result.current_screen()
         img_tk = self.minimap_engine.get_image(
             cur_page,
             self.minimap_engine.draw_relative_position,
-            self.view_result.current_screen()
+            screen,
+            screen.page
             )
         self.minimap_label.configure(image=img_tk)
         self.minimap_label.image = img_tk  # 防止被 GC 回收
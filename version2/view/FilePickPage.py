@@ -1,8 +1,10 @@
+import threading
 import tkinter as tk
 from tkinter import ttk
 from tkinter import messagebox
 
 from lib.FilePicker import FilePicker
+from lib.BoardIndex import BoardIndex
 from lib.debug import Debug
 from lib.data.models import File
 from .components import *
@@ -10,6 +12,9 @@ from .AccessPage import AccessPage
 from .ValidPage import ValidPage
 
 class FilePickPage(tk.Frame):
+    # 搜尋欄停止輸入多久後才過濾（毫秒），避免每個按鍵都查一次索引
+    SEARCH_DELAY_MS = 300
+
     def __init__(self, parent, controller):
         super().__init__(parent)
         self.controller = controller
@@ -20,8 +25,55 @@ class FilePickPage(tk.Frame):
         # 用於存放畫面上所有 FileBlock 物件，方便管理和更新
         self.file_blocks = []
         
+        # 資料夾文字索引（designator 搜尋 & PDFViewer 載入），共用給其他頁面
+        # 本機 sqlite 不支援 FTS5 等情況建立失敗時為 None，只用檔名搜尋
+        self.board_index: BoardIndex = self.open_board_index()
+        self.controller.shared_data["board_index"] = self.board_index
+        
+        # 搜尋欄延遲過濾的 after id
+        self.search_job = None
+        
         # 建立 UI 元件
         self.build_ui()
+        
+        # 背景增量建立索引
+        self.start_indexing()
+    
+    @staticmethod
+    def open_board_index() -> BoardIndex | None:
+        """建立資料夾索引，失敗時回傳 None（退回只比對檔名）"""
+        try:
+            return BoardIndex()
+        except Exception as e:
+            print(f"⚠️ 無法建立資料夾索引，只以檔名搜尋：{e}")
+            return None
+
+    def start_indexing(self):
+        """背景執行緒更新資料夾索引，完成後回主執行緒刷新畫面"""
+        self.indexing_done = threading.Event()
+        if self.board_index is None:
+            self.indexing_done.set()
+            return
+        paths = [f.path for f in self.file_picker.files]
+
+        def worker():
+            try:
+                self.board_index.update(paths, prune_folder=self.file_picker.folder_path)
+            finally:
+                self.indexing_done.set()
+
+        threading.Thread(target=worker, daemon=True).start()
+        self.after(500, self.poll_indexing)
+
+    def poll_indexing(self):
+        """tkinter 只能在主執行緒操作，所以用 after 輪詢"""
+        if not self.indexing_done.is_set():
+            self.after(500, self.poll_indexing)
+            return
+        print("資料夾索引完成")
+        # 有輸入搜尋字時，重新以 designator 結果更新
+        if self.search_var.get().strip():
+            self.update_file_blocks()
     
     def build_ui(self):
         # 外層容器框架，用來包裹所有元件
@@ -36,14 +88,16 @@ class FilePickPage(tk.Frame):
         self.front_path = tk.StringVar()
         self.back_path = tk.StringVar()
 
-        # 清除正面檔案路徑的函式，會清空變數並更新畫面
+        # 清除正面檔案路徑的函式，會清空變數、丟棄預先處理並更新畫面
         def clear_front():
             self.front_path.set("")
+            self.preload("front", "")
             self.update_file_blocks()
 
-        # 清除背面檔案路徑的函式，會清空變數並更新畫面
+        # 清除背面檔案路徑的函式，會清空變數、丟棄預先處理並更新畫面
         def clear_back():
             self.back_path.set("")
+            self.preload("back", "")
             self.update_file_blocks()
 
         # 正面與背面路徑顯示欄的框架
@@ -76,14 +130,14 @@ class FilePickPage(tk.Frame):
         search_frame.pack(fill="x", padx=10, pady=5)
 
         # 搜尋圖示與文字標籤
-        ttk.Label(search_frame, text="🔍 搜尋檔名：").pack(side="left")
+        ttk.Label(search_frame, text="🔍 搜尋檔名 / 元件：").pack(side="left")
         # 搜尋欄輸入框，綁定 self.search_var
         self.search_var = tk.StringVar()
         search_entry = ttk.Entry(search_frame, textvariable=self.search_var)
         search_entry.pack(side="left", fill="x", expand=True)
 
-        # 監聽搜尋欄文字改變事件，每次改變都呼叫 update_file_blocks 更新檔案顯示
-        self.search_var.trace_add("write", lambda *args: self.update_file_blocks())
+        # 監聽搜尋欄文字改變事件，停止輸入一小段時間後才呼叫 update_file_blocks 更新檔案顯示
+        self.search_var.trace_add("write", lambda *args: self.schedule_search())
 
         # 放置檔案顯示區域的框架（包含可滾動區域）
         canvas_frame = ttk.Frame(outer_frame)
@@ -114,17 +168,28 @@ class FilePickPage(tk.Frame):
         # 顯示所有檔案的區塊
         self.update_file_blocks()
 
+    def schedule_search(self):
+        """debounce：每次輸入都重新計時，最後一次輸入 SEARCH_DELAY_MS 後才過濾"""
+        if self.search_job is not None:
+            self.after_cancel(self.search_job)
+        self.search_job = self.after(self.SEARCH_DELAY_MS, self.update_file_blocks)
+
     def update_file_blocks(self):
+        # 已排定的延遲搜尋由這次更新取代
+        if self.search_job is not None:
+            self.after_cancel(self.search_job)
+            self.search_job = None
+
         # 清除之前建立的 FileBlock 元件，避免重複
         for block in self.file_blocks:
             block.destroy()
         self.file_blocks.clear()
 
-        # 取得搜尋關鍵字（小寫）
-        keyword = self.search_var.get().strip().lower() if hasattr(self, 'search_var') else ""
-        # 如果有輸入關鍵字，從 file_picker 做過濾搜尋
+        # 取得搜尋關鍵字
+        keyword = self.search_var.get().strip() if hasattr(self, 'search_var') else ""
+        # 如果有輸入關鍵字，從 file_picker 做過濾搜尋（檔名 + 含有該 designator 的板子）
         if keyword:
-            filtered_files = self.file_picker.search_files(keyword)
+            filtered_files = self.file_picker.search(keyword, self.board_index)
         else:
             filtered_files = self.file_picker.files
 
@@ -170,8 +235,9 @@ class FilePickPage(tk.Frame):
                 return
 
             print(f"✅ 設定為前景：{file.name}")
-            # 設定正面檔案路徑
+            # 設定正面檔案路徑，並在背景先開始處理
             self.front_path.set(file.path)
+            self.preload("front", file.path)
             
         finally:
             # 不論是否有回傳都要更新畫面
@@ -192,8 +258,9 @@ class FilePickPage(tk.Frame):
                 return
 
             print(f"✅ 設定為背景：{file.name}")
-            # 設定背面檔案路徑
+            # 設定背面檔案路徑，並在背景先開始處理
             self.back_path.set(file.path)
+            self.preload("back", file.path)
             
             
         finally:
@@ -201,6 +268,12 @@ class FilePickPage(tk.Frame):
             self.update_file_blocks()
 
         
+    def preload(self, side: str, path: str):
+        """背景預先處理選好的檔案（開檔、文字索引、邊界框）；path 為空時丟棄該面的工作"""
+        preloader = self.controller.shared_data.get("preloader")
+        if preloader is not None:
+            preloader.preload(side, path)
+
     # 取得目前正面路徑字串
     def get_cur_front(self):
         return self.front_path.get()
@@ -3,14 +3,24 @@ from tkinter import ttk
 
 from lib.debug import Debug
 from lib.PDFViewer import PDFViewer
+from lib.Preloader import Preloader
 from lib.CV2ImageProcessor import DisplayEngine
+from lib.BoundingBoxCache import BoundingBoxCache
+from lib.TaskScheduler import TaskScheduler, TaskCancelled
 
 from .AccessPage import AccessPage
 
-import threading
+import os
+import multiprocessing
+from tkinter import messagebox
+from concurrent.futures import ProcessPoolExecutor, wait
 
 
 class ValidPage(tk.Frame):
+    # 邊界框計算參數（同時作為快取比對條件）
+    # 預設仍用 raster；vector 流程驗證完成前只作為可選的 method
+    BBOX_PARAMS = {"method": "raster", "density_backend": "integral", "sobel_pyramid": True}
+
     def __init__(self, parent, controller):
         super().__init__(parent)
         self.controller = controller
@@ -18,6 +28,23 @@ class ValidPage(tk.Frame):
         self.build_ui()
         
         self.display_engine = DisplayEngine()
+        self.bbox_cache = BoundingBoxCache()
+        # 正反面所有頁面共用的 process pool：在主執行緒建立一次，之後每次開板（含 Preloader）重複使用
+        # 用 spawn 啟動子行程，避免在使用 fitz / sqlite 的背景執行緒中 fork
+        self.executor = ProcessPoolExecutor(
+            max_workers=os.cpu_count() or 1,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+        # 背景工作排程：進度與結果回到主執行緒才更新畫面
+        self.scheduler = TaskScheduler(self)
+        # 選檔頁一選好檔案就開始預先處理，確認後這裡接手結果
+        self.preloader = Preloader(
+            self.bbox_cache,
+            self.BBOX_PARAMS,
+            self.get_executor,
+            self.controller.shared_data.get("board_index"),
+        )
+        self.controller.shared_data["preloader"] = self.preloader
         
         self.bind("<<PDFPATHS_UPDATED>>", self.on_pdf_update)
         
@@ -26,6 +53,17 @@ class ValidPage(tk.Frame):
         front = self.controller.shared_data.get("front_path", "")
         back = self.controller.shared_data.get("back_path", "")
         return front,back
+
+    def get_executor(self) -> ProcessPoolExecutor:
+        return self.executor
+
+    def destroy(self):
+        self.scheduler.shutdown()
+        self.preloader.shutdown()
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+        super().destroy()
         
     @Debug.event("Event: ValidPage")
     def on_pdf_update(self, event):
@@ -34,34 +72,58 @@ class ValidPage(tk.Frame):
         # 開始進度條動畫
         self.progress.start()
 
-        # 用 thread 執行長時間任務，避免卡 UI
-        threading.Thread(target=self.run_pdf_processing).start()
-        
-    def run_pdf_processing(self):
+        # 背景執行長時間任務，避免卡 UI；換檔時還沒跑完的舊工作會被取消
         f, b = self.get_shared_paths()
-        self.pdf_viewer = PDFViewer(f, b)
-        
-        self.front_label.config(text=f"正面檔案路徑：{f}")
-        self.back_label.config(text=f"背面檔案路徑：{b}")
-
-        # === 前面處理 ===
-        self.pdf_viewer.front.get_trimmed_bounding_box_v6(0)
-        self.after(0, lambda: self.progress.config(value=50))  # 更新為 50%
-
-        # === 背面處理 ===
-        self.pdf_viewer.back.get_trimmed_bounding_box_v6(0)
-        self.after(0, lambda: self.progress.config(value=100))  # 更新為 100%
+        self.scheduler.submit(
+            "pdf_processing",
+            lambda task: self.run_pdf_processing(task, f, b),
+            on_done=self.update_ui_after_processing,
+            on_progress=lambda value, text: self.progress.config(value=value),
+            on_error=self.on_processing_error,
+        )
 
-        # === 回主線程更新畫面 ===
-        self.after(0, self.update_ui_after_processing)
+    def on_processing_error(self, e: Exception):
+        print(f"PDF 處理失敗：{e}")
+        self.progress.stop()
+        messagebox.showerror("PDF 處理失敗", str(e))
+        
+    def run_pdf_processing(self, task, f: str, b: str) -> PDFViewer:
+        """worker 執行緒：接手（或立刻開始）兩面的預先處理並等待完成，不碰 Tk 元件"""
+        jobs = [self.preloader.take("front", f), self.preloader.take("back", b)]
+        futures = {job.future for job in jobs}
+
+        # 開檔、文字索引、各頁邊界框都在 Preloader 進行，這裡依完成頁數回報進度
+        try:
+            while futures:
+                _, futures = wait(futures, timeout=0.1)
+                total = sum(job.total_pages for job in jobs)
+                if total:
+                    task.progress(sum(job.done_pages for job in jobs) * 100 / total)
+                else:
+                    task.check()
+        except TaskCancelled:
+            # 已換檔：兩面的剩餘工作都不用做了
+            for job in jobs:
+                job.cancel()
+            raise
+
+        preloaded = {job.side: job.result() for job in jobs}
+        task.progress(100)
+        return PDFViewer(f, b, self.controller.shared_data.get("board_index"), preloaded)
 
     @Debug.event("Process Finish","red")
-    def update_ui_after_processing(self):
+    def update_ui_after_processing(self, pdf_viewer: PDFViewer):
+        """主執行緒：套用背景處理結果"""
+        self.pdf_viewer = pdf_viewer
+        f, b = pdf_viewer.front.path, pdf_viewer.back.path
+        self.front_label.config(text=f"正面檔案路徑：{f}（{pdf_viewer.front.page_count} 頁）")
+        self.back_label.config(text=f"背面檔案路徑：{b}（{pdf_viewer.back.page_count} 頁）")
+
         self.progress.stop()  # 停止進度條
         self.progress.pack_forget()  # 移除元件
 
-        print(self.pdf_viewer.front.bounding_box)
-        print(self.pdf_viewer.back.bounding_box)
+        print(self.pdf_viewer.front.bounding_boxes)
+        print(self.pdf_viewer.back.bounding_boxes)
         
         self.build_image_ui(self.image_ui_container)
         
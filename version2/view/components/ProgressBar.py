@@ -1,6 +1,7 @@
 import tkinter as tk
 from tkinter import ttk
-import threading
+
+from lib.TaskScheduler import TaskScheduler
 
 class ProgressBar(tk.Frame):
     def __init__(self, parent):
@@ -12,6 +13,9 @@ class ProgressBar(tk.Frame):
         self.label = tk.Label(self, text="進度: 0%")
         self.label.pack(side='left', padx=5)
 
+        # 背景工作排程（進度與結果都回到主執行緒處理）
+        self.scheduler = TaskScheduler(self)
+
         self.disable()  # 預設隱藏
 
     def set_progress(self, percent: int, text: str = None):
@@ -39,20 +43,41 @@ class ProgressBar(tk.Frame):
         self.label.pack_forget()
         self.pack_forget()
 
-    def change_progress(self, func, on_complete=None):
+    def change_progress(self, func, on_complete=None, on_result=None, key="progress"):
         """
-        以線程執行 func(func參數應包含 set_progress 方法以更新進度)
-        func 格式: func(set_progress_callback)
-        on_complete: 完成後執行的 callback (無參數)
+        以背景工作執行 func(func參數應包含 set_progress 方法以更新進度)
+        func 格式: func(set_progress_callback)，在 worker 執行緒執行，不可以碰 Tk 元件，
+        需要更新畫面的部分放在回傳值交給 on_result
+        on_result: func 的回傳值（主執行緒）
+        on_complete: 完成後執行的 callback (無參數，主執行緒)；
+                     被同 key 的新工作取代時不會呼叫，由新工作負責
+        set_progress 同時是取消檢查點：同 key 再次呼叫時，舊的工作會在下一次回報進度時中止
         """
 
-        def worker():
+        def work(task):
+            return func(task.progress)
+
+        def finish():
+            if on_complete and not self.scheduler.is_active(key):
+                on_complete()
+
+        def done(result):
             try:
-                func(self.set_progress)
+                if on_result:
+                    on_result(result)
             finally:
-                if on_complete:
-                    self.after(0, on_complete)
-        
+                finish()
+
+        def error(e):
+            print(f"背景工作失敗：{e}")
+            finish()
+
         self.enable()
-        thread = threading.Thread(target=worker, daemon=True)
-        thread.start()
+        self.scheduler.submit(
+            key,
+            work,
+            on_done=done,
+            on_progress=self.set_progress,
+            on_error=error,
+            on_cancel=finish,
+        )